@@ -3,13 +3,12 @@ import pandas as pd
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import io
-import base64
 import os
 import sqlite3
 import json
 import time
+import hashlib
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -17,17 +16,30 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # --- Core Modules ---
-from src.index.ma_index import build_index, load_config, scale_0_100
+from src.index.ma_index import build_index, load_config, scale_0_100, scale_forecast
+from src.index.refresher import SnapshotRefresher
+from src.forecast.scenario import ScenarioKernel, coerce_shock_inputs, bucket_shocks, evaluate_scenarios
+from src.features.normalize import RollingMinMaxScaler
+from src.plotting.plot_cache import plot_cache
+from src.plotting.render_service import render_service, RENDER_TIMEOUT_S
+from src.utils.llm_gateway import llm_gateway
+from src.utils.ai_cache import ai_cache
+from src.utils.single_flight import single_flight
+from src.utils.prompt_budget import prompt_meter
+from src.utils.payload_canon import key_meter
+from src.plotting.downsample import lttb_indices
 from src.forecast.var_forecast import forecast_with_var
-from src.forecast.llm_forecast import gemini_forecast
+from src.forecast.llm_forecast import cached_gemini_forecast
 from src.reporting.narrative import generate_executive_summary, get_regime
 
 # --- Analysis Modules ---
 from src.analysis.strategic_radar import scan_sector_audit_streaming, scan_sector_audit, get_radar_cache
 from src.analysis.gemini_brief import brief_service
+from src.analysis import brief_precompute
 from src.analysis.gemini_dossier import dossier_service
 from src.data.retrieval_service import retrieval_service
 from src.data.schema import get_db_path
+from src.data.brief_inputs import industry_brief_context, build_market_map
 from src.analysis.profile_engine import build_user_profile
 from src.analysis.matchmaker import MatchEngine
 from src.analysis.gemini_architect import GeminiArchitect
@@ -43,219 +55,32 @@ def get_db():
     conn.row_factory = sqlite3.Row
     return conn
 
-def plot_to_base64(fig):
-    img = io.BytesIO()
-    fig.savefig(img, format='png', bbox_inches='tight', dpi=100)
-    img.seek(0)
-    b64 = base64.b64encode(img.getvalue()).decode()
-    plt.close(fig)
-    return b64
-
 # --- MACRO INDEX CACHE ---
-CACHED_INDEX = None
-CACHED_FORECAST = None
-CACHED_VAR_RESULTS = None
-
-def get_cached_data():
-    global CACHED_INDEX, CACHED_FORECAST, CACHED_VAR_RESULTS
-    if CACHED_INDEX is None:
-        print("Fetching data and building index (First Run)...")
-        try:
-            CACHED_INDEX = build_index("config/signals.yaml")
-            print("Fitting VAR model...")
-            bucket_cols = [c for c in CACHED_INDEX.columns if c.startswith("BKT_")]
-            var_input = CACHED_INDEX[bucket_cols].dropna()
-            CACHED_FORECAST, var_res = forecast_with_var(var_input, steps=12)
-            CACHED_VAR_RESULTS = var_res
-        except Exception as e:
-            print(f"Error building index: {e}")
-            return pd.DataFrame(), None, None
-    return CACHED_INDEX, CACHED_FORECAST, CACHED_VAR_RESULTS
-
-# --- PLOT GENERATORS (In-memory Base64) ---
-
-def generate_main_forecast_plot(df, fc_df, ai_fc=None):
-    """Main forecast chart with history + VAR + optional AI overlay."""
-    fig, ax = plt.subplots(figsize=(10, 5))
-    
-    last_hist_date = df.index[-1]
-    last_hist_val = df["Composite"].iloc[-1]
-    
-    # 1. Prepare continuous lines (connect history to forecast)
-    baseline_plot = pd.concat([pd.Series([last_hist_val], index=[last_hist_date]), fc_df["forecast"]])
-    # Scenario Plot (New)
-    scenario_plot = None
-    if "scenario_forecast" in fc_df and fc_df["scenario_forecast"] is not None:
-        scenario_plot = pd.concat([pd.Series([last_hist_val], index=[last_hist_date]), fc_df["scenario_forecast"]])
-
-    lower80_plot = pd.concat([pd.Series([last_hist_val], index=[last_hist_date]), fc_df["lower80"]])
-    upper80_plot = pd.concat([pd.Series([last_hist_val], index=[last_hist_date]), fc_df["upper80"]])
-    
-    # Plot History
-    # Colors: Intralinks Blue (#005587)
-    hist_subset = df["Composite"].iloc[-60:]
-    ax.plot(hist_subset.index, hist_subset.values, label="History", color="#005587", linewidth=2)
-    
-    # Plot Baseline VAR
-    # Colors: Intralinks Gold (#FFB81C)
-    ax.plot(baseline_plot.index, baseline_plot.values, label="Baseline Forecast (VAR)", color="#FFB81C", linestyle="--", linewidth=2)
-    
-    # Plot Simulated Scenario (Red)
-    if scenario_plot is not None:
-         ax.plot(scenario_plot.index, scenario_plot.values, label="Simulated Scenario", color="#d62728", linestyle="-.", linewidth=2)
-
-    # Confidence Intervals
-    ax.fill_between(lower80_plot.index, lower80_plot.values, upper80_plot.values, color="#FFB81C", alpha=0.2)
-
-    # AI Overlay (if provided)
-    if ai_fc is not None and not ai_fc.empty:
-        ai_plot = pd.concat([pd.Series([last_hist_val], index=[last_hist_date]), ai_fc])
-        ax.plot(ai_plot.index, ai_plot.values, label="AI Forecast (Gemini)", color="#9467bd", linestyle=":", linewidth=2.5, marker='o', markersize=4)
-    
-    # Neutral Line
-    ax.axhline(50, color='gray', linestyle=':', alpha=0.5)
-    
-    chart_title = "M&A Health Index (VAR + AI Forecast)" if (ai_fc is not None and not ai_fc.empty) else "M&A Health Index (VAR Forecast)"
-    ax.set_title(chart_title, fontweight='bold')
-    ax.legend(loc="upper right")
-    ax.grid(True, alpha=0.2)
-    ax.set_ylim(0, 100)
-    
-    return plot_to_base64(fig)
-
-def generate_attribution_plot(df):
-    """Horizontal bar chart of current drivers."""
-    fig, ax = plt.subplots(figsize=(10, 6))
-    
-    bucket_cols = [c for c in df.columns if c.startswith("BKT_")]
-    latest = df[bucket_cols].iloc[-1]
-    latest.index = [c.replace("BKT_", "").replace("_", " ").title() for c in latest.index]
-    
-    color_map = {
-        "Credit": "#1f77b4", 
-        "Sentiment": "#ff7f0e", 
-        "Valuation": "#2ca02c", 
-        "Volatility": "#d62728", 
-        "Liquidity": "#9467bd"
-    }
-    colors = [color_map.get(x, "#333333") for x in latest.index]
-    
-    latest.plot(kind='barh', ax=ax, color=colors, alpha=0.8)
-    ax.set_title("Current Drivers (Weighted Contribution)", fontweight='bold')
-    ax.axvline(0, color='black', linewidth=0.5)
-    ax.grid(True, alpha=0.2)
-    
-    return plot_to_base64(fig)
-
-def generate_irf_plot(var_results, var_input, shocks, weights_map):
-    """Impulse Response Function plot."""
-    fig, ax = plt.subplots(figsize=(10, 6))
-    try:
-        if var_results is None:
-            raise ValueError("No VAR model results available")
-            
-        irf = var_results.irf(12)
-        total_composite_response = pd.Series(0.0, index=range(13))
-        
-        for bucket_name, magnitude in shocks.items():
-            if magnitude == 0: continue
-            if bucket_name in var_input.columns:
-                impulse_idx = list(var_input.columns).index(bucket_name)
-                # orth_irfs is (steps, vars, shocks)
-                irf_values = irf.orth_irfs[:, :, impulse_idx]
-                
-                # Weighted sum of response across all variables
-                for i, col in enumerate(var_input.columns):
-                    w = weights_map.get(col, 0)
-                    resp = irf_values[:, i] * magnitude
-                    total_composite_response += resp * w
-                    
-        ax.plot(total_composite_response, marker='o', color='#d62728', linewidth=2, label="Net Impact on Index")
-        ax.axhline(0, color='black', linewidth=0.5)
-        ax.set_title("Net Impulse Response (Combined Shocks)", fontweight='bold')
-        ax.grid(True, alpha=0.2)
-        ax.legend()
-    except Exception as e:
-        ax.text(0.5, 0.5, f"No Impact / Static: {str(e)}", ha='center')
-        
-    return plot_to_base64(fig)
+# Stale-while-revalidate: requests read the current snapshot, a background thread rebuilds it
+index_refresher = SnapshotRefresher("config/signals.yaml")
 
-def generate_history_plot(df):
-    """Long-term history with regime shading."""
-    fig, ax = plt.subplots(figsize=(10, 5))
-    
-    # Regime Shading
-    ax.axhspan(50, 100, color='green', alpha=0.05, label='Expansionary')
-    ax.axhspan(0, 50, color='red', alpha=0.05, label='Contractionary')
-    
-    # Plot Index and Trend
-    df["Composite"].plot(ax=ax, label="M&A Health Index", color="#005587", linewidth=2)
-    df["Composite"].rolling(12).mean().plot(ax=ax, label="12-Month Trend", color="#FFB81C", linewidth=2, linestyle="--")
-    
-    ax.set_title("M&A Historical Health Index Performance", fontweight='bold')
-    ax.set_ylim(0, 100)
-    ax.grid(True, alpha=0.2)
-    ax.legend(loc="upper left")
-    
-    return plot_to_base64(fig)
-
-def generate_contributions_plot(df):
-    """Time series of component contributions."""
-    fig, ax = plt.subplots(figsize=(10, 5))
-    cols = [c for c in df.columns if c.startswith("BKT_")]
-    plot_df = df[cols].copy()
-    plot_df.columns = [c.replace("BKT_", "").replace("_", " ").title() for c in cols]
-    
-    color_map = {
-        "Credit": "#1f77b4", 
-        "Sentiment": "#ff7f0e", 
-        "Valuation": "#2ca02c", 
-        "Volatility": "#d62728", 
-        "Liquidity": "#9467bd"
-    }
-    plot_colors = [color_map.get(label, "#333333") for label in plot_df.columns]
-    
-    plot_df.iloc[-60:].plot(ax=ax, linewidth=1.5, alpha=0.8, color=plot_colors)
-    ax.set_title("Component Contributions (Time Series)", fontweight='bold')
-    ax.grid(True, alpha=0.2)
-    ax.legend(bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0)
-    plt.tight_layout()
-    
-    return plot_to_base64(fig)
-
-def generate_deal_activity_plot(df):
-    """Deal activity proxy (C&I Loans)."""
-    fig, ax = plt.subplots(figsize=(10, 5))
-    deal_proxy_col = None
-    if "CI_LOANS_RAW" in df.columns: deal_proxy_col = "CI_LOANS_RAW"
-    else:
-        for col in df.columns:
-            if "CI_LOANS" in col or "BUSLOANS" in col: 
-                 deal_proxy_col = col
-                 break
-                 
-    if deal_proxy_col:
-        deal_activity = df[deal_proxy_col].pct_change(12) * 100
-        deal_activity.iloc[-120:].plot(ax=ax, color="#2ca02c", linewidth=2, label="C&I Loans (YoY Growth)")
-        ax.axhline(0, color='black', linewidth=0.5)
-        ax.set_title("Deal Activity Proxy: Commercial & Industrial Loans Growth", fontweight='bold')
-        ax.legend(loc="upper left")
-        
-    ax.grid(True, alpha=0.2)
-    return plot_to_base64(fig)
-
-def generate_confidence_plot(df):
-    """CEO Confidence plot."""
-    fig, ax = plt.subplots(figsize=(10, 5))
-    conf_col = "BUSINESS_CONFIDENCE_RAW"
-    if conf_col in df.columns:
-        df[conf_col].iloc[-120:].plot(ax=ax, color="#ff7f0e", linewidth=2, label="CEO Confidence (OECD BCI)")
-        ax.axhline(100, color='black', linewidth=0.5, linestyle="--", label="Neutral (100)")
-        ax.set_title("CEO Confidence: OECD Business Confidence Indicator (USA)", fontweight='bold')
-        ax.legend(loc="upper left")
-        
-    ax.grid(True, alpha=0.2)
-    return plot_to_base64(fig)
+def get_cached_snapshot(block=False):
+    """
+    Current index snapshot, or None while the very first build is still running.
+    Only block=True (scripts) waits for a build; web requests never do.
+    """
+    if os.getenv("SNAPSHOT_REFRESH", "1") != "0":
+        index_refresher.ensure_started()
+    snapshot = index_refresher.current
+    if snapshot is None and block:
+        index_refresher.refresh_now(block=True)
+        snapshot = index_refresher.current
+    return snapshot
+
+def get_cached_data(block=False):
+    snapshot = get_cached_snapshot(block)
+    if snapshot is None:
+        return pd.DataFrame(), None, None
+    return snapshot["index"], snapshot["forecast"], snapshot["var_results"]
+
+# Boot-time warm start: workers pick up the current snapshot before the first request
+if os.getenv("SNAPSHOT_WARM_START", "1") != "0" and index_refresher.warm_start():
+    print(f"Warm start from index snapshot {index_refresher.version}")
 
 def apply_simulation_logic(rate_change, confidence_shock, volatility_shock):
     """
@@ -263,186 +88,120 @@ def apply_simulation_logic(rate_change, confidence_shock, volatility_shock):
     TUNED for visual responsiveness (approx 5x sensitivity).
     FIXED: Handles numeric strings properly.
     """
-    shocks = {}
-    
-    # 1. Rate Impact
-    r_chg = 0.0
-    try:
-        r_chg = float(rate_change)
-    except: 
-        r_chg = 0.0
-    
-    # Rate: 100bps -> 15.0 Index Points shock (Tuned for 0-100 scale)
-    rate_impact = -1 * (r_chg / 100.0) * 15.0
-    
-    # 2. Confidence Impact
-    c_val = 0.0
-    # Try float first (e.g. "-5")
-    try:
-        c_val = float(confidence_shock)
-    except:
-        # Fallback to string keywords
-        if isinstance(confidence_shock, str):
-            if 'Bear' in confidence_shock: c_val = -20.0
-            elif 'Bull' in confidence_shock: c_val = 20.0
-            else: c_val = 0.0
-        else:
-            c_val = 0.0
-    
-    # Confidence: 20 pts -> 20.0 Index Points shock
-    conf_impact = (c_val / 20.0) * 20.0
+    # Same mapping as the batch path (src/forecast/scenario.py), one row
+    inputs = coerce_shock_inputs(rate_change, confidence_shock, volatility_shock)
+    return {k: float(v[0]) for k, v in bucket_shocks([inputs]).items()}
 
-    # 3. Volatility Impact
-    v_val = 0.0
-    try:
-        v_val = float(volatility_shock)
-    except:
-        if isinstance(volatility_shock, str):
-            if 'High' in volatility_shock: v_val = 10.0
-            elif 'Low' in volatility_shock: v_val = -5.0
-            else: v_val = 0.0
-        else:
-            v_val = 0.0
-        
-    # Volatility: 10 pts -> 15.0 Index Points shock
-    vol_impact = -1 * (v_val / 10.0) * 15.0
-    
-    # Apply to buckets (Use Capitalized Keys to match VAR columns)
-    shocks["BKT_Credit"] = rate_impact + (vol_impact * 0.5)
-    shocks["BKT_Sentiment"] = conf_impact + (vol_impact * 0.2) 
-    shocks["BKT_Valuation"] = rate_impact 
-    shocks["BKT_Volatility"] = vol_impact 
-    shocks["BKT_Liquidity"] = rate_impact + (conf_impact * 0.3) 
-    
-    return shocks
-
-def calculate_scenario_forecast(var_results, baseline_forecast_df, shocks, bucket_order, weights):
+def calculate_scenario_forecast(var_results, baseline_forecast_df, shocks, bucket_order, weights, kernel=None):
     """
     Calculates the new forecast trajectory based on a multi-variable shock vector.
+    Pass the snapshot's ScenarioKernel to skip the IRF recomputation.
     """
-    forecast_horizon = 12
-    irf = var_results.irf(periods=forecast_horizon)
-    orth_irfs = irf.orth_irfs 
-    
-    total_impact = np.zeros(forecast_horizon + 1)
+    if kernel is None:
+        kernel = ScenarioKernel.from_var(var_results, weights, horizon=12)
 
-    for bucket_name, magnitude in shocks.items():
-        if magnitude == 0:
-            continue
-            
-        try:
-            # Handle naming mismatch (BKT_ prefix and Case)
-            # bucket_order usually has 'BKT_credit' etc.
-            
-            # Normalize list and key
-            bucket_order_norm = [b.lower() for b in bucket_order]
-            key_norm = bucket_name.lower()
-            
-            if key_norm in bucket_order_norm:
-                 shock_index = bucket_order_norm.index(key_norm)
-            elif key_norm.replace("bkt_", "") in bucket_order_norm:
-                 shock_index = bucket_order_norm.index(key_norm.replace("bkt_", ""))
-            else:
-                 continue
-
-            response_matrix = orth_irfs[:, :, shock_index]
-            scaled_impact_matrix = response_matrix * magnitude
-            
-            weighted_impact = np.zeros(forecast_horizon + 1)
-            for i, col_name in enumerate(bucket_order):
-                # Weights map usually keys are 'BKT_credit'
-                w = 0.0
-                if col_name in weights: w = weights[col_name]
-                elif f"BKT_{col_name}" in weights: w = weights[f"BKT_{col_name}"]
-                
-                weighted_impact += scaled_impact_matrix[:, i] * w
-            
-            total_impact += weighted_impact
-            
-        except ValueError:
-            continue
-
-    cumulative_impact = np.cumsum(total_impact)
-    
-    if len(cumulative_impact) > forecast_horizon:
-        aligned_impact = cumulative_impact[1:forecast_horizon+1]
-    else:
-        aligned_impact = cumulative_impact[:forecast_horizon]
+    aligned_impact = kernel.scenario_impact(shocks)[:len(baseline_forecast_df)]
 
     # Baseline forecast is 0-100. We add the impact.
     scenario_values = baseline_forecast_df.values + aligned_impact
     
     return pd.Series(scenario_values, index=baseline_forecast_df.index, name="Scenario_Forecast")
 
+def get_scenario_kernel(snapshot, weights_map):
+    """Kernel cached with the fitted model; older snapshots predate it and get one built."""
+    kernel = snapshot.get("scenario_kernel")
+    if kernel is None:
+        kernel = ScenarioKernel.from_var(snapshot["var_results"], weights_map, horizon=12)
+        snapshot["scenario_kernel"] = kernel
+    return kernel
+
+# Charts that depend only on the index: rendered once per snapshot version (render pool names)
+STATIC_PLOTS = {
+    "attribution_url": "attribution",
+    "history_url": "history",
+    "contributions_url": "contributions",
+    "deal_activity_url": "deal_activity",
+    "confidence_url": "confidence",
+}
+
+def render_static_plots(snapshot):
+    df = snapshot["index"]
+    return {
+        name: plot_cache.get_or_render(snapshot["version"], name, lambda r=renderer: render_service.render(r, df))
+        for name, renderer in STATIC_PLOTS.items()
+    }
+
+# Optional warm-up (PLOT_WARMUP=1): render the static charts at boot, not on the first request
+if os.getenv("PLOT_WARMUP", "0") == "1" and index_refresher.current is not None:
+    render_static_plots(index_refresher.current)
+    print(f"Plot cache warmed for {index_refresher.version}")
+
 # --- FULL DASHBOARD DATA GENERATOR ---
 
 
 
-def generate_dashboard_data(rate_change=0, confidence_shock='Neutral', volatility_shock='Normal', include_ai_forecast=False):
-    df, fc_df, var_results = get_cached_data()
-    if df.empty:
-        return {"latest_val": 0, "fc_val": 0, "plots": {}, "descriptions": {}}
+def compute_forecast_bundle(snapshot, rate_change=0, confidence_shock=0, volatility_shock=0):
+    """
+    Baseline, bands and scenario for one slider position. Shared by the dashboard and
+    the JSON series API. Returns (fc dict, irf_line, grid_hit, kernel, shocks).
+    """
+    df, fc_df, var_results = snapshot["index"], snapshot["forecast"], snapshot["var_results"]
 
-    # Forecast (VAR) - Restore Backup Logic
-    # 1. Reconstruct Forecast Composite from FC DF
-    # backup uses forecast_with_var then scales.
-    # forecast_with_var returns df with 'Composite_Index' (sum of components).
-    # We need to scale it using history.
-    
-    forecast_raw = fc_df["Composite_Index"] if "Composite_Index" in fc_df else fc_df.sum(axis=1)
-    history_raw = df["CompositeRaw"]
-    
-    combined_raw = pd.concat([history_raw, forecast_raw])
-    
-    cfg = load_config("config/signals.yaml")
-    
-    # Use imported scale_0_100 or define local? Imported is available.
-    combined_scaled = scale_0_100(combined_raw, window_months=cfg["scale"]["window_months"], neutral=cfg["scale"]["neutral"])
-    
-    # Create fc dict
+    # Forecast (VAR): baseline composite scaled to 0-100 once per model (snapshot)
     fc = {}
-    fc["forecast"] = combined_scaled.iloc[-12:]
-    
-    # Confidence Intervals (Simple logic from backup)
-    fc["lower80"] = fc["forecast"] - [i*0.5 + 2 for i in range(1, 13)]
-    fc["upper80"] = fc["forecast"] + [i*0.5 + 2 for i in range(1, 13)]
+    if "forecast_scaled" in snapshot:
+        fc["forecast"] = snapshot["forecast_scaled"]
+        weights_map = snapshot["weights_map"]
+    else:
+        # Snapshots built before the scaled baseline was stored
+        forecast_raw = fc_df["Composite_Index"] if "Composite_Index" in fc_df else fc_df.sum(axis=1)
+        cfg = load_config("config/signals.yaml")
+        fc["forecast"] = scale_forecast(RollingMinMaxScaler.from_dict(snapshot["scaler_state"]), forecast_raw)
+        weights_map = {f"BKT_{k}": v["weight"] for k, v in cfg["buckets"].items()} # ensure keys match columns
+    
+    # Confidence Intervals: bootstrap fan chart cached with the model (snapshot)
+    fan = snapshot.get("fan")
+    if fan is not None:
+        fc["lower80"] = fan["lower80"]
+        fc["upper80"] = fan["upper80"]
+    else:
+        # Snapshots built before the fan chart existed
+        fc["lower80"] = fc["forecast"] - [i*0.5 + 2 for i in range(1, 13)]
+        fc["upper80"] = fc["forecast"] + [i*0.5 + 2 for i in range(1, 13)]
     
-    # Scenario Forecast using Helper
+    # Scenario Forecast: precomputed slider grid first, live kernel evaluation off-grid
     shocks = apply_simulation_logic(rate_change, confidence_shock, volatility_shock)
-    bucket_cols = [c for c in df.columns if c.startswith("BKT_")]
-    weights_map = {f"BKT_{k}": v["weight"] for k, v in cfg["buckets"].items()} # ensure keys match columns
-    
-    # calculate_scenario_forecast expects bucket columns in var_results to match order
-    # Helper handles mismatch if names are close.
-    # var_results bucket order usually matches input df columns.
-    
-    scenario_series = calculate_scenario_forecast(var_results, fc["forecast"], shocks, bucket_cols, weights_map)
-    fc["scenario_forecast"] = scenario_series
+    kernel = get_scenario_kernel(snapshot, weights_map)
+    table = snapshot.get("scenario_table")
+    hit = table.lookup(*coerce_shock_inputs(rate_change, confidence_shock, volatility_shock)) if table is not None else None
+    if hit is not None:
+        scenario_path, irf_line = hit
+        fc["scenario_forecast"] = pd.Series(scenario_path, index=fc["forecast"].index, name="Scenario_Forecast")
+    else:
+        bucket_cols = [c for c in df.columns if c.startswith("BKT_")]
+        fc["scenario_forecast"] = calculate_scenario_forecast(var_results, fc["forecast"], shocks, bucket_cols, weights_map, kernel=kernel)
+        irf_line = kernel.impulse_response(shocks)
     
+    return fc, irf_line, hit is not None, kernel, shocks
+
+def ai_shock_inputs(rate_change, confidence_shock, volatility_shock):
+    """Integer shocks for the Gemini forecast; one mapping for both AI endpoints so they share a cache key."""
+    return tuple(int(v) for v in coerce_shock_inputs(rate_change, confidence_shock, volatility_shock))
+
+def generate_dashboard_data(rate_change=0, confidence_shock='Neutral', volatility_shock='Normal', include_ai_forecast=False):
+    snapshot = get_cached_snapshot()
+    if snapshot is None:
+        return {"latest_val": 0, "fc_val": 0, "plots": {}, "descriptions": {}, "data": index_refresher.status()}
+    df, fc_df, var_results = snapshot["index"], snapshot["forecast"], snapshot["var_results"]
+
+    fc, irf_line, grid_hit, kernel, shocks = compute_forecast_bundle(snapshot, rate_change, confidence_shock, volatility_shock)
+
     # AI Forecast
     fc["ai_forecast"] = None
     if include_ai_forecast:
         try:
-             # Ensure robust type conversion
-             r_val = float(rate_change) if rate_change else 0
-             c_val = 0
-             if isinstance(confidence_shock, str):
-                 if confidence_shock == 'Bear': c_val = -20
-                 elif confidence_shock == 'Bull': c_val = 20
-             else: c_val = float(confidence_shock) if confidence_shock else 0
-             
-             v_val = 0
-             if isinstance(volatility_shock, str):
-                 if volatility_shock == 'High': v_val = 10
-             else: v_val = float(volatility_shock) if volatility_shock else 0
-
-             gemini_fc, _ = gemini_forecast(
-                df["Composite"], 
-                steps=12, 
-                rate_shock=int(r_val),
-                confidence_shock=int(c_val), 
-                volatility_shock=int(v_val)
-             )
+             # Same call (and cache entry) as /api/narrative for these shocks
+             gemini_fc, _ = cached_gemini_forecast(df["Composite"], 12, *ai_shock_inputs(rate_change, confidence_shock, volatility_shock))
              if gemini_fc is not None and not gemini_fc.empty:
                  fc["ai_forecast"] = gemini_fc["forecast"]
         except Exception as e:
@@ -475,15 +234,15 @@ def generate_dashboard_data(rate_change=0, confidence_shock='Neutral', volatilit
         # Static Summary
         executive_summary = f"<h5>Market Overview</h5><p>The M&A Health Index currently stands at <strong>{latest_val:.1f}</strong>.</p><p class='text-muted small'>Enable 'Include AI Forecast' for AI-powered insights and predictions.</p>"
 
-    # Generate all plots
+    # Generate all plots: only the scenario-dependent charts render per request,
+    # both at once in the render pool
+    main_job = render_service.submit("main_forecast", df[["Composite"]], fc, fc["ai_forecast"])
+    irf_job = render_service.submit("irf", kernel, shocks, response=irf_line)
     plots = {
-        "plot_url": generate_main_forecast_plot(df, fc, fc["ai_forecast"]),
-        "attribution_url": generate_attribution_plot(df),
-        "irf_url": generate_irf_plot(var_results, df[[c for c in df.columns if c.startswith("BKT_")]], shocks, weights_map),
-        "history_url": generate_history_plot(df),
-        "contributions_url": generate_contributions_plot(df),
-        "deal_activity_url": generate_deal_activity_plot(df),
-        "confidence_url": generate_confidence_plot(df),
+        **render_static_plots(snapshot),
+        # Bounded wait; a dead or hung worker falls back to an inline render
+        "plot_url": render_service.result(main_job, timeout=RENDER_TIMEOUT_S),
+        "irf_url": render_service.result(irf_job, timeout=RENDER_TIMEOUT_S),
     }
     
     # Graph Descriptions
@@ -502,7 +261,17 @@ def generate_dashboard_data(rate_change=0, confidence_shock='Neutral', volatilit
         "fc_val": round(fc_val, 1),
         "plots": plots,
         "descriptions": descriptions,
-        "executive_summary": executive_summary
+        "executive_summary": executive_summary,
+        "series": {
+            "dates": [d.strftime("%Y-%m") for d in fc["forecast"].index],
+            "baseline": json_values(fc["forecast"].values, 2),
+            "scenario": json_values(fc["scenario_forecast"].values, 2),
+            "lower80": json_values(fc["lower80"], 2),
+            "upper80": json_values(fc["upper80"], 2),
+            "irf": json_values(irf_line, 3),
+            "grid_hit": grid_hit
+        },
+        "data": index_refresher.status()
     }
 
 # --- ROUTES: MACRO FORECAST ---
@@ -558,27 +327,10 @@ def narrative():
     # 2. If AI requested, try to get LLM rationale
     if include_ai:
         try:
-            # We need to run the forecast to get the rationale context
-            # Make sure we pass the correct types!
-            r_val = float(rate_change) if rate_change else 0
-            
-            # Helper for casting
-            def safe_shock(val, map_str):
-                if isinstance(val, str) and val in map_str: return map_str[val]
-                try: return float(val)
-                except: return 0
-                
-            c_val = safe_shock(conf_shock, {'Bear': -20, 'Bull': 20, 'Neutral': 0})
-            v_val = safe_shock(vol_shock, {'High': 10, 'Normal': 0, 'Low': -10})
-
-            _, rationale = gemini_forecast(
-                df["Composite"], 
-                steps=12,
-                rate_shock=int(r_val),
-                confidence_shock=int(c_val),
-                volatility_shock=int(v_val)
-            )
-            
+            # Reuses the forecast computed by /api/update_forecast for these shocks
+            # (cached, or awaited if that call is still in flight)
+            _, rationale = cached_gemini_forecast(df["Composite"], 12, *ai_shock_inputs(rate_change, conf_shock, vol_shock))
+
             if rationale and "Forecast failed" not in rationale:
                 summary_html += f"<hr><h4>AI Strategic Insight</h4>{rationale}"
             else:
@@ -593,6 +345,250 @@ def narrative():
     
     return jsonify({"html": summary_html})
 
+MAX_BATCH_SCENARIOS = 20000
+
+def parse_batch_inputs(req):
+    """(N, 3) slider inputs from either an explicit 'shocks' list or a 'grid' sweep."""
+    if not isinstance(req, dict):
+        raise TypeError("body must be a JSON object")
+    if "grid" in req:
+        grid = req["grid"]
+        if not isinstance(grid, dict):
+            raise TypeError("grid must be an object of value lists")
+        axes = [np.asarray(grid.get(k, [0]), dtype=float).reshape(-1) for k in ("rate_change", "confidence_shock", "volatility_shock")]
+        # Size check before meshgrid: three 1,000-value axes would allocate ~24 GB
+        n = int(np.prod([a.size for a in axes]))
+        if n > MAX_BATCH_SCENARIOS:
+            raise OverflowError(f"Too many scenarios ({n} > {MAX_BATCH_SCENARIOS})")
+        mesh = np.meshgrid(*axes, indexing="ij")
+        return np.stack([m.ravel() for m in mesh], axis=1)
+    rows = req.get("shocks", [])
+    if not isinstance(rows, list) or not all(isinstance(row, list) and len(row) == 3 for row in rows):
+        raise TypeError("shocks must be a list of [rate_bps, confidence, volatility] rows")
+    if len(rows) > MAX_BATCH_SCENARIOS:
+        raise OverflowError(f"Too many scenarios ({len(rows)} > {MAX_BATCH_SCENARIOS})")
+    return np.array([coerce_shock_inputs(*row) for row in rows], dtype=float).reshape(-1, 3)
+
+@app.route('/api/scenarios/batch', methods=['POST'])
+def scenarios_batch():
+    """
+    Evaluate many scenarios against the cached VAR in one vectorized call; no plots.
+    Body: {"shocks": [[rate_bps, confidence, volatility], ...]} or
+          {"grid": {"rate_change": [...], "confidence_shock": [...], "volatility_shock": [...]}}
+    ?format=npy returns the (N, 12) float64 array as a .npy payload instead of JSON.
+    """
+    req = request.get_json(silent=True)
+    try:
+        inputs = parse_batch_inputs({} if req is None else req)
+    except OverflowError as e:
+        return jsonify({"error": str(e)}), 400
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid shocks: {e}"}), 400
+    if len(inputs) == 0:
+        return jsonify({"error": "No shocks provided"})
+    if len(inputs) > MAX_BATCH_SCENARIOS:
+        return jsonify({"error": f"Too many scenarios ({len(inputs)} > {MAX_BATCH_SCENARIOS})"})
+
+    snapshot = get_cached_snapshot()
+    if snapshot is None:
+        return jsonify({"error": "Index warming up", "data": index_refresher.status()})
+
+    fc_df = snapshot["forecast"]
+    forecast_raw = fc_df["Composite_Index"] if "Composite_Index" in fc_df else fc_df.sum(axis=1)
+    baseline = scale_forecast(RollingMinMaxScaler.from_dict(snapshot["scaler_state"]), forecast_raw)
+    cfg = load_config("config/signals.yaml")
+    weights_map = {f"BKT_{k}": v["weight"] for k, v in cfg["buckets"].items()}
+
+    t0 = time.perf_counter()
+    paths = evaluate_scenarios(get_scenario_kernel(snapshot, weights_map), baseline.values, inputs)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+
+    if request.args.get("format") == "npy":
+        buf = io.BytesIO()
+        np.save(buf, paths)
+        resp = Response(buf.getvalue(), mimetype="application/octet-stream")
+        resp.headers["X-Snapshot-Version"] = snapshot["version"]
+        resp.headers["X-Dates"] = ",".join(d.strftime("%Y-%m") for d in baseline.index)
+        return resp
+
+    return jsonify({
+        "dates": [d.strftime("%Y-%m") for d in baseline.index],
+        "baseline": np.round(baseline.values, 2).tolist(),
+        "inputs": inputs.tolist(),
+        "scenarios": np.round(paths, 2).tolist(),
+        "count": len(paths),
+        "eval_ms": round(elapsed_ms, 3),
+        "data": index_refresher.status()
+    })
+
+# --- ROUTES: JSON SERIES (client-side charts) ---
+
+def json_values(values, ndigits=3):
+    """Rounded floats with NaN -> null for compact JSON columns."""
+    return [None if v != v else v for v in np.round(np.asarray(values, dtype=float), ndigits).tolist()]
+
+def series_etag(snapshot):
+    """Content is fully determined by the snapshot version, the route and its query args."""
+    key = f"{snapshot['version']}|{request.path}|{sorted(request.args.items(multi=True))}"
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+def not_modified(etag):
+    resp = Response(status=304)
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+def series_response(payload, etag):
+    resp = jsonify(payload)
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+@app.route('/api/v2/index/series')
+def v2_index_series():
+    """
+    Index history as columnar JSON.
+    ?start=YYYY-MM&end=YYYY-MM slices dates, ?columns=Composite,BKT_credit picks columns,
+    ?max_points=N downsamples with LTTB (points chosen on the Composite line).
+    """
+    snapshot = get_cached_snapshot()
+    if snapshot is None:
+        return jsonify({"error": "Index warming up", "data": index_refresher.status()})
+    start, end = request.args.get("start"), request.args.get("end")
+    try:
+        for bound in (start, end):
+            if bound:
+                pd.Timestamp(bound)
+    except ValueError:
+        return jsonify({"error": "start/end must be dates (YYYY-MM or YYYY-MM-DD)"}), 400
+    max_points = request.args.get("max_points", type=int)
+    if max_points is not None and max_points < 3:
+        # LTTB keeps both endpoints plus at least one bucket
+        return jsonify({"error": "max_points must be at least 3"}), 400
+    etag = series_etag(snapshot)
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+
+    df = snapshot["index"].loc[start:end]
+    requested = request.args.get("columns")
+    columns = [c for c in requested.split(",") if c in df.columns] if requested else list(df.columns)
+
+    downsampled = False
+    if max_points and len(df) > max_points:
+        x = df.index.values.astype("datetime64[s]").astype(np.int64)
+        ref = df["Composite"].ffill().bfill().fillna(0.0).values
+        df = df.iloc[lttb_indices(x, ref, max_points)]
+        downsampled = True
+
+    return series_response({
+        "version": snapshot["version"],
+        "data_vintage": snapshot["data_vintage"],
+        "dates": [d.strftime("%Y-%m-%d") for d in df.index],
+        "columns": {c: json_values(df[c].values) for c in columns},
+        "points": len(df),
+        "downsampled": downsampled
+    }, etag)
+
+@app.route('/api/v2/forecast/series')
+def v2_forecast_series():
+    """
+    Baseline forecast, fan bands, scenario and IRF line for one slider position as JSON.
+    ?rate_change=&confidence_shock=&volatility_shock= as on /api/update_forecast;
+    ?history=N appends the last N months of the Composite (default 60, as the main chart).
+    """
+    snapshot = get_cached_snapshot()
+    if snapshot is None:
+        return jsonify({"error": "Index warming up", "data": index_refresher.status()})
+    etag = series_etag(snapshot)
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+
+    fc, irf_line, grid_hit, _, _ = compute_forecast_bundle(
+        snapshot,
+        request.args.get("rate_change", 0),
+        request.args.get("confidence_shock", 0),
+        request.args.get("volatility_shock", 0),
+    )
+    series = {
+        "baseline": json_values(fc["forecast"].values, 2),
+        "scenario": json_values(fc["scenario_forecast"].values, 2),
+        "lower80": json_values(fc["lower80"], 2),
+        "upper80": json_values(fc["upper80"], 2),
+    }
+    fan = snapshot.get("fan")
+    if fan is not None:
+        for col in ("lower50", "median", "upper50"):
+            series[col] = json_values(fan[col].values, 2)
+
+    # iloc[-0:] would be the whole series, a negative N its head
+    months = max(1, request.args.get("history", 60, type=int))
+    history = snapshot["index"]["Composite"].iloc[-months:]
+    return series_response({
+        "version": snapshot["version"],
+        "data_vintage": snapshot["data_vintage"],
+        "dates": [d.strftime("%Y-%m-%d") for d in fc["forecast"].index],
+        "series": series,
+        "irf": json_values(irf_line),
+        "grid_hit": grid_hit,
+        "history": {
+            "dates": [d.strftime("%Y-%m-%d") for d in history.index],
+            "composite": json_values(history.values, 2)
+        }
+    }, etag)
+
+@app.route('/api/index/status')
+def index_status():
+    """Vintage and age of the snapshot currently being served."""
+    return jsonify({**index_refresher.status(), "plot_cache": plot_cache.stats(), "render_pool": render_service.stats()})
+
+@app.route('/api/llm/status')
+def llm_status():
+    """Shared Gemini gateway (concurrency, per-model circuits, latency histograms), prompt sizes per service and calls saved by single-flight."""
+    return jsonify({**llm_gateway.stats(), "prompts": prompt_meter.stats(), "single_flight": single_flight.stats()})
+
+def admin_authorized():
+    # ADMIN_TOKEN unset -> admin routes are open (local/dev), as the rest of the API
+    token = os.environ.get("ADMIN_TOKEN")
+    return not token or request.headers.get("X-Admin-Token") == token
+
+@app.route('/api/admin/ai-cache', methods=['GET'])
+def ai_cache_stats():
+    """Hit/miss counters, sizes and TTLs of the shared Gemini output cache, and the key reuse payload canonicalization adds."""
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 403
+    return jsonify({**ai_cache.stats(), "canonicalization": key_meter.stats()})
+
+@app.route('/api/admin/ai-cache/purge', methods=['POST'])
+def ai_cache_purge():
+    """Body: {"kind": "brief" | "dossier" | ... (optional), "expired_only": bool}."""
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 403
+    data = request.get_json(silent=True) or {}
+    removed = ai_cache.purge(kind=data.get("kind"), expired_only=bool(data.get("expired_only", False)))
+    print(f"AI cache purge (kind={data.get('kind') or 'all'}, expired_only={bool(data.get('expired_only', False))}): {removed} entries")
+    return jsonify({"purged": removed, **ai_cache.stats()})
+
+@app.route('/api/admin/precompute-briefs', methods=['GET', 'POST'])
+def precompute_briefs():
+    """
+    POST: start a brief precompute run in the background (nightly Cloud Scheduler job).
+          Body: {"sectors": [...] (optional), "force": bool}. 409 while a run is active.
+    GET:  the latest runs from run_log (status, counts, cost, failures).
+    """
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 403
+    if request.method == 'GET':
+        return jsonify({"runs": brief_precompute.recent_runs(int(request.args.get('limit', 10)))})
+
+    data = request.get_json(silent=True) or {}
+    try:
+        run_id = brief_precompute.start_background(sectors=data.get("sectors"), force=bool(data.get("force", False)))
+    except Exception as e:
+        return jsonify({"error": f"Could not start precompute: {e}"}), 500
+    if run_id is None:
+        return jsonify({"error": "A precompute run is already in progress"}), 409
+    return jsonify({"run_id": run_id, "status": "started"}), 202
+
 # --- ROUTES: DEAL RADAR (STRATEGIC) ---
 
 @app.route('/deal-radar')
@@ -652,6 +648,19 @@ def deal_radar():
                            narrative=[],
                            playbook=None)
 
+def sse_response(events):
+    """Server-sent events from an iterator of dicts (same framing as /api/deal-radar/stream)."""
+    def generate():
+        for event in events:
+            yield f"data: {json.dumps(event, default=str)}\n\n"
+    # Keep proxies from buffering the stream
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def stream_request_args():
+    # Streaming routes accept a JSON body (fetch) or query args (EventSource)
+    return request.get_json(silent=True) or request.args.to_dict()
+
 @app.route('/api/deal-radar/stream')
 def deal_radar_stream():
     """SSE Endpoint for Real-time Loading Bar."""
@@ -686,21 +695,10 @@ def industry_brief():
     force = data.get('force_refresh', False)
     
     conn = get_db()
-    cursor = conn.cursor()
-    
-    db_sector = 'Technology' if sector == 'Tech' else sector
-    cursor.execute("SELECT AVG(s.spi) FROM scores s JOIN companies c ON s.ticker=c.ticker WHERE c.sector=?", (db_sector,))
-    avg_spi = cursor.fetchone()[0] or 0
-    
-    macro_row = cursor.execute("SELECT * FROM financing_macro ORDER BY date DESC LIMIT 1").fetchone()
-    macro = dict(macro_row) if macro_row else {}
-    conn.close()
-    
-    context = {
-        "macro": macro,
-        "aggregates": {"avg_spi": round(avg_spi, 1), "sector": sector},
-        "top_drivers": []
-    }
+    try:
+        context = industry_brief_context(conn, sector)
+    finally:
+        conn.close()
     
     result = brief_service.generate_brief(sector, sub_industry, context, force_refresh=force)
     return jsonify(result)
@@ -720,6 +718,23 @@ def company_dossier():
     return jsonify(result)
 
 
+@app.route('/api/company-dossier/stream', methods=['GET', 'POST'])
+def company_dossier_stream():
+    """SSE variant of /api/company-dossier: Gemini chunks as they arrive, full dossier in the last event."""
+    req = stream_request_args()
+    ticker = req.get('ticker')
+    force = str(req.get('force_refresh', False)).lower() in ('1', 'true')
+
+    if not ticker:
+        return jsonify({"error": "No ticker provided"})
+
+    def events():
+        yield {"status": f"Retrieving context for {ticker}...", "complete": False}
+        context_payload = retrieval_service.retrieve_context(ticker)
+        yield from dossier_service.generate_dossier_stream(ticker, context_payload, force_refresh=force)
+
+    return sse_response(events())
+
 # --- DEAL ARCHITECT v1.1 ROUTES ---
 
 @app.route('/deal-architect')
@@ -744,243 +759,11 @@ def help_page():
 @app.route('/api/v2/market-map')
 def v2_market_map():
     sector = request.args.get('sector', 'Tech')
-    db_sector = 'Technology' if sector == 'Tech' else sector
-    
     conn = get_db()
-    cursor = conn.cursor()
-    
-    # Check if extended columns exist in companies table
-    # We try to select them; if not present, we get None/Error. 
-    # For stability, we select standard columns and separate query or join if needed.
-    # Assuming standard columns for now and we will calculate what we can or mock unavailable ones 
-    # based on the prompt's "N/A" fallback. 
-    # Ideally we'd join with a 'fundamentals' table if it existed.
-    
-    query = """
-        SELECT c.ticker, c.company_name, c.market_cap, c.sub_sector,
-               s.spi, s.buyer_readiness, s.capacity, 
-               s.spi_drivers_json, s.br_drivers_json
-        FROM companies c
-        JOIN scores s ON c.ticker = s.ticker
-        WHERE c.sector = ?
-        ORDER BY s.spi DESC
-    """
     try:
-        cursor.execute(query, (db_sector,))
-        rows = cursor.fetchall()
-    except:
-        # Fallback if sub_sector missing
-        query = """
-            SELECT c.ticker, c.company_name, c.market_cap,
-                   s.spi, s.buyer_readiness, s.capacity, 
-                   s.spi_drivers_json, s.br_drivers_json
-            FROM companies c
-            JOIN scores s ON c.ticker = s.ticker
-            WHERE c.sector = ?
-            ORDER BY s.spi DESC
-        """
-        cursor.execute(query, (db_sector,))
-        rows = cursor.fetchall()
-
-    conn.close()
-    
-    sellers = []
-    buyers = []
-    
-    # Helper to clean firepower
-    def parse_firepower(val, cap):
-        if not val: return 0.0
-        try:
-             fp = float(val)
-             # Sanity check: Firepower > 10x Market Cap is suspicious (unless micro cap)
-             if cap and fp > (cap * 10) and cap > 1e9: 
-                 return 0.0 # Anomaly
-             return fp
-        except:
-            return 0.0
-
-    # Helper for Seller Confidence
-    def get_confidence_and_type(driver_str, spi):
-        stype = "Opportunistic"
-        conf = "Low"
-        emoji = ""
-        
-        if any(x in driver_str for x in ["🔥", "Forced", "Distress", "Bankruptcy"]):
-            stype = "Forced Seller"
-            emoji = "🔥"
-            conf = "High"
-        elif "Strategic Review" in driver_str or "📉" in driver_str:
-            stype = "Strategic Review"
-            emoji = "📉"
-            conf = "High" if spi > 80 else "Med"
-        elif spi > 75:
-             stype = "High Potential"
-             conf = "Med"
-             
-        return stype, emoji, conf
-
-    import random # Mocking financial metrics as they aren't in the DB query result yet
-    
-    for r in rows:
-        row_dict = dict(r)
-        
-        try:
-            spi_d = json.loads(row_dict['spi_drivers_json']) if row_dict['spi_drivers_json'] else []
-            br_d = json.loads(row_dict['br_drivers_json']) if row_dict['br_drivers_json'] else []
-        except:
-            spi_d, br_d = [], []
-        
-        base_obj = {
-            "ticker": row_dict['ticker'],
-            "name": row_dict['company_name'],
-            "sub_sector": row_dict.get('sub_sector', sector),
-            "market_cap": row_dict['market_cap']
-        }
-        
-        # --- Supply Logic ---
-        if row_dict['spi'] >= 20:
-            # Deterministic Seller Type from Drivers
-            full_driver_str = " ".join([str(d) for d in spi_d])
-            s_type, s_emoji, s_conf = get_confidence_and_type(full_driver_str, row_dict['spi'])
-            
-            # Simulated Financials (Replace with real DB columns when available)
-            # Logic: We use SPI to loosely correlate for realism if data missing
-            m_cap = row_dict['market_cap'] or 1e9
-            
-            # Net Leverage: Higher for Forced/Distressed
-            sim_lev = round(random.uniform(4.0, 7.0), 1) if "Forced" in s_type else round(random.uniform(1.5, 3.5), 1)
-            
-            # Price Dislocation: Higher for distressed
-            sim_disc = round(random.uniform(30, 60)) if "Forced" in s_type else round(random.uniform(5, 25))
-            
-            # Enhanced Driver Formatting
-            drivers_fmt = []
-            if "Forced" in s_type: drivers_fmt.append(f"Lev: {sim_lev}x")
-            if "Distress" in s_type: drivers_fmt.append("Liquidity < 6m")
-            if spi_d: drivers_fmt.extend([str(d).replace("TYPE:","").strip() for d in spi_d[:2]])
-
-            sellers.append({
-                **base_obj,
-                "spi": int(row_dict['spi']),
-                "seller_type": s_type,
-                "seller_emoji": s_emoji,
-                "confidence": s_conf,
-                "metrics": {
-                    "net_leverage": f"{sim_lev}x",
-                    "price_dislocation": f"-{sim_disc}%",
-                    "interest_coverage": "2.1x" if sim_lev < 4 else "0.8x",
-                    "debt_maturity": "2026"
-                },
-                "likely_asset_type": "WholeCo" if m_cap < 5e9 else "Carve-out",
-                "catalyst_badge": "Earnings Miss" if sim_disc > 20 else "Strategic Review",
-                "drivers": drivers_fmt[:3], # Top 3 Numeric/Text Mixed
-                "all_drivers": [str(d) for d in spi_d]
-            })
-        
-        # --- Demand Logic ---
-        if row_dict['buyer_readiness'] >= 20:
-            fp_val = parse_firepower(row_dict['capacity'], row_dict['market_cap'])
-            
-            # Mandate extraction
-            mandate = "Growth"
-            for d in br_d:
-                 if "Targeting:" in str(d):
-                     mandate = str(d).replace("Targeting:", "").strip()
-                     break
-            
-            buyers.append({
-                **base_obj,
-                "br": int(max(0, min(100, row_dict['buyer_readiness']))), # Clamp 0-100
-                "firepower": fp_val, # Raw USD
-                "mandate": mandate,
-                "drivers": [str(d) for d in br_d],
-                "is_anomaly": True if (fp_val > (row_dict['market_cap'] * 2) and row_dict['market_cap'] > 1e9) else False
-            })
-    
-    # Filter anomalies from default list
-    buyers = [b for b in buyers if not b.get('is_anomaly', False)]
-    
-    sellers.sort(key=lambda x: x['spi'], reverse=True)
-    buyers.sort(key=lambda x: x['br'], reverse=True)
-    
-    # --- PINNED TICKER LOGIC (SSNC) ---
-    def pin_ticker(data_list, ticker, default_obj=None):
-        idx = next((i for i, item in enumerate(data_list) if item["ticker"] == ticker), -1)
-        if idx != -1:
-            item = data_list.pop(idx)
-            data_list.insert(0, item)
-        elif default_obj:
-            data_list.insert(0, default_obj)
-        return data_list
-
-    # Mock SSNC with numeric drivers
-    ssnc_seller = {
-        "ticker": "SSNC", "name": "SS&C Technologies", "sub_sector": "Software", "market_cap": 16e9,
-        "spi": 88, "seller_type": "Strategic Review", "seller_emoji": "📉", "confidence": "High",
-        "metrics": {"net_leverage": "4.2x (High)", "interest_coverage": "2.5x", "price_dislocation": "-12%"}, 
-        "drivers": ["Activists (13D)", "Margin Pressure (-200bps)", "Portfolio Ops"],
-        "all_drivers": ["Activists (13D)", "Margin Pressure (-200bps)", "Portfolio Ops"],
-        "likely_asset_type": "Carve-out (FinTech)",
-        "catalyst_badge": "13D Filing"
-    }
-    
-    ssnc_buyer = {
-        "ticker": "SSNC", "name": "SS&C Technologies", "sub_sector": "Software", "market_cap": 16e9,
-        "br": 92, "firepower": 4500000000.0, "mandate": "Vertical Software", 
-        "drivers": ["Consolidator", "High FCF", "Recurring Revenue"]
-    }
-
-    sellers = pin_ticker(sellers, "SSNC", ssnc_seller)
-    buyers = pin_ticker(buyers, "SSNC", ssnc_buyer)
-    
-    # --- SELLER PLAYBOOK GENERATION ---
-    # Bucket sellers into archetypes
-    archetypes = {
-        "Refinancing-Driven": {"count": 0, "examples": [], "desc": "Maturity wall < 18m or Lev > 5x"},
-        "Price-Distress": {"count": 0, "examples": [], "desc": "Dislocation > 30% + Stable Assets"},
-        "Activist-Driven": {"count": 0, "examples": [], "desc": "13D Filings or Strategic Review"},
-        "Growth-Stall": {"count": 0, "examples": [], "desc": "Rev Growth < 0% + Comp Pressure"}
-    }
-    
-    for s in sellers:
-        # Simple heuristic classification
-        d_str = " ".join(s.get('all_drivers', []))
-        is_matched = False
-        
-        if "Maturity" in d_str or "Leverage" in d_str:
-            archetypes["Refinancing-Driven"]["count"] += 1
-            is_matched = True
-        if "Dislocation" in d_str or "Price" in d_str:
-            archetypes["Price-Distress"]["count"] += 1
-            is_matched = True
-        if "Activist" in d_str or "Review" in d_str:
-            archetypes["Activist-Driven"]["count"] += 1
-            is_matched = True
-        
-        # Default bucket
-        if not is_matched and s['spi'] > 60:
-             archetypes["Growth-Stall"]["count"] += 1
-
-    # Format Playbook for Frontend
-    top_archetypes = sorted(
-        [{"name": k, "count": v["count"], "desc": v["desc"]} for k,v in archetypes.items()], 
-        key=lambda x: x['count'], reverse=True
-    )[:3]
-
-    playbook = {
-        "top_archetypes": top_archetypes,
-        "watchlist": [
-            {"label": "HY Spreads > 500bps", "status": "Stable", "impact": "High"},
-            {"label": "Sponsor Dry Powder", "status": "deployed", "impact": "Medium"}
-        ],
-        "actions": [
-            "Screen for spin-off candidates in 'Activist' bucket",
-            "Pitch private credit recap for 'Refinancing' targets",
-            "Refresh buy-side mandates for 'Price-Distress' assets"
-        ]
-    }
-
-    return jsonify({"sellers": sellers[:500], "buyers": buyers[:500], "playbook": playbook})
+        return jsonify(build_market_map(conn, sector))
+    finally:
+        conn.close()
 
 @app.route('/api/v2/deal-tape')
 def v2_deal_tape():
@@ -1066,6 +849,15 @@ def v2_deep_dive():
     html_result = analyze_company(ticker, type_, context)
     return jsonify({'html': html_result})
 
+@app.route('/api/v2/deep-dive/stream', methods=['POST'])
+def v2_deep_dive_stream():
+    """SSE variant of /api/v2/deep-dive: HTML chunks as they arrive, cleaned HTML in the last event."""
+    data = stream_request_args()
+    if not data.get('ticker'):
+        return jsonify({"error": "No ticker provided"})
+    from src.analysis.gemini_deep_dive import analyze_company_stream
+    return sse_response(analyze_company_stream(data.get('ticker'), data.get('type'), data.get('context', {})))
+
 @app.route('/api/v2/sector-brief', methods=['POST'])
 def v2_sector_brief():
     data = request.json
@@ -1109,6 +901,9 @@ def api_search_tickers():
 
 # --- Deal Architect Routes (Consolidated) ---
 
+# Candidates re-ranked by the AI batch on /api/deal-architect/match
+AI_RERANK_TOP = int(os.getenv("AI_RERANK_TOP", "40"))
+
 @app.route('/api/deal-architect/match', methods=['POST'])
 def api_deal_match():
     """Rank candidates with Banker Logic + AI Batch Analysis."""
@@ -1135,7 +930,7 @@ def api_deal_match():
     # 3. AI Batch (Consolidated Service)
     ai_insights = {}
     if include_ai and matches:
-        top_matches = matches[:10] # Batch limit
+        top_matches = matches[:AI_RERANK_TOP] # Batch limit (chunked + concurrent in the service)
         ai_insights = brief_service.analyze_match_batch(
             user_profile={"ticker": user_profile.ticker, "name": user_profile.business_summary},
             candidates=top_matches,
@@ -1144,15 +939,8 @@ def api_deal_match():
         
         # Re-Rank based on AI Fit Score (User Request)
         if ai_insights:
-            for m in top_matches:
-                t = m.get('ticker')
-                if t in ai_insights:
-                    m['ai_fit_score'] = ai_insights[t].get('fit_score', 0)
-            
-            # Sort top 10 by AI Score descending
-            top_matches.sort(key=lambda x: x.get('ai_fit_score', 0), reverse=True)
-            # Reconstruct matches list with re-ranked top 10
-            matches = top_matches + matches[10:]
+            # Scored candidates re-ordered by AI Score; unscored ones keep their banker slot
+            matches = brief_service.rerank_matches(top_matches, ai_insights) + matches[AI_RERANK_TOP:]
             
     return jsonify({
         "matches": matches,
@@ -1208,6 +996,59 @@ def api_deep_dive():
             "macro": {}
         })
 
+@app.route('/api/deal-architect/deep-dive/stream', methods=['GET', 'POST'])
+def api_deep_dive_stream():
+    """
+    SSE variant of /api/deal-architect/deep-dive. Events: live metrics as soon as the
+    deal physics are computed, then memo chunks, then the full response payload.
+    """
+    data = stream_request_args()
+    user_ticker = data.get('user_ticker')
+    target_ticker = data.get('target_ticker')
+    intent = data.get('intent', 'BUY')
+    mandate = data.get('mandate', 'Adjacency')
+
+    def events():
+        yield {"status": "Fetching live market data...", "complete": False}
+        try:
+            result = perform_live_dossier(user_ticker, target_ticker, intent, mandate)
+        except Exception as e:
+            print(f"ERROR in api_deep_dive_stream: {e}")
+            yield {"status": "Failed", "complete": True, "error": str(e),
+                   "memo_html": f"<div class='alert alert-danger'>System Error: {str(e)}</div>",
+                   "verdict": {"status": "ERROR"}, "metrics": {}, "scores": {}, "macro": {}}
+            return
+
+        live = {"metrics": result['metrics'], "scores": result['scores'], "macro": result['macro']}
+        yield {"status": "Live data ready", "complete": False, **live}
+
+        memo = {}
+        for event in brief_service.generate_live_deal_memo_stream(
+            user=result['user'],
+            candidate=result['candidate'],
+            intent=intent,
+            mandate_mode=mandate,
+            metric_data={"metrics": result['metrics'], "scores": result['scores']},
+            macro=result['macro'],
+            headlines=result.get('headlines', '')
+        ):
+            if event.get('complete'):
+                memo = event.get('data', {})
+                break
+            yield event
+
+        yield {
+            "status": "Complete",
+            "complete": True,
+            **live,
+            "memo_html": memo.get('html', "<b>Error: Missing HTML key</b>"),
+            "verdict": memo.get('verdict', {}),
+            "recency_audit": memo.get('recency_audit', {}),
+            "timestamp": datetime.now().strftime("%H:%M:%S")
+        }
+
+    return sse_response(events())
+
 if __name__ == '__main__':
     print("Starting M&A Health Forecast Platform (v2.3 Deal Architect)...")
     if not os.path.exists(get_db_path()):
@@ -0,0 +1,234 @@
+"""
+Benchmark: every AI endpoint of app.py against the offline Gemini stand-in.
+
+Starts scripts/gemini_standin.py in-process, points the LLM gateway at it and drives
+the endpoints through the Flask test client under a few stand-in scenarios:
+
+  healthy       every model answers (lognormal latency around --latency-ms)
+  primary_429   the 3.0 pro/flash models answer 429 (quota): cascades degrade
+  bad_json      half of the answers are truncated JSON
+  flash_hang    gemini-3-flash-preview hangs past LLM_TIMEOUT_S
+
+For each endpoint: cold latency (AI cache purged) over --runs, warm latency (cache
+hit), model calls per request, time to first chunk for SSE routes, and a burst of
+--burst concurrent identical cold requests (single-flight). The gateway's per-model
+counters and circuit states are printed after each scenario.
+
+Non-AI inputs (snapshot, universe DB, live market data) come from the local stores;
+endpoints whose data needs the network report their error instead of a latency.
+Run from the project root:  python scripts/bench_ai_paths.py [--scenario healthy]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+import concurrent.futures
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.gemini_standin import start_standin
+
+SHOCKS = {"rate_change": -50, "confidence_shock": 5, "volatility_shock": 2, "include_ai": True}
+DEEP_DIVE_CONTEXT = {"name": "Adobe Inc.", "sector": "Technology", "sub_sector": "Software",
+                     "spi_score": 62, "br_score": 48, "drivers": "Growth deceleration; activist stake"}
+
+# (name, method, path, JSON body, SSE?)
+ENDPOINTS = [
+    ("forecast", "POST", "/api/update_forecast", SHOCKS, False),
+    ("narrative", "POST", "/api/narrative", SHOCKS, False),
+    ("industry_brief", "POST", "/api/industry-brief", {"sector": "Tech"}, False),
+    ("sector_brief", "POST", "/api/v2/sector-brief", {
+        "sector": "Technology",
+        "financing": {"hy_spread": 3.4, "ig_spread": 1.1, "lbo_idx": 58},
+        "top_sellers": [{"ticker": "ADBE", "name": "Adobe", "spi": 62, "drivers": ["activist"]}],
+        "top_buyers": [{"ticker": "MSFT", "name": "Microsoft", "br": 81, "drivers": ["cash"]}],
+    }, False),
+    ("company_dossier", "POST", "/api/company-dossier", {"ticker": "ADBE"}, False),
+    ("company_dossier_sse", "POST", "/api/company-dossier/stream", {"ticker": "ADBE"}, True),
+    ("deep_dive", "POST", "/api/v2/deep-dive", {"ticker": "ADBE", "type": "radar_target", "context": DEEP_DIVE_CONTEXT}, False),
+    ("deep_dive_sse", "POST", "/api/v2/deep-dive/stream", {"ticker": "ADBE", "type": "radar_target", "context": DEEP_DIVE_CONTEXT}, True),
+    ("deal_match", "POST", "/api/deal-architect/match", {"user_ticker": "CVS", "intent": "BUY", "include_ai": True}, False),
+    ("deal_memo", "POST", "/api/deal-architect/deep-dive", {"user_ticker": "CVS", "target_ticker": "HUM"}, False),
+    ("deal_memo_sse", "POST", "/api/deal-architect/deep-dive/stream", {"user_ticker": "CVS", "target_ticker": "HUM"}, True),
+]
+
+SCENARIOS = {
+    "healthy": {},
+    "primary_429": {"models": {"gemini-3-pro-preview": {"fail": "429"}, "gemini-3-flash-preview": {"fail": "429"}}},
+    "bad_json": {"default": {"fail": "bad_json", "fail_rate": 0.5}},
+    "flash_hang": {"models": {"gemini-3-flash-preview": {"fail": "timeout"}}},
+}
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def fmt_ms(v):
+    return f"{v:8.0f}" if v is not None else "     n/a"
+
+
+class Bench:
+    def __init__(self, app_module, standin, runs, burst):
+        self.app = app_module.app
+        self.standin = standin
+        self.runs = runs
+        self.burst = burst
+        self.llm_gateway = app_module.llm_gateway
+        self.ai_cache = app_module.ai_cache
+        self.single_flight = app_module.single_flight
+
+    def model_calls(self) -> int:
+        with self.standin.lock:
+            return sum(sum(v.values()) for v in self.standin.stats.values())
+
+    def request(self, method, path, body, sse):
+        """(status, total ms, first chunk ms or None, error or None)."""
+        client = self.app.test_client()
+        t0 = time.perf_counter()
+        resp = client.open(path, method=method, json=body, buffered=not sse)
+        first, error = None, None
+        if sse:
+            for raw in resp.response:
+                for line in raw.decode().splitlines():
+                    if not line.startswith("data: "):
+                        continue
+                    event = json.loads(line[6:])
+                    if first is None and event.get("chunk"):
+                        first = (time.perf_counter() - t0) * 1000
+                    error = event.get("error") or error
+            resp.close()
+        else:
+            try:
+                payload = resp.get_json(silent=True) or {}
+                error = payload.get("error") if isinstance(payload, dict) else None
+            except Exception as e:
+                error = str(e)
+        total = (time.perf_counter() - t0) * 1000
+        if resp.status_code >= 400:
+            error = error or f"HTTP {resp.status_code}"
+        return resp.status_code, total, first, error
+
+    def endpoint(self, name, method, path, body, sse):
+        cold, firsts, calls, errors = [], [], [], []
+        for _ in range(self.runs):
+            self.ai_cache.purge()
+            before = self.model_calls()
+            _, ms, first, error = self.request(method, path, body, sse)
+            cold.append(ms)
+            calls.append(self.model_calls() - before)
+            if first is not None:
+                firsts.append(first)
+            if error:
+                errors.append(str(error)[:60])
+
+        before = self.model_calls()
+        _, warm_ms, _, _ = self.request(method, path, body, sse)
+        warm_calls = self.model_calls() - before
+
+        # Burst: identical cold requests at once; single-flight should collapse them
+        self.ai_cache.purge()
+        before = self.model_calls()
+        t0 = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.burst) as pool:
+            list(pool.map(lambda _: self.request(method, path, body, sse), range(self.burst)))
+        burst_ms = (time.perf_counter() - t0) * 1000
+        burst_calls = self.model_calls() - before
+
+        return {
+            "name": name,
+            "cold_p50": statistics.median(cold),
+            "cold_p95": percentile(cold, 0.95),
+            "first_chunk_p50": statistics.median(firsts) if firsts else None,
+            "warm": warm_ms,
+            "calls_cold": statistics.median(calls),
+            "calls_warm": warm_calls,
+            "burst_ms": burst_ms,
+            "burst_calls": burst_calls,
+            "error": errors[-1] if errors else None,
+        }
+
+    def scenario(self, name, config):
+        # Fresh circuits, empty cache, stand-in overrides for this scenario only
+        self.standin.configure({"models": {m: None for m in list(self.standin.models)}})
+        self.standin.default.update({"fail": None, "fail_rate": 1.0})
+        self.standin.configure(config)
+        self.standin.reset()
+        self.llm_gateway.reset()
+        self.ai_cache.purge()
+        rows = [self.endpoint(*ep) for ep in ENDPOINTS]
+        return {"scenario": name, "endpoints": rows, "gateway": self.llm_gateway.stats(),
+                "standin": dict(self.standin.stats), "single_flight": self.single_flight.stats()}
+
+
+def print_report(result, out):
+    print(f"\n--- Scenario: {result['scenario']} ---", file=out)
+    print(f"  {'endpoint':<20} {'cold p50':>8} {'cold p95':>8} {'1st chunk':>9} {'warm':>8} "
+          f"{'calls':>5} {'warm':>4} {'burst ms':>8} {'calls':>5}  error", file=out)
+    for r in result["endpoints"]:
+        print(f"  {r['name']:<20} {fmt_ms(r['cold_p50'])} {fmt_ms(r['cold_p95'])} {fmt_ms(r['first_chunk_p50']):>9} "
+              f"{fmt_ms(r['warm'])} {r['calls_cold']:>5.0f} {r['calls_warm']:>4} {fmt_ms(r['burst_ms'])} "
+              f"{r['burst_calls']:>5}  {r['error'] or ''}", file=out)
+    print("  Model cascade:", file=out)
+    for model, m in result["gateway"]["models"].items():
+        errors = ", ".join(f"{k}={v}" for k, v in m["errors"].items()) or "-"
+        print(f"    {model:<24} circuit {m['circuit']:<9} calls {m['calls']:>4} ok {m['ok']:>4} "
+              f"skipped {m['skipped']:>4} avg {fmt_ms(m['avg_ms'])} ms  errors {errors}", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append")
+    parser.add_argument("--runs", type=int, default=3, help="cold requests per endpoint")
+    parser.add_argument("--burst", type=int, default=4, help="concurrent identical requests")
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--timeout-s", type=float, default=3.0, help="LLM_TIMEOUT_S for the gateway")
+    parser.add_argument("--json", help="also write the raw results to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the app's own logging")
+    args = parser.parse_args()
+
+    server, standin, url = start_standin(0, {"default": {"latency_ms": args.latency_ms, "hang_s": args.timeout_s * 3}})
+    os.environ.update({
+        "GEMINI_API_KEY": "offline",
+        "GEMINI_BASE_URL": url,
+        "LLM_TIMEOUT_S": str(args.timeout_s),
+        "AI_CACHE_PATH": os.path.join(tempfile.mkdtemp(prefix="bench_ai_"), "ai_cache.sqlite3"),
+    })
+    os.environ.setdefault("FRED_API_KEY", "bench")
+    os.environ.setdefault("SNAPSHOT_REFRESH", "0")
+
+    out = sys.stdout
+    if not args.verbose:
+        # The services are chatty; keep the report readable
+        sys.stdout = open(os.devnull, "w")
+        logging.disable(logging.CRITICAL)
+    try:
+        import app as app_module
+        app_module.get_cached_snapshot(block=True)
+        bench = Bench(app_module, standin, args.runs, args.burst)
+        print(f"Gemini stand-in at {url}: median latency {args.latency_ms:.0f} ms, "
+              f"{args.runs} cold runs, burst of {args.burst}", file=out)
+        results = []
+        for name in args.scenario or list(SCENARIOS):
+            results.append(bench.scenario(name, SCENARIOS[name]))
+            print_report(results[-1], out)
+    finally:
+        if sys.stdout is not out:
+            sys.stdout.close()
+            sys.stdout = out
+        server.shutdown()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: per-series CSV cache vs columnar macro store.
+
+Requires a warm cache (fresh CSVs under src/data/store/fred) so no network is hit.
+Run from the project root:  python scripts/bench_macro_store.py
+"""
+import os
+import sys
+import time
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("FRED_API_KEY", "bench")
+
+from src.data.macro_store import migrate_from_csv, get_macro_store
+from src.index.ma_index import build_index
+
+CSV_DIR = os.path.join("src", "data", "store", "fred")
+RUNS = 5
+
+
+def best_of(fn, runs=RUNS):
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def load_all_csv():
+    for fname in os.listdir(CSV_DIR):
+        if fname.endswith(".csv"):
+            pd.read_csv(os.path.join(CSV_DIR, fname), index_col=0, parse_dates=True)
+
+
+def load_all_store():
+    store = get_macro_store()
+    for sid in store.columns:
+        store.series(sid)
+
+
+def quiet_build():
+    # build_index is chatty; keep the benchmark output readable
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        build_index("config/signals.yaml")
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+
+def main():
+    print("Migrating CSV cache -> macro store...")
+    migrate_from_csv(CSV_DIR)
+
+    csv_load = best_of(load_all_csv)
+    store_load = best_of(load_all_store)
+
+    os.environ["MACRO_STORE"] = "0"
+    build_csv = best_of(quiet_build)
+    os.environ["MACRO_STORE"] = "1"
+    build_store = best_of(quiet_build)
+
+    print(f"\n--- Results (best of {RUNS}) ---")
+    print(f"  Raw load   CSV: {csv_load * 1000:8.1f} ms | Store: {store_load * 1000:8.1f} ms | {csv_load / store_load:5.1f}x")
+    print(f"  build_index CSV: {build_csv * 1000:8.1f} ms | Store: {build_store * 1000:8.1f} ms | {build_csv / build_store:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
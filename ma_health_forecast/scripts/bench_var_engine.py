@@ -0,0 +1,71 @@
+"""
+Benchmark: statsmodels VAR vs the NumPy engine (src/forecast/native_var.py).
+
+Compares import time (fresh interpreter), select_order(12) + fit time, and the
+numerical gap in forecast / orthogonalized IRFs / residuals on the cached index.
+Run from the project root:  python scripts/bench_var_engine.py
+"""
+import os
+import sys
+import time
+import subprocess
+import warnings
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("FRED_API_KEY", "bench")
+
+from src.forecast.backtest import load_cached_buckets
+from src.forecast.native_var import NativeVAR
+
+RUNS = 20
+
+
+def import_seconds(stmt):
+    code = f"import time; t0 = time.perf_counter(); {stmt}; print(time.perf_counter() - t0)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=os.getcwd())
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def best_of(fn, runs=RUNS):
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    from statsmodels.tsa.api import VAR
+    warnings.filterwarnings("ignore")
+    buckets = load_cached_buckets()
+
+    def sm_fit():
+        model = VAR(buckets)
+        return model.fit(model.select_order(maxlags=12).aic)
+
+    def native_fit():
+        model = NativeVAR(buckets)
+        return model.fit(model.select_order(maxlags=12).aic)
+
+    sm_res, nat_res = sm_fit(), native_fit()
+    y = buckets.values
+    fc_gap = np.abs(sm_res.forecast(y[-sm_res.k_ar:], 12) - nat_res.forecast(y[-nat_res.k_ar:], 12)).max()
+    irf_gap = np.abs(sm_res.irf(12).orth_irfs - nat_res.irf(12).orth_irfs).max()
+    resid_gap = np.abs(sm_res.resid.values - nat_res.resid.values).max()
+
+    sm_import = import_seconds("import statsmodels.tsa.api")
+    nat_import = import_seconds("import src.forecast.native_var")
+    sm_time = best_of(sm_fit)
+    nat_time = best_of(native_fit)
+
+    print(f"--- VAR engines on {buckets.shape[0]}x{buckets.shape[1]} buckets (best of {RUNS}) ---")
+    print(f"  Lag order     statsmodels: {sm_res.k_ar} | native: {nat_res.k_ar}")
+    print(f"  Import        statsmodels: {sm_import * 1000:8.1f} ms | native: {nat_import * 1000:8.1f} ms")
+    print(f"  Select + fit  statsmodels: {sm_time * 1000:8.1f} ms | native: {nat_time * 1000:8.1f} ms | {sm_time / nat_time:5.1f}x")
+    print(f"  Max abs gap   forecast {fc_gap:.2e} | orth IRF {irf_gap:.2e} | resid {resid_gap:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Offline stand-in for the Gemini API: the generate-content subset google-genai uses
+(models/{model}:generateContent and models/{model}:streamGenerateContent?alt=sse).
+
+Answers are synthesized from the prompt so the app's parsers accept them: JSON prompts
+get the schema their "output format" example shows (forecast arrays sized to the
+horizon, one entry per ticker for match batches), text prompts get a block of HTML.
+Every model has a latency distribution (lognormal around a median) and failure modes:
+429 quota, 404 unknown model, 500, timeout (hang) and bad_json (truncated JSON).
+
+Run standalone and point the app at it:
+    python scripts/gemini_standin.py --port 8765 --latency-ms 800
+    GEMINI_BASE_URL=http://127.0.0.1:8765 GEMINI_API_KEY=offline python app.py
+
+Control endpoints (JSON):
+    GET  /_standin/stats              calls per model and outcome
+    POST /_standin/config             {"default": {...}, "models": {"<model>": {...}}}
+    POST /_standin/reset              clear stats (config is kept)
+
+Profile keys: latency_ms, sigma, chunks, fail ("429" | "404" | "500" | "timeout" |
+"bad_json"), fail_rate (0-1, default 1 when fail is set), hang_s.
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+DEFAULT_PROFILE = {
+    "latency_ms": 400.0,    # median end-to-end latency of a call
+    "sigma": 0.35,          # lognormal spread around the median
+    "chunks": 6,            # chunks per streamed answer
+    "fail": None,
+    "fail_rate": 1.0,
+    "hang_s": 30.0,         # how long a "timeout" failure keeps the connection open
+}
+
+ERRORS = {
+    "429": (429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota)."),
+    "404": (404, "NOT_FOUND", "models/{model} is not found for API version v1beta."),
+    "500": (500, "INTERNAL", "An internal error has occurred."),
+}
+
+# --- Answer synthesis ---
+
+def _prompt_text(body: dict) -> str:
+    parts = []
+    for content in body.get("contents", []):
+        for part in content.get("parts", []):
+            if "text" in part:
+                parts.append(part["text"])
+    return "\n".join(parts)
+
+def _json_example(prompt: str):
+    """Last parseable {...} / [...] example in the prompt, with '...' placeholders removed."""
+    candidates = []
+    for opener, closer in (("{", "}"), ("[", "]")):
+        for start in [m.start() for m in re.finditer(re.escape(opener), prompt)]:
+            depth = 0
+            for i in range(start, len(prompt)):
+                if prompt[i] == opener:
+                    depth += 1
+                elif prompt[i] == closer:
+                    depth -= 1
+                    if depth == 0:
+                        candidates.append((start, prompt[start:i + 1]))
+                        break
+    parsed = []
+    for start, block in candidates:
+        text = re.sub(r",\s*\.\.\.", "", block)
+        text = re.sub(r"\[\s*\.\.\.\s*\]", "[]", text)
+        text = re.sub(r"\b(val\d+)\b", "50.0", text)
+        try:
+            value = json.loads(text)
+        except ValueError:
+            continue
+        if isinstance(value, (dict, list)) and value:
+            parsed.append((start, start + len(block), value))
+    # The last example that is not nested inside another one
+    outer = [p for p in parsed if not any(q is not p and q[0] <= p[0] and q[1] >= p[1] for q in parsed)]
+    return max(outer, key=lambda p: p[0])[2] if outer else None
+
+def _forecast(prompt: str) -> dict:
+    steps = int((re.search(r"next (\d+) months", prompt) or [None, 12])[1])
+    values = re.findall(r"\d{4}-\d{2}: (-?\d+(?:\.\d+)?)", prompt)
+    last = float(values[-1]) if values else 50.0
+    path = [round(last + 0.4 * (i + 1), 1) for i in range(steps)]
+    return {
+        "reasoning_trace": "Offline stand-in: momentum carried forward.",
+        "forecast": path,
+        "lower80": [round(v - 4 - 0.3 * i, 1) for i, v in enumerate(path)],
+        "upper80": [round(v + 4 + 0.3 * i, 1) for i, v in enumerate(path)],
+        "rationale": "<h3>Executive Briefing for Intralinks CEO</h3><p>Offline stand-in forecast.</p>",
+    }
+
+def _match(prompt: str) -> list:
+    tickers = re.findall(r'"ticker": ?"([A-Z0-9.\-]+)"', prompt.split("RETURN JSON")[0])
+    return [{
+        "ticker": t,
+        "rationale_headline": f"{t} adds adjacent capabilities to the platform",
+        "fit_score": 90 - 5 * (i % 10),
+        "synergy_type": "Revenue Synergy",
+        "risk_factor": "Integration complexity",
+    } for i, t in enumerate(tickers)]
+
+def synthesize(prompt: str, json_mode: bool) -> str:
+    if '"reasoning_trace"' in prompt:
+        return json.dumps(_forecast(prompt))
+    if "RETURN JSON MAP ONLY" in prompt:
+        return json.dumps(_match(prompt))
+    if json_mode or "JSON" in prompt:
+        example = _json_example(prompt)
+        if example is not None:
+            return json.dumps(example)
+        if json_mode:
+            return json.dumps({"summary": "Offline stand-in answer."})
+    paragraph = "<p>Offline stand-in analysis. " + "Deal activity remains data dependent. " * 8 + "</p>"
+    return "<h3>Offline Stand-in</h3>" + paragraph * 3
+
+# --- Server ---
+
+class StandIn:
+    def __init__(self, config: dict = None):
+        self.lock = threading.Lock()
+        self.default = dict(DEFAULT_PROFILE)
+        self.models = {}
+        self.stats = {}
+        self.rng = random.Random(7)
+        self.configure(config or {})
+
+    def configure(self, config: dict):
+        with self.lock:
+            self.default.update(config.get("default", {}))
+            for model, profile in config.get("models", {}).items():
+                if profile is None:
+                    self.models.pop(model, None)
+                else:
+                    self.models.setdefault(model, {}).update(profile)
+
+    def profile(self, model: str) -> dict:
+        with self.lock:
+            return {**self.default, **self.models.get(model, {})}
+
+    def count(self, model: str, outcome: str):
+        with self.lock:
+            entry = self.stats.setdefault(model, {})
+            entry[outcome] = entry.get(outcome, 0) + 1
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+
+    def latency_s(self, profile: dict) -> float:
+        with self.lock:
+            factor = self.rng.lognormvariate(0.0, profile["sigma"]) if profile["sigma"] > 0 else 1.0
+            return profile["latency_ms"] * factor / 1000.0
+
+    def failure(self, profile: dict):
+        if not profile.get("fail"):
+            return None
+        with self.lock:
+            hit = self.rng.random() < profile.get("fail_rate", 1.0)
+        return profile["fail"] if hit else None
+
+def _handler(standin: StandIn):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _json(self, status: int, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            if urlparse(self.path).path == "/_standin/stats":
+                with standin.lock:
+                    return self._json(200, {"models": standin.stats, "default": standin.default, "overrides": standin.models})
+            self._json(404, {"error": {"code": 404, "message": "unknown path", "status": "NOT_FOUND"}})
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            if path == "/_standin/config":
+                standin.configure(self._body())
+                return self._json(200, {"ok": True})
+            if path == "/_standin/reset":
+                standin.reset()
+                return self._json(200, {"ok": True})
+
+            m = re.search(r"/models/([^/:]+):(generateContent|streamGenerateContent)$", path)
+            if not m:
+                return self._json(404, {"error": {"code": 404, "message": f"unknown path {path}", "status": "NOT_FOUND"}})
+            model, method = m.group(1), m.group(2)
+            body = self._body()
+            self.generate(model, body, stream=method == "streamGenerateContent")
+
+        def generate(self, model: str, body: dict, stream: bool):
+            profile = standin.profile(model)
+            latency = standin.latency_s(profile)
+            failure = standin.failure(profile)
+
+            if failure == "timeout":
+                standin.count(model, "timeout")
+                time.sleep(profile["hang_s"])
+                self.close_connection = True
+                return
+            if failure in ERRORS:
+                time.sleep(latency * 0.2)
+                code, status, message = ERRORS[failure]
+                standin.count(model, failure)
+                return self._json(code, {"error": {"code": code, "message": message.format(model=model), "status": status}})
+
+            prompt = _prompt_text(body)
+            json_mode = (body.get("generationConfig") or {}).get("responseMimeType") == "application/json"
+            text = synthesize(prompt, json_mode)
+            if failure == "bad_json":
+                text = text[:max(1, len(text) // 2)]
+            standin.count(model, failure or ("stream" if stream else "ok"))
+            usage = {
+                "promptTokenCount": len(prompt) // 4,
+                "candidatesTokenCount": len(text) // 4,
+                "totalTokenCount": (len(prompt) + len(text)) // 4,
+            }
+
+            if not stream:
+                time.sleep(latency)
+                return self._json(200, {
+                    "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP", "index": 0}],
+                    "usageMetadata": usage,
+                    "modelVersion": model,
+                })
+
+            # First chunk after ~30% of the latency, the rest spread over the remainder
+            n = max(1, int(profile["chunks"]))
+            size = -(-len(text) // n)
+            pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            time.sleep(latency * 0.3)
+            for i, piece in enumerate(pieces):
+                candidate = {"content": {"role": "model", "parts": [{"text": piece}]}, "index": 0}
+                event = {"candidates": [candidate], "modelVersion": model}
+                if i == len(pieces) - 1:
+                    candidate["finishReason"] = "STOP"
+                    event["usageMetadata"] = usage
+                self.wfile.write(f"data: {json.dumps(event)}\r\n\r\n".encode())
+                self.wfile.flush()
+                if i < len(pieces) - 1:
+                    time.sleep(latency * 0.7 / max(1, len(pieces) - 1))
+
+    return Handler
+
+def start_standin(port: int = 0, config: dict = None, host: str = "127.0.0.1"):
+    """Serve in a daemon thread. Returns (server, standin, base_url)."""
+    standin = StandIn(config)
+    server = ThreadingHTTPServer((host, port), _handler(standin))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="gemini-standin", daemon=True).start()
+    return server, standin, f"http://{host}:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Gemini API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("STANDIN_PORT", "8765")))
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_PROFILE["latency_ms"])
+    parser.add_argument("--sigma", type=float, default=DEFAULT_PROFILE["sigma"])
+    parser.add_argument("--config", help="JSON file with {'default': {...}, 'models': {...}}")
+    args = parser.parse_args()
+
+    config = {"default": {"latency_ms": args.latency_ms, "sigma": args.sigma}}
+    if args.config:
+        with open(args.config) as f:
+            file_config = json.load(f)
+        config["default"].update(file_config.get("default", {}))
+        config["models"] = file_config.get("models", {})
+
+    server, _, url = start_standin(args.port, config, args.host)
+    print(f"Gemini stand-in listening on {url} (GEMINI_BASE_URL={url})", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
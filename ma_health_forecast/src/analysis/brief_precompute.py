@@ -0,0 +1,297 @@
+"""
+Nightly precompute of sector and sub-industry briefs.
+
+Enumerates sectors from UniverseService.get_available_sectors() and their sub-industries,
+builds the same inputs the brief endpoints send (src/data/brief_inputs.py) and generates
+every brief that is not already in the AI cache, through a small worker pool with a
+calls-per-minute limit. The first analyst in the morning then gets a cache hit.
+
+Each run is recorded in run_log: status, progress counts (updated as tasks finish),
+Gemini calls and estimated prompt tokens (the cost), and per-task failures. Cost is read
+from prompt_meter's "Gemini Brief" counters, so when the job runs inside the web process
+brief requests served during the run are included.
+
+CLI:        python -m src.analysis.brief_precompute [--sector Technology] [--force] [--dry-run]
+Scheduler:  cron with the CLI, or POST /api/admin/precompute-briefs (Cloud Scheduler)
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import argparse
+import threading
+import concurrent.futures
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.analysis.gemini_brief import brief_service
+from src.data.brief_inputs import industry_brief_context, build_market_map, sector_brief_request, ui_sector
+from src.data.schema import get_db_path, get_schema
+from src.data.universe_service import UniverseService
+from src.utils.ai_cache import ai_cache
+from src.utils.prompt_budget import prompt_meter
+
+JOB_NAME = "brief_precompute"
+PRECOMPUTE_WORKERS = int(os.getenv("PRECOMPUTE_WORKERS", "2"))
+PRECOMPUTE_CALLS_PER_MIN = float(os.getenv("PRECOMPUTE_CALLS_PER_MIN", "10"))
+BRIEF_LABEL = "Gemini Brief"    # gateway label of GeminiBriefService calls
+
+class RateLimiter:
+    """Spaces calls at least 60/calls_per_min seconds apart across all workers."""
+
+    def __init__(self, calls_per_min: float):
+        self.interval = 60.0 / calls_per_min if calls_per_min > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at)
+            self._next_at = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+class RunLog:
+    """One run_log row, updated as the run progresses."""
+
+    def __init__(self, db_path: str, job_name: str = JOB_NAME):
+        self.run_id = f"{job_name}-{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.job_name = job_name
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._conn.executescript(get_schema())   # all CREATE ... IF NOT EXISTS
+
+    def start(self, counts: Dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO run_log (run_id, job_name, started_at, status, counts_json, error_json) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.run_id, self.job_name, datetime.now().isoformat(), "running", json.dumps(counts), "[]"),
+            )
+            self._conn.commit()
+
+    def update(self, counts: Dict, errors: List[Dict], status: str = "running"):
+        with self._lock:
+            ended = datetime.now().isoformat() if status != "running" else None
+            self._conn.execute(
+                "UPDATE run_log SET status = ?, counts_json = ?, error_json = ?, ended_at = ? WHERE run_id = ?",
+                (status, json.dumps(counts), json.dumps(errors), ended, self.run_id),
+            )
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+def plan_tasks(conn, universe: UniverseService, sectors: Optional[List[str]] = None, force: bool = False,
+               service=brief_service):
+    """
+    (tasks, warm count, planning errors). A task is one brief missing from the AI cache
+    (every brief when force=True), with the exact inputs the endpoint would pass.
+    """
+    tasks, errors, warm = [], [], 0
+    names = [s for s in (sectors or universe.get_available_sectors()) if s]
+    for store_sector in names:
+        sector = ui_sector(store_sector)
+        try:
+            context = industry_brief_context(conn, sector)
+            sellers, buyers, financing = sector_brief_request(build_market_map(conn, sector))
+        except Exception as e:
+            errors.append({"task": f"plan:{sector}", "error": str(e)})
+            continue
+
+        subs = ["All"] + [h["name"] for h in universe.get_industry_heatmap(sector)]
+        for sub in subs:
+            key = service.brief_cache_key(sector, sub, context)
+            if not force and ai_cache.get("brief", key) is not None:
+                warm += 1
+                continue
+            tasks.append({"kind": "brief", "sector": sector, "sub_industry": sub, "context": context})
+
+        key = service.deal_command_cache_key(sector, financing, sellers, buyers)
+        if not force and ai_cache.get("deal_brief", key) is not None:
+            warm += 1
+        else:
+            tasks.append({"kind": "deal_brief", "sector": sector, "financing": financing,
+                          "sellers": sellers, "buyers": buyers})
+    return tasks, warm, errors
+
+def _task_name(task: Dict) -> str:
+    if task["kind"] == "brief":
+        return f"brief:{task['sector']}/{task['sub_industry']}"
+    return f"deal_brief:{task['sector']}"
+
+def _run_task(task: Dict, force: bool, service) -> Optional[str]:
+    """Generate one brief; returns an error message or None."""
+    if task["kind"] == "brief":
+        result = service.generate_brief(task["sector"], task["sub_industry"], task["context"], force_refresh=force)
+    else:
+        result = service.generate_deal_command_brief(task["sector"], task["financing"], task["sellers"],
+                                                     task["buyers"], force_refresh=force)
+    if isinstance(result, dict) and result.get("error"):
+        return str(result["error"])
+    return None
+
+def run_precompute(sectors: Optional[List[str]] = None, force: bool = False, dry_run: bool = False,
+                   workers: int = PRECOMPUTE_WORKERS, calls_per_min: float = PRECOMPUTE_CALLS_PER_MIN,
+                   db_path: Optional[str] = None, universe: Optional[UniverseService] = None,
+                   service=brief_service, run_log: Optional[RunLog] = None) -> Dict:
+    """Warm the brief caches. Returns the run summary (also stored in run_log unless dry_run)."""
+    db_path = db_path or get_db_path()
+    t0 = time.perf_counter()
+    counts = {"planned": 0, "already_warm": 0, "done": 0, "generated": 0, "failed": 0,
+              "gemini_calls": 0, "prompt_tokens_est": 0, "seconds": 0.0}
+    # The run_log row exists before anything can fail, so every run leaves a record
+    log = None if dry_run else (run_log or RunLog(db_path))
+    if log is not None:
+        log.start(counts)
+
+    try:
+        universe = universe or UniverseService()
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            tasks, warm, errors = plan_tasks(conn, universe, sectors, force, service)
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"> ERROR: Brief precompute planning failed: {e}", flush=True)
+        if log is None:
+            raise
+        errors = [{"task": "plan", "error": str(e)}]
+        counts["failed"] = 1
+        counts["seconds"] = round(time.perf_counter() - t0, 1)
+        log.update(counts, errors, "failed")
+        log.close()
+        return {"run_id": log.run_id, "status": "failed", "counts": counts, "errors": errors}
+
+    counts.update({"planned": len(tasks), "already_warm": warm, "failed": len(errors)})
+    print(f"=== [Brief Precompute] ===", flush=True)
+    print(f"> Plan: {len(tasks)} briefs to generate, {warm} already warm, {len(errors)} sector errors", flush=True)
+    if dry_run:
+        for task in tasks:
+            print(f"  - {_task_name(task)}", flush=True)
+        return {"run_id": None, "status": "dry_run", "counts": counts, "errors": errors,
+                "tasks": [_task_name(t) for t in tasks]}
+
+    log.update(counts, errors)
+    if not service.client:
+        errors.append({"task": "all", "error": "AI Service Unavailable (Missing Key)"})
+        counts["failed"] += len(tasks)
+        log.update(counts, errors, "failed")
+        log.close()
+        return {"run_id": log.run_id, "status": "failed", "counts": counts, "errors": errors}
+
+    meter_before = prompt_meter.totals(BRIEF_LABEL)
+    limiter = RateLimiter(calls_per_min)
+    lock = threading.Lock()
+
+    def work(task):
+        limiter.acquire()
+        try:
+            error = _run_task(task, force, service)
+        except Exception as e:
+            error = str(e)
+        meter = prompt_meter.totals(BRIEF_LABEL)
+        with lock:
+            counts["done"] += 1
+            if error:
+                counts["failed"] += 1
+                errors.append({"task": _task_name(task), "error": error})
+            else:
+                counts["generated"] += 1
+            counts["gemini_calls"] = meter["calls"] - meter_before["calls"]
+            counts["prompt_tokens_est"] = meter["tokens"] - meter_before["tokens"]
+            counts["seconds"] = round(time.perf_counter() - t0, 1)
+            print(f"> [{counts['done']}/{len(tasks)}] {_task_name(task)}: {'FAILED ' + error if error else 'ok'}", flush=True)
+            log.update(counts, errors)
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="brief-precompute") as pool:
+            list(pool.map(work, tasks))
+        if not errors:
+            status = "success"
+        elif counts["generated"] or counts["already_warm"]:
+            status = "partial"
+        else:
+            status = "failed"
+    except Exception as e:
+        errors.append({"task": "run", "error": str(e)})
+        status = "failed"
+
+    meter = prompt_meter.totals(BRIEF_LABEL)
+    counts["gemini_calls"] = meter["calls"] - meter_before["calls"]
+    counts["prompt_tokens_est"] = meter["tokens"] - meter_before["tokens"]
+    counts["seconds"] = round(time.perf_counter() - t0, 1)
+    log.update(counts, errors, status)
+    log.close()
+    print(f"> Result: {status} ({counts['generated']} generated, {counts['failed']} failed, "
+          f"{counts['gemini_calls']} Gemini calls, ~{counts['prompt_tokens_est']} prompt tokens, {counts['seconds']}s)", flush=True)
+    print(f"==========================\n", flush=True)
+    return {"run_id": log.run_id, "status": status, "counts": counts, "errors": errors}
+
+# --- Background runs (admin route / in-process scheduler) ---
+
+_background_lock = threading.Lock()
+_background_run: Dict = {}
+
+def start_background(**kwargs) -> Optional[str]:
+    """Start run_precompute in a daemon thread. Returns the run_id, or None if a run is already active."""
+    if not _background_lock.acquire(blocking=False):
+        return None
+    try:
+        log = RunLog(kwargs.get("db_path") or get_db_path())
+    except Exception:
+        _background_lock.release()
+        raise
+
+    def target():
+        try:
+            _background_run["result"] = run_precompute(run_log=log, **kwargs)
+        except Exception as e:
+            print(f"> ERROR: Brief precompute failed: {e}", flush=True)
+            try:
+                log.update({}, [{"task": "run", "error": str(e)}], "failed")
+            except Exception:
+                pass
+        finally:
+            log.close()     # no-op if the run already closed it
+            _background_lock.release()
+
+    _background_run["run_id"] = log.run_id
+    threading.Thread(target=target, name="brief-precompute", daemon=True).start()
+    return log.run_id
+
+def recent_runs(limit: int = 10, db_path: Optional[str] = None) -> List[Dict]:
+    conn = sqlite3.connect(db_path or get_db_path())
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.executescript(get_schema())
+        rows = conn.execute(
+            "SELECT * FROM run_log WHERE job_name = ? ORDER BY started_at DESC LIMIT ?", (JOB_NAME, limit)
+        ).fetchall()
+    finally:
+        conn.close()
+    runs = []
+    for r in rows:
+        run = dict(r)
+        run["counts"] = json.loads(run.pop("counts_json") or "{}")
+        run["errors"] = json.loads(run.pop("error_json") or "[]")
+        runs.append(run)
+    return runs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate sector and sub-industry briefs")
+    parser.add_argument("--sector", action="append", help="universe sector (repeatable); default: all")
+    parser.add_argument("--force", action="store_true", help="regenerate briefs that are already cached")
+    parser.add_argument("--dry-run", action="store_true", help="list the briefs that would be generated")
+    parser.add_argument("--workers", type=int, default=PRECOMPUTE_WORKERS)
+    parser.add_argument("--calls-per-min", type=float, default=PRECOMPUTE_CALLS_PER_MIN)
+    args = parser.parse_args()
+    summary = run_precompute(args.sector, force=args.force, dry_run=args.dry_run,
+                             workers=args.workers, calls_per_min=args.calls_per_min)
+    sys.exit(0 if summary["status"] in ("success", "dry_run") else 1)
@@ -3,6 +3,7 @@ from datetime import datetime
 from src.analysis.profile_engine import build_user_profile_live, UserProfile
 from src.analysis.gemini_architect import GeminiArchitect
 from src.data.universe_service import UniverseService
+from src.utils.single_flight import single_flight
 
 def fetch_macro_context() -> dict:
     """Fetches ^TNX (10-year yield) as macro anchor."""
@@ -203,16 +204,24 @@ def perform_live_dossier(user_ticker: str, cand_ticker: str, intent: str, mandat
     """
     Orchestrator: Live Fetch -> Deterministic Deal Physics.
     Refactored to return raw data for Controller-level AI generation.
+    Concurrent requests for the same deal share one fetch; so do the per-ticker yfinance
+    calls underneath (e.g. two deals with the same acquirer).
     """
+    return single_flight.do(
+        f"live_dossier:{user_ticker}|{cand_ticker}|{intent}|{mandate_mode}",
+        lambda: _perform_live_dossier(user_ticker, cand_ticker, intent, mandate_mode)
+    )
+
+def _perform_live_dossier(user_ticker: str, cand_ticker: str, intent: str, mandate_mode: str) -> dict:
     # 1. Live Fetch (Enforced)
-    user = build_user_profile_live(user_ticker)
-    cand = build_user_profile_live(cand_ticker)
+    user = single_flight.do(f"yf_profile:{user_ticker}", lambda: build_user_profile_live(user_ticker))
+    cand = single_flight.do(f"yf_profile:{cand_ticker}", lambda: build_user_profile_live(cand_ticker))
     
     # 2. Context
-    macro = fetch_macro_context()
+    macro = single_flight.do("yf_macro:^TNX", fetch_macro_context)
     metric_data = calculate_deal_physics(user, cand, intent)
     
-    headlines_str = fetch_headlines(cand_ticker)
+    headlines_str = single_flight.do(f"yf_news:{cand_ticker}", lambda: fetch_headlines(cand_ticker))
     
     # 3. Return Data Bundle
     return {
@@ -1,7 +1,6 @@
-import os
 import json
-from google import genai
 from google.genai import types
+from src.utils.llm_gateway import llm_gateway, CASCADES
 
 class GeminiArchitect:
     """
@@ -9,24 +8,20 @@ class GeminiArchitect:
     Uses Google's Gemini models to provide strategic rationales for M&A matches.
     """
     def __init__(self):
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
+        if not llm_gateway.enabled:
             print("WARNING: GEMINI_API_KEY not found. AI features will be disabled.")
-            self.client = None
-        else:
-            self.client = genai.Client(api_key=self.api_key)
 
         # Cascading Model Strategy (Aligned with llm_forecast.py)
         # 1. Gemini 3.0 Pro (Best Reasoning)
         # 2. Gemini 3.0 Flash (Fast/Efficient)
         # 3. Gemini 2.0 Flash (Stable Fallback)
         # 4. Gemini 1.5 Pro (Legacy Stable)
-        self.models_to_try = [
-            'gemini-3-pro-preview',
-            'gemini-3-flash-preview',
-            'gemini-2.0-flash-exp',
-            'gemini-1.5-pro',
-        ]
+        self.models_to_try = CASCADES["pro"]
+
+    @property
+    def client(self):
+        """Shared gateway client (None when no API key is configured)."""
+        return llm_gateway.client if llm_gateway.enabled else None
 
     def analyze_match_batch(self, user_profile: dict, matches: list, intent: str) -> dict:
         """
@@ -72,42 +67,39 @@ class GeminiArchitect:
         }}
         """
 
-        # 2. Execute with Model Cascade
-        for model_name in self.models_to_try:
-            try:
-                print(f"=== [Gemini Architect] Proposing Matches with {model_name} ===", flush=True)
-                
-                response = self.client.models.generate_content(
-                    model=model_name,
-                    contents=prompt,
-                    config=types.GenerateContentConfig(
-                        response_mime_type="application/json"
-                    )
-                )
-                
-                text = response.text
-                
-                # Check coverage
-                if not text:
-                    raise ValueError("Empty response from model")
+        # 2. Execute with Model Cascade (shared gateway; models with an open circuit are skipped)
+        def parse(response):
+            text = response.text
 
-                # Parse JSON
-                try:
-                    data = json.loads(text)
-                except json.JSONDecodeError:
-                    # Fallback cleanup
-                    if "```json" in text:
-                        text = text.split("```json")[1].split("```")[0]
-                    elif "```" in text:
-                        text = text.split("```")[1].split("```")[0]
-                    data = json.loads(text)
-                
-                print(f"> Success: Parsed rationales for {len(data)} items.", flush=True)
-                return data
+            # Check coverage
+            if not text:
+                raise ValueError("Empty response from model")
 
-            except Exception as e:
-                print(f"> WARNING: Model {model_name} failed: {e}", flush=True)
-                continue
+            # Parse JSON
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError:
+                # Fallback cleanup
+                if "```json" in text:
+                    text = text.split("```json")[1].split("```")[0]
+                elif "```" in text:
+                    text = text.split("```")[1].split("```")[0]
+                return json.loads(text)
 
-        print("> ERROR: All models failed to generate rationales.", flush=True)
-        return {}
+        try:
+            print(f"=== [Gemini Architect] Proposing Matches ===", flush=True)
+            data, model_name = llm_gateway.generate(
+                prompt,
+                config=types.GenerateContentConfig(
+                    response_mime_type="application/json"
+                ),
+                models=self.models_to_try,
+                label="Gemini Architect",
+                parse=parse,
+            )
+            print(f"> Success: Parsed rationales for {len(data)} items ({model_name}).", flush=True)
+            return data
+
+        except Exception as e:
+            print(f"> ERROR: All models failed to generate rationales: {e}", flush=True)
+            return {}
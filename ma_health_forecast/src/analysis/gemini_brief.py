@@ -1,85 +1,65 @@
 import os
 import json
-import hashlib
 import logging
+import concurrent.futures
 from datetime import datetime
-from google import genai
 from google.genai import types
+from src.utils.llm_gateway import llm_gateway, CASCADES
+from src.utils.ai_cache import ai_cache
+from src.utils.single_flight import single_flight
+from src.utils.prompt_budget import budget, compact_json, estimate_tokens, fit_json, fit_text
+from src.utils.payload_canon import canonical_hash
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Cache Directory
-CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'store', 'briefs')
-
-def ensure_cache_dir():
-    if not os.path.exists(CACHE_DIR):
-        os.makedirs(CACHE_DIR)
+# Deal Architect match batch: candidates per Gemini call, concurrent calls, retry rounds
+MATCH_CHUNK_SIZE = int(os.getenv("MATCH_CHUNK_SIZE", "8"))
+MATCH_MAX_WORKERS = int(os.getenv("MATCH_MAX_WORKERS", "4"))
+MATCH_CHUNK_RETRIES = int(os.getenv("MATCH_CHUNK_RETRIES", "1"))
 
 class GeminiBriefService:
-    # Cascading Models
-    MODELS = [
-        'gemini-3-flash-preview',
-        'gemini-2.0-flash-exp',
-        'gemini-1.5-pro'
-    ]
+    # Cascading Models (shared gateway skips models with an open circuit)
+    MODELS = CASCADES["flash"]
     MODEL_NAME = 'gemini-3-flash-preview' # Legacy compat
+    MEMO_UNAVAILABLE = {
+        "html": "<div class='alert alert-warning'>AI Service Unavailable (Missing Key)</div>", 
+        "verdict": {"status": "UNKNOWN"}
+    }
 
     def _generate_content_robust(self, prompt, config=None):
         """Helper to try multiple models in sequence."""
-        for model in self.MODELS:
-            try:
-                response = self.client.models.generate_content(
-                    model=model,
-                    contents=prompt,
-                    config=config
-                )
-                return response
-            except Exception as e:
-                logger.warning(f"Model {model} failed: {e}")
-                continue
-        raise RuntimeError("All AI models failed.")
+        response, _ = llm_gateway.generate(prompt, config=config, models=self.MODELS, label="Gemini Brief")
+        return response
+
+    def _generate_content(self, prompt, config=None):
+        """Single-model call on MODEL_NAME through the shared gateway."""
+        response, _ = llm_gateway.generate(prompt, config=config, models=[self.MODEL_NAME], label="Gemini Brief")
+        return response
 
     def __init__(self):
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
+        if not llm_gateway.enabled:
             logger.warning("GEMINI_API_KEY not found. AI features will be disabled.")
-            self.client = None
-        else:
-            self.client = genai.Client(api_key=self.api_key)
+
+    @property
+    def client(self):
+        """Shared gateway client (None when no API key is configured)."""
+        return llm_gateway.client if llm_gateway.enabled else None
             
-    def _compute_hash(self, payload: dict) -> str:
+    def _compute_hash(self, payload: dict, service: str = "brief", record: bool = True) -> str:
         """
-        Compute a deterministic SHA256 hash of the payload.
-        Keys are sorted to ensure consistency.
+        Deterministic SHA256 of the canonical payload (quantized numbers, unordered lists
+        sorted, volatile keys dropped; rules per service in src/utils/payload_canon.py).
         """
-        canonical_json = json.dumps(payload, sort_keys=True, separators=(',', ':'))
-        h = hashlib.sha256(canonical_json.encode('utf-8')).hexdigest()
-        # print(f"  [DEBUG] Payload Hash: {h}")
-        return h
+        return canonical_hash(payload, service, record=record)
 
-    def _get_cache(self, payload_hash: str):
-        """Retrieve cached brief if it exists and is valid (TTL could be checked here)."""
-        ensure_cache_dir()
-        filepath = os.path.join(CACHE_DIR, f"brief_{payload_hash}.json")
-        
-        if os.path.exists(filepath):
-            try:
-                with open(filepath, 'r') as f:
-                    data = json.load(f)
-                # Simple TTL check (e.g., 6 hours) could be added here
-                # For now, we assume hash stability implies validity
-                return data
-            except Exception as e:
-                logger.error(f"Cache read error: {e}")
-        return None
-
-    def _save_cache(self, payload_hash: str, response_data: dict, payload: dict):
-        """Save brief to disk with metadata."""
-        ensure_cache_dir()
-        filepath = os.path.join(CACHE_DIR, f"brief_{payload_hash}.json")
-        
+    def _get_cache(self, payload_hash: str, kind: str = "brief"):
+        """Retrieve cached brief if it exists and is still within its TTL (shared AI cache)."""
+        return ai_cache.get(kind, payload_hash)
+
+    def _save_cache(self, payload_hash: str, response_data: dict, payload: dict, kind: str = "brief"):
+        """Save brief to the shared AI cache with metadata."""
         cache_entry = {
             "metadata": {
                 "created_at": datetime.now().isoformat(),
@@ -92,11 +72,7 @@ class GeminiBriefService:
             "brief": response_data
         }
         
-        try:
-            with open(filepath, 'w') as f:
-                json.dump(cache_entry, f, indent=2)
-        except Exception as e:
-            logger.error(f"Cache write error: {e}")
+        ai_cache.set(kind, payload_hash, cache_entry)
 
     def generate_brief(self, sector: str, sub_industry: str, context_data: dict, force_refresh: bool = False):
         """
@@ -112,16 +88,30 @@ class GeminiBriefService:
             return {"error": "AI Service Unavailable (Missing Key)"}
 
         # 1. Build Canonical Payload
-        payload = {
+        payload = self._brief_payload(sector, sub_industry, context_data)
+        payload_hash = self._compute_hash(payload)
+
+        # Concurrent requests for the same brief share one cache check + Gemini call
+        # (a forced refresh never joins a cached-read flight)
+        return single_flight.do(
+            f"brief:{payload_hash}{':force' if force_refresh else ''}",
+            lambda: self._brief_flight(sector, sub_industry, payload, payload_hash, force_refresh)
+        )
+
+    def _brief_payload(self, sector: str, sub_industry: str, context_data: dict) -> dict:
+        return {
             "sector": sector,
             "sub_industry": sub_industry,
             "macro": context_data.get('macro', {}),
             "aggregates": context_data.get('aggregates', {}),
             "top_drivers": context_data.get('top_drivers', [])[:50] # Limit safety
         }
-        
-        payload_hash = self._compute_hash(payload)
-        
+
+    def brief_cache_key(self, sector: str, sub_industry: str, context_data: dict) -> str:
+        """AI cache key ("brief" kind) generate_brief uses for these inputs."""
+        return self._compute_hash(self._brief_payload(sector, sub_industry, context_data), record=False)
+
+    def _brief_flight(self, sector: str, sub_industry: str, payload: dict, payload_hash: str, force_refresh: bool):
         # 2. Cache Check
         if not force_refresh:
             cached = self._get_cache(payload_hash)
@@ -142,20 +132,25 @@ class GeminiBriefService:
         print(f"=== [Gemini Brief Service] ===", flush=True)
         print(f"> Action: Generating New Brief for {sector}/{sub_industry}", flush=True)
         print(f"> Model: {self.MODEL_NAME}", flush=True)
-        print(f"> Context: {len(str(payload))} chars", flush=True)
+        # Compact JSON; drivers get whatever is left of the token budget
+        macro_json = compact_json(payload['macro'])
+        aggregates_json = compact_json(payload['aggregates'])
+        drivers_json = fit_json(payload['top_drivers'],
+                                budget("brief") - estimate_tokens(macro_json + aggregates_json))
+        print(f"> Context: ~{estimate_tokens(macro_json + aggregates_json + drivers_json)} tokens", flush=True)
         
         prompt = f"""
         **Role**: Strategy Consultant for Private Equity.
         **Goal**: Write a 'Regime-Based Industry Brief' for the **{sector} - {sub_industry}** sector.
         
         **Market Regime**:
-        {json.dumps(payload['macro'], indent=2)}
+        {macro_json}
         
         **Sector Aggregates**:
-        {json.dumps(payload['aggregates'], indent=2)}
+        {aggregates_json}
         
         **Top Company Drivers (Sample)**:
-        {json.dumps(payload['top_drivers'], indent=2)}
+        {drivers_json}
         
         **Instructions**:
         **CURRENT DATE**: January 2026 (Treat 2024/2025 data as historical).
@@ -257,6 +252,18 @@ class GeminiBriefService:
         """
         if not self.client: return {"error": "AI Service Unavailable"}
 
+        seller_context, buyer_context, payload = self._deal_command_payload(sector, financing_data, top_sellers, top_buyers)
+        payload_hash = self._compute_hash(payload, "deal_brief")
+
+        # Concurrent requests for the same brief share one cache check + Gemini call
+        # (a forced refresh never joins a cached-read flight)
+        return single_flight.do(
+            f"deal_brief:{payload_hash}{':force' if force_refresh else ''}",
+            lambda: self._deal_command_flight(sector, financing_data, seller_context, buyer_context, payload, payload_hash, force_refresh)
+        )
+
+    def _deal_command_payload(self, sector: str, financing_data: dict, top_sellers: list, top_buyers: list):
+        """(seller context, buyer context, canonical payload) for a Deal Command brief."""
         # 1. Build rich context from sellers/buyers
         seller_context = []
         for s in top_sellers[:15]:
@@ -283,14 +290,21 @@ class GeminiBriefService:
             "type": "deal_command_brief_v2",
             "sector": sector,
             "financing": financing_data,
-            "sellers_hash": self._compute_hash({"s": seller_context})[:8],
-            "buyers_hash": self._compute_hash({"b": buyer_context})[:8]
+            "sellers_hash": self._compute_hash({"s": seller_context}, "deal_brief", record=False)[:8],
+            "buyers_hash": self._compute_hash({"b": buyer_context}, "deal_brief", record=False)[:8]
         }
-        payload_hash = self._compute_hash(payload)
+        return seller_context, buyer_context, payload
+
+    def deal_command_cache_key(self, sector: str, financing_data: dict, top_sellers: list, top_buyers: list) -> str:
+        """AI cache key ("deal_brief" kind) generate_deal_command_brief uses for these inputs."""
+        return self._compute_hash(self._deal_command_payload(sector, financing_data, top_sellers, top_buyers)[2],
+                                  "deal_brief", record=False)
 
+    def _deal_command_flight(self, sector: str, financing_data: dict, seller_context: list, buyer_context: list,
+                             payload: dict, payload_hash: str, force_refresh: bool):
         # 3. Cache check
         if not force_refresh:
-            cached = self._get_cache(payload_hash)
+            cached = self._get_cache(payload_hash, kind="deal_brief")
             if cached: 
                 print(f"=== [Gemini Brief Service] ===", flush=True)
                 print(f"> Action: Deal Command Brief for {sector}", flush=True)
@@ -316,7 +330,7 @@ class GeminiBriefService:
         
         **SUPPLY SIDE (Top Sellers in {sector})**:
         The following companies show elevated Sale Pressure Index (SPI) scores:
-        {json.dumps(seller_context, indent=2)}
+        {fit_json(seller_context, budget('deal_brief') // 2)}
         
         Key categories:
         - 🔥 "Forced Sellers": Debt stress, covenant issues, refi pressure
@@ -325,7 +339,7 @@ class GeminiBriefService:
         
         **DEMAND SIDE (Top Acquirers in {sector})**:
         The following companies show high Buyer Readiness (BR) scores:
-        {json.dumps(buyer_context, indent=2)}
+        {fit_json(buyer_context, budget('deal_brief') // 2)}
         
         **YOUR TASK**:
         **CURRENT DATE**: January 2026 (Treat 2024/2025 data as historical).
@@ -376,15 +390,14 @@ class GeminiBriefService:
         """
         
         try:
-            response = self.client.models.generate_content(
-                model=self.MODEL_NAME, 
-                contents=prompt,
+            response = self._generate_content(
+                prompt,
                 config=types.GenerateContentConfig(response_mime_type="application/json")
             )
             data = json.loads(response.text)
             
             # Save to cache
-            self._save_cache(payload_hash, data, payload)
+            self._save_cache(payload_hash, data, payload, kind="deal_brief")
             
             print(f"> Result: Success", flush=True)
             print(f"==============================\n", flush=True)
@@ -401,24 +414,62 @@ class GeminiBriefService:
     def analyze_match_batch(self, user_profile: dict, candidates: list, intent: str) -> dict:
         """
         Batch analyzes strategic fit.
-        Migrated from GeminiArchitect to use shared Provider.
+        Candidates are split into MATCH_CHUNK_SIZE chunks analyzed concurrently (at most
+        MATCH_MAX_WORKERS at a time); chunks that fail, or come back missing tickers,
+        are retried up to MATCH_CHUNK_RETRIES times. Returns ticker -> insight.
         """
-        if not self.client: return {}
+        if not self.client or not candidates: return {}
 
-        
-        
-        # Construct Prompt
+        # 1. Chunk by ticker (candidates without one cannot be mapped back)
+        candidates = [c for c in candidates if c.get('ticker')]
+        size = max(1, MATCH_CHUNK_SIZE)
+        pending = [candidates[i:i + size] for i in range(0, len(candidates), size)]
+        logger.info(f"AI BATCH: {len(candidates)} candidates in {len(pending)} chunks of <= {size}.")
+
+        # 2. Fan out; each round only resubmits what is still missing
+        final_map = {}
+        for attempt in range(MATCH_CHUNK_RETRIES + 1):
+            if not pending:
+                break
+            if attempt:
+                logger.info(f"AI BATCH: Retrying {len(pending)} chunk(s) (attempt {attempt + 1}).")
+            retry = []
+            workers = max(1, min(MATCH_MAX_WORKERS, len(pending)))
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-match") as executor:
+                futures = {executor.submit(self._analyze_match_chunk, user_profile, chunk, intent): chunk
+                           for chunk in pending}
+                for future in concurrent.futures.as_completed(futures):
+                    chunk = futures[future]
+                    try:
+                        insights = future.result()
+                    except Exception as e:
+                        logger.error(f"Deal Architect Batch Error ({len(chunk)} candidates): {e}")
+                        retry.append(chunk)
+                        continue
+                    final_map.update(insights)
+                    missing = [c for c in chunk if c['ticker'] not in insights]
+                    if missing:
+                        retry.append(missing)
+            pending = retry
+
+        if pending:
+            logger.warning(f"AI BATCH: No insight for {sum(len(c) for c in pending)} candidates after retries.")
+        logger.info(f"AI BATCH: Success. Mapped {len(final_map)} items.")
+        return final_map
+
+    def _analyze_match_chunk(self, user_profile: dict, chunk: list, intent: str) -> dict:
+        """One Gemini call for a chunk of candidates. Raises if the response is unusable."""
         prompt = f"""
         You are a Senior M&A Partner. Evaluate these potential {intent} candidates for {user_profile['ticker']} ({user_profile['name']}).
         
         Your Goal: Re-rank these based on TRUE strategic fit, beyond just financials.
         
         Candidates:
-        {json.dumps([{
+        {fit_json([{
             'ticker': c.get('ticker'), 
             'name': c.get('name'), 
-            'business': c.get('business_summary', '')[:200]
-        } for c in candidates], indent=2)}
+            'business': (c.get('business_summary') or '')[:200]
+        } for c in chunk], budget("match"))}
         
         RETURN JSON MAP ONLY:
         1. **Rationale Headline**: 8-12 words. Be SPECIFIC about product/asset overlay. Avoid generic buzzwords.
@@ -437,45 +488,76 @@ class GeminiBriefService:
             }}
         ]
         """
-        
-        try:
-            logger.info("AI BATCH: Sending request to Gemini...")
-            response = self.client.models.generate_content(
-                model=self.MODEL_NAME, 
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json",
-                    temperature=0.3
-                )
+
+        response = self._generate_content(
+            prompt,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                temperature=0.3
             )
-            
-            text = response.text
-             # Clean Markdown wrappers
-            if "```json" in text: text = text.split("```json")[1].split("```")[0]
-            elif "```" in text: text = text.split("```")[1].split("```")[0]
-            
-            logger.info(f"AI BATCH: Raw response: {text[:100]}...") # Log start of response
-            
-            result_json = json.loads(text.strip())
-            
-            # Normalize keys just in case model deviates
-            final_map = {}
-            for item in result_json:
-                t = item.get('ticker')
-                if t:
-                    final_map[t] = {
-                        "ticker": t,
-                        "rationale_headline": item.get('rationale_headline') or item.get('headline') or "AI Analysis Ready",
-                        "fit_score": item.get('fit_score') or 50,
-                        "synergy_type": item.get('synergy_type') or item.get('synergy') or "Strategic",
-                        "risk_factor": item.get('risk_factor') or item.get('risk') or "Execution Risk"
-                    }
-            logger.info(f"AI BATCH: Success. Mapped {len(final_map)} items.")
-            return final_map
-            
-        except Exception as e:
-            logger.error(f"Deal Architect Batch Error: {e}")
-            return {}
+        )
+
+        text = response.text
+        # Clean Markdown wrappers
+        if "```json" in text: text = text.split("```json")[1].split("```")[0]
+        elif "```" in text: text = text.split("```")[1].split("```")[0]
+
+        result_json = json.loads(text.strip())
+        if isinstance(result_json, dict):
+            # Model sometimes answers with a {ticker: {...}} map instead of an array
+            result_json = [dict(v, ticker=v.get('ticker', k)) if isinstance(v, dict) else v
+                           for k, v in result_json.items()]
+        if not isinstance(result_json, list):
+            raise ValueError(f"expected a JSON array, got {type(result_json).__name__}")
+
+        # Validate per item: a malformed entry is dropped, not the whole chunk
+        requested = {c['ticker'] for c in chunk}
+        insights = {}
+        for item in result_json:
+            insight = self._normalize_match_insight(item, requested)
+            if insight:
+                insights[insight['ticker']] = insight
+        if not insights:
+            raise ValueError("no valid candidate insights in response")
+        return insights
+
+    @staticmethod
+    def _normalize_match_insight(item, requested: set):
+        """Normalized insight for a requested ticker, or None if the item is unusable."""
+        if not isinstance(item, dict):
+            return None
+        t = item.get('ticker')
+        if t not in requested:
+            return None
+        # Normalize keys just in case model deviates
+        try:
+            score = int(round(float(item.get('fit_score') or 50)))
+        except (TypeError, ValueError):
+            score = 50
+        return {
+            "ticker": t,
+            "rationale_headline": item.get('rationale_headline') or item.get('headline') or "AI Analysis Ready",
+            "fit_score": max(0, min(100, score)),
+            "synergy_type": item.get('synergy_type') or item.get('synergy') or "Strategic",
+            "risk_factor": item.get('risk_factor') or item.get('risk') or "Execution Risk"
+        }
+
+    @staticmethod
+    def rerank_matches(matches: list, insights: dict) -> list:
+        """
+        Matches with the AI fit_score set and re-ordered by it. Only the slots held by
+        scored candidates are re-ordered among themselves; a candidate without an insight
+        (its chunk failed) keeps its banker position instead of sinking to the bottom.
+        """
+        for m in matches:
+            if m.get('ticker') in insights:
+                m['ai_fit_score'] = insights[m['ticker']].get('fit_score', 0)
+        slots = [i for i, m in enumerate(matches) if 'ai_fit_score' in m]
+        ranked = sorted((matches[i] for i in slots), key=lambda m: m['ai_fit_score'], reverse=True)
+        out = list(matches)
+        for i, m in zip(slots, ranked):
+            out[i] = m
+        return out
 
     def generate_live_deal_memo(self, user: dict, candidate: dict, intent: str, mandate_mode: str, metric_data: dict, macro: dict, headlines: str) -> dict:
         """
@@ -483,11 +565,18 @@ class GeminiBriefService:
         Migrated from GeminiArchitect.
         """
         if not self.client: 
-            return {
-                "html": "<div class='alert alert-warning'>AI Service Unavailable (Missing Key)</div>", 
-                "verdict": {"status": "UNKNOWN"}
-            }
+            return dict(self.MEMO_UNAVAILABLE)
+
+        memo_hash, prompt = self._deal_memo_request(user, candidate, intent, mandate_mode, metric_data, macro, headlines)
 
+        # Concurrent requests for the same deal share one cache check + Gemini call
+        return single_flight.do(
+            f"deal_memo:{memo_hash}",
+            lambda: self._deal_memo_flight(memo_hash, prompt, intent, mandate_mode)
+        )
+
+    def _deal_memo_request(self, user: dict, candidate: dict, intent: str, mandate_mode: str, metric_data: dict, macro: dict, headlines: str):
+        """(cache hash, prompt) for a live deal memo."""
         start_time = datetime.now()
         current_date_str = start_time.strftime("%B %d, %Y")
         
@@ -523,6 +612,12 @@ class GeminiBriefService:
             target_str = f"{candidate.get('name')} ({candidate.get('ticker')})"
             scenario_label = "ACQUISITION (User is Acquirer)"
 
+        # Identical deal inputs on the same day reuse the memo (shared AI cache, short TTL)
+        memo_hash = self._compute_hash({
+            "date": current_date_str,
+            "user": user, "candidate": candidate, "intent": intent, "mandate": mandate_mode,
+            "metrics": metric_data, "macro": macro, "headlines": headlines,
+        }, "deal_memo")
         prompt = f'''
         You are a Senior M&A Partner.
         DATE: {current_date_str}.
@@ -537,7 +632,7 @@ class GeminiBriefService:
         - Macro: 10Y Treasury: {tnx}%
         - Physics: Offer EV ${offer_ev/1e9:.1f}B | Premium {premium}% | Coverage {coverage}x | PF Lev {leverage}x
         - Scores: Prob {prob}% | Strategic {strat} | Feasibility {feas}
-        - Headlines: {headlines}
+        - Headlines: {fit_text(headlines, budget('deal_memo'))}
         
         TASK:
         1) Search & Validate: Check last 30 days for major issues.
@@ -554,39 +649,47 @@ class GeminiBriefService:
             "recency_audit": {{ "search_performed": true, "key_findings_count": 2, "time_anchor_verified": true }}
         }}
         '''
-        
+        return memo_hash, prompt
+
+    def _memo_config(self):
+        # Enable Google Search for Freshness
+        tools = [types.Tool(google_search=types.GoogleSearch())]
+        return types.GenerateContentConfig(
+            tools=tools,
+            response_mime_type="application/json",
+            temperature=0.4
+        )
+
+    def _finish_memo(self, text: str, memo_hash: str, intent: str, mandate_mode: str) -> dict:
+        """Parse and validate the memo JSON, then cache it."""
+        # Robust Parsing
+        if "```json" in text: text = text.split("```json")[1].split("```")[0]
+        elif "```" in text: text = text.split("```")[1].split("```")[0]
+        
+        data_json = json.loads(text.strip())
+        
+        # Simple validation
+        if "html" not in data_json: 
+            data_json["html"] = f"<div class='alert alert-danger'>AI Format Error</div>"
+        if "verdict" not in data_json: 
+            data_json["verdict"] = {"status": "UNKNOWN"}
+        
+        # Enforce Recency Audit in Output
+        if "recency_audit" not in data_json:
+             data_json["recency_audit"] = {"status": "Implicit", "details": "AI did not return audit data."}
+
+        self._save_cache(memo_hash, data_json, {"intent": intent, "mandate": mandate_mode}, kind="deal_memo")
+        return data_json
+
+    def _deal_memo_flight(self, memo_hash: str, prompt: str, intent: str, mandate_mode: str) -> dict:
+        cached = self._get_cache(memo_hash, kind="deal_memo")
+        if cached:
+            logger.info(f"Deal Memo Cache Hit: {memo_hash[:8]}")
+            return cached['brief']
+
         try:
-            # Enable Google Search for Freshness
-            tools = [types.Tool(google_search=types.GoogleSearch())]
-            
-            response = self.client.models.generate_content(
-                model=self.MODEL_NAME, 
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    tools=tools,
-                    response_mime_type="application/json",
-                    temperature=0.4
-                )
-            )
-            
-            text = response.text
-            # Robust Parsing
-            if "```json" in text: text = text.split("```json")[1].split("```")[0]
-            elif "```" in text: text = text.split("```")[1].split("```")[0]
-            
-            data_json = json.loads(text.strip())
-            
-            # Simple validation
-            if "html" not in data_json: 
-                data_json["html"] = f"<div class='alert alert-danger'>AI Format Error</div>"
-            if "verdict" not in data_json: 
-                data_json["verdict"] = {"status": "UNKNOWN"}
-            
-            # Enforce Recency Audit in Output
-            if "recency_audit" not in data_json:
-                 data_json["recency_audit"] = {"status": "Implicit", "details": "AI did not return audit data."}
-                
-            return data_json
+            response = self._generate_content(prompt, config=self._memo_config())
+            return self._finish_memo(response.text, memo_hash, intent, mandate_mode)
 
         except Exception as e:
             logger.error(f"Deal Architect Memo Error: {e}")
@@ -595,5 +698,44 @@ class GeminiBriefService:
                 "verdict": {"status": "ERROR"}
             }
 
+    def generate_live_deal_memo_stream(self, user: dict, candidate: dict, intent: str, mandate_mode: str, metric_data: dict, macro: dict, headlines: str):
+        """
+        Streaming variant of generate_live_deal_memo for SSE. Yields progress dicts
+        {status, chunk, complete, cached, data}; the final one (complete=True) carries the
+        same memo dict the blocking call returns, and the assembled memo is cached.
+        """
+        if not self.client:
+            yield {"status": "AI Service Unavailable", "complete": True, "data": dict(self.MEMO_UNAVAILABLE)}
+            return
+
+        memo_hash, prompt = self._deal_memo_request(user, candidate, intent, mandate_mode, metric_data, macro, headlines)
+        cached = self._get_cache(memo_hash, kind="deal_memo")
+        if cached:
+            logger.info(f"Deal Memo Cache Hit: {memo_hash[:8]}")
+            yield {"status": "Loaded from cache", "complete": True, "cached": True, "data": cached['brief']}
+            return
+
+        # Identical concurrent streams share one Gemini stream (waiters get the final memo)
+        yield from single_flight.stream(
+            f"deal_memo_stream:{memo_hash}",
+            lambda: self._deal_memo_events(memo_hash, prompt, intent, mandate_mode)
+        )
+
+    def _deal_memo_events(self, memo_hash: str, prompt: str, intent: str, mandate_mode: str):
+        yield {"status": "Writing Investment Committee memo...", "complete": False}
+        parts = []
+        try:
+            for model, text in llm_gateway.stream(prompt, config=self._memo_config(), models=[self.MODEL_NAME], label="Gemini Brief"):
+                parts.append(text)
+                yield {"status": f"Receiving ({model})", "chunk": text, "complete": False}
+            data = self._finish_memo("".join(parts), memo_hash, intent, mandate_mode)
+        except Exception as e:
+            logger.error(f"Deal Architect Memo Stream Error: {e}")
+            data = {
+                "html": f"<div class='alert alert-danger'>AI Analysis Failed: {str(e)}</div>", 
+                "verdict": {"status": "ERROR"}
+            }
+        yield {"status": "Complete", "complete": True, "cached": False, "data": data}
+
 # Singleton Instance
 brief_service = GeminiBriefService()
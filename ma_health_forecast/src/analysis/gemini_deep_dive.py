@@ -1,9 +1,19 @@
-from google import genai
 from google.genai import types
-import os
 import time
+import json
+import hashlib
+from src.utils.llm_gateway import llm_gateway
+from src.utils.ai_cache import ai_cache
+from src.utils.single_flight import single_flight
+from src.utils.prompt_budget import budget, fit_json, fit_text
 
 
+def _compact_drivers(drivers) -> str:
+    # Drivers may be a long blob (signal lists, filings); keep it within the token budget
+    if isinstance(drivers, (dict, list)):
+        return fit_json(drivers, budget("radar_dossier"))
+    return fit_text(str(drivers), budget("radar_dossier"))
+
 def build_deep_dive_prompt(ticker: str, role_type: str, context: dict) -> str:
     """
     Constructs a role-specific, constraint-based prompt for Gemini.
@@ -24,7 +34,7 @@ def build_deep_dive_prompt(ticker: str, role_type: str, context: dict) -> str:
     spi_score = context.get('spi_score', 'N/A')
     br_score = context.get('br_score', 'N/A')
     sub_sector = context.get('sub_sector', 'General')
-    drivers = context.get('drivers', 'Market Conditions')
+    drivers = _compact_drivers(context.get('drivers', 'Market Conditions'))
     name = context.get('name', 'Unknown')
 
     # 2. Define Mission & Styling based on Role
@@ -132,7 +142,7 @@ def build_radar_dossier_prompt(ticker: str, context: dict) -> str:
     # Parsing context
     name = context.get('name', 'Unknown')
     sector = context.get('sector', 'General')
-    drivers = context.get('drivers', 'Market Data')
+    drivers = _compact_drivers(context.get('drivers', 'Market Data'))
     spi = context.get('spi_score', 'N/A')
     
     prompt = f"""
@@ -214,75 +224,125 @@ def build_radar_dossier_prompt(ticker: str, context: dict) -> str:
     """
     return prompt
 
-def analyze_company(ticker, type, context):
-    api_key = os.environ.get("GEMINI_API_KEY")
-    
-    # List of models to try in order of preference
-    # USER REQUEST: "gemini 3.0 flash, nothing less"
-    models_to_try = [
-        'gemini-3-flash-preview', 
-        'gemini-3-pro-preview',
-        'gemini-2.0-flash-exp', 
+UNAVAILABLE_HTML = "<div class='alert alert-danger'>AI Analysis unavailable: All models failed.<br><small>{}</small></div>"
+
+def _deep_dive_key(ticker, type, context):
+    # Same ticker, role and context -> same analysis (shared AI cache, TTL per kind)
+    return hashlib.sha256(
+        json.dumps({"ticker": ticker, "type": type, "context": context}, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+def _build_prompt(ticker, type, context):
+    """Prompt for the role, plus its generation configs: with Search tools first, then without."""
+    # Select Prompt Builder based on Type
+    if type == 'radar_target':
+        prompt = build_radar_dossier_prompt(ticker, context)
+    else:
+        prompt = build_deep_dive_prompt(ticker, type, context)
+
+    # Determine config based on output requirement
+    # If prompt asks for JSON, enforce it. Otherwise, let model decide (None).
+    mime_type = "application/json" if "json" in prompt.lower() else None
+
+    # INNER RETRY LOGIC: Try with Tools -> Fallback to Standard
+    configs = [
+        # Attempt 1: With Search Integration (Enrichment)
+        types.GenerateContentConfig(tools=[{"google_search": {}}], response_mime_type=mime_type),
+        # Attempt 2: Standard Generation (Reliability)
+        types.GenerateContentConfig(response_mime_type=mime_type),
     ]
+    return prompt, configs
+
+def _clean_html(text):
+    # Parse response (handle markdown wrapping if present)
+    if "```html" in text:
+        text = text.replace("```html", "").replace("```", "")
+    elif "```" in text:
+        text = text.replace("```", "")
+    return text.strip()
+
+def analyze_company(ticker, type, context, force_refresh=False):
+    # Model cascade lives in the shared gateway
+    # USER REQUEST: "gemini 3.0 flash, nothing less"
+    if not llm_gateway.enabled:
+        return UNAVAILABLE_HTML.format("GEMINI_API_KEY not found in environment")
+
+    cache_key = _deep_dive_key(ticker, type, context)
+
+    # Concurrent requests for the same analysis share one cache check + Gemini call
+    return single_flight.do(
+        f"deep_dive:{cache_key}{':force' if force_refresh else ''}",
+        lambda: _analyze_company_flight(ticker, type, context, cache_key, force_refresh)
+    )
+
+def _analyze_company_flight(ticker, type, context, cache_key, force_refresh):
+    if not force_refresh:
+        cached = ai_cache.get("deep_dive", cache_key)
+        if cached is not None:
+            print(f"=== [Gemini Deep Dive] Cache HIT for {ticker} ({cache_key[:8]}...) ===", flush=True)
+            return cached
+
+    prompt, (with_tools, standard) = _build_prompt(ticker, type, context)
+    print(f"=== [Gemini Deep Dive] Analyzing {ticker} ===", flush=True)
+
+    try:
+        # Each model is retried without tools before the cascade moves on
+        response, model_name = llm_gateway.generate(prompt, config=with_tools, fallback_config=standard,
+                                                    models="deep_dive", label="Gemini Deep Dive")
+    except Exception as e:
+        # All models failed
+        return UNAVAILABLE_HTML.format(e)
+
+    text = _clean_html(response.text or "")
+    if not text:
+        return UNAVAILABLE_HTML.format("Empty response from model")
+    ai_cache.set("deep_dive", cache_key, text)
+    return text
+
+def analyze_company_stream(ticker, type, context, force_refresh=False):
+    """
+    Streaming variant of analyze_company for SSE. Yields progress dicts
+    {status, chunk, complete, cached, html}; the final one (complete=True) carries the
+    cleaned HTML, which is also written to the cache unless it is empty. Raw chunks may
+    still contain markdown fences.
+    """
+    if not llm_gateway.enabled:
+        yield {"status": "Failed", "complete": True, "html": UNAVAILABLE_HTML.format("GEMINI_API_KEY not found in environment")}
+        return
+
+    cache_key = _deep_dive_key(ticker, type, context)
+    if not force_refresh:
+        cached = ai_cache.get("deep_dive", cache_key)
+        if cached is not None:
+            yield {"status": "Loaded from cache", "complete": True, "cached": True, "html": cached}
+            return
+
+    # Identical concurrent streams share one Gemini stream (waiters get the final HTML)
+    yield from single_flight.stream(
+        f"deep_dive_stream:{cache_key}{':force' if force_refresh else ''}",
+        lambda: _analysis_events(ticker, type, context, cache_key)
+    )
+
+def _analysis_events(ticker, type, context, cache_key):
+    prompt, (with_tools, standard) = _build_prompt(ticker, type, context)
+    print(f"=== [Gemini Deep Dive] Streaming {ticker} ===", flush=True)
+    yield {"status": f"Analyzing {ticker}...", "complete": False}
 
-    last_error = "Unknown"
-    for model_name in models_to_try:
-        try:
-            if not api_key:
-                raise ValueError("GEMINI_API_KEY not found in environment")
-
-            client = genai.Client(api_key=api_key)
-            
-            # Select Prompt Builder based on Type
-            if type == 'radar_target':
-                prompt = build_radar_dossier_prompt(ticker, context)
-            else:
-                prompt = build_deep_dive_prompt(ticker, type, context)
-            
-            # Determine config based on output requirement
-            # If prompt asks for JSON, enforce it. Otherwise, let model decide (None).
-            mime_type = "application/json" if "json" in prompt.lower() else None
-            
-            print(f"=== [Gemini Deep Dive] Analyzing with {model_name} ===", flush=True)
-            
-            # INNER RETRY LOGIC: Try with Tools -> Fallback to Standard
-            try:
-                # Attempt 1: With Search Integration (Enrichment)
-                tools = [{"google_search": {}}]
-                response = client.models.generate_content(
-                    model=model_name,
-                    contents=prompt,
-                    config=types.GenerateContentConfig(
-                        tools=tools,
-                        response_mime_type=mime_type
-                    )
-                )
-            except Exception as e_tools:
-                print(f"> WARNING: Search/Tools failed on {model_name}: {e_tools}", flush=True)
-                print(f"> Retrying without tools...", flush=True)
-                # Attempt 2: Standard Generation (Reliability)
-                response = client.models.generate_content(
-                    model=model_name,
-                    contents=prompt,
-                    config=types.GenerateContentConfig(
-                        response_mime_type=mime_type
-                    )
-                )
-            
-            # Parse response (handle markdown wrapping if present)
-            text = response.text
-            if "```html" in text:
-                text = text.replace("```html", "").replace("```", "")
-            elif "```" in text:
-                text = text.replace("```", "")
-                
-            return text.strip()
-
-        except Exception as e:
-            print(f"> WARNING: Model {model_name} failed: {e}", flush=True)
-            last_error = str(e)
-            continue
-            
-    # All models failed
-    return f"<div class='alert alert-danger'>AI Analysis unavailable: All models failed.<br><small>{last_error}</small></div>"
+    parts = []
+    try:
+        # The gateway retries a model without tools only if nothing has been sent yet
+        for model, text in llm_gateway.stream(prompt, config=with_tools, fallback_config=standard,
+                                              models="deep_dive", label="Gemini Deep Dive"):
+            parts.append(text)
+            yield {"status": f"Receiving ({model})", "chunk": text, "complete": False}
+    except Exception as e:
+        yield {"status": "Failed", "complete": True, "html": UNAVAILABLE_HTML.format(e)}
+        return
 
+    html = _clean_html("".join(parts))
+    if not html:
+        # Never cache an empty analysis: later requests would be served a blank panel
+        yield {"status": "Failed", "complete": True, "html": UNAVAILABLE_HTML.format("Empty response from model")}
+        return
+    ai_cache.set("deep_dive", cache_key, html)
+    yield {"status": "Complete", "complete": True, "cached": False, "html": html}
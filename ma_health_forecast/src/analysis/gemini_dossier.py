@@ -1,29 +1,17 @@
-import os
 import json
-import hashlib
 import logging
 from datetime import datetime
-from google import genai
 from google.genai import types
+from src.utils.llm_gateway import llm_gateway
+from src.utils.ai_cache import ai_cache
+from src.utils.single_flight import single_flight
+from src.utils.prompt_budget import budget, fit_json
+from src.utils.payload_canon import canonical_hash
 
 # Reuse environment
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-import tempfile
-
-# Use system temp directory for caching on Cloud Run (ephemeral but safe)
-CACHE_DIR = os.path.join(tempfile.gettempdir(), 'ma_health_dossiers')
-
-def ensure_cache_dir():
-    try:
-        if not os.path.exists(CACHE_DIR):
-            os.makedirs(CACHE_DIR)
-    except OSError:
-        # Fail silently if we can't write (e.g. strict permissions)
-        # Caching will simply be disabled for this session
-        pass
-
 class GeminiDossierService:
     """
     AI Service for "Company Dossier" (Right-Click Context).
@@ -34,78 +22,38 @@ class GeminiDossierService:
     MODEL_NAME = 'gemini-3-flash-preview' # Updated to 3.0 Flash as per project standard
 
     def __init__(self):
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
+        if not llm_gateway.enabled:
             logger.warning("GEMINI_API_KEY missing. Dossier disabled.")
-            self.client = None
-        else:
-            self.client = genai.Client(api_key=self.api_key)
+
+    @property
+    def client(self):
+        """Shared gateway client (None when no API key is configured)."""
+        return llm_gateway.client if llm_gateway.enabled else None
 
     def _compute_hash(self, payload: dict) -> str:
-        canonical_json = json.dumps(payload, sort_keys=True)
-        return hashlib.sha256(canonical_json.encode()).hexdigest()
+        return canonical_hash(payload, "dossier")
 
     def _get_cache(self, payload_hash: str):
-        try:
-            ensure_cache_dir()
-            filepath = os.path.join(CACHE_DIR, f"dossier_{payload_hash}.json")
-            if os.path.exists(filepath):
-                with open(filepath, 'r') as f:
-                    data = json.load(f)
-                return data
-        except Exception: 
-            return None
-        return None
+        return ai_cache.get("dossier", payload_hash)
 
     def _save_cache(self, payload_hash: str, response_data: dict, payload: dict):
-        try:
-            ensure_cache_dir()
-            filepath = os.path.join(CACHE_DIR, f"dossier_{payload_hash}.json")
-            with open(filepath, 'w') as f:
-                json.dump({
-                    "metadata": {
-                        "created_at": datetime.now().isoformat(), 
-                        "hash": payload_hash,
-                        "model": self.MODEL_NAME
-                    },
-                    "payload": payload,
-                    "dossier": response_data
-                }, f, indent=2)
-        except Exception as e:
-            logger.warning(f"Dossier Cache Write Skipped: {e}")
-
-    def generate_dossier(self, ticker: str, payload: dict, force_refresh: bool = False):
-        if not self.client:
-            return {"error": "AI Service Unavailable"}
-
-        # 1. Compute Hash (Context + Retrieval)
-        payload_hash = self._compute_hash(payload)
-        
-        # 2. Check Cache
-        if not force_refresh:
-            cached = self._get_cache(payload_hash)
-            if cached:
-                logger.info(f"Dossier Cache Hit: {ticker}")
-                return {
-                    "cached": True,
-                    "metadata": cached['metadata'],
-                    "dossier": cached['dossier']
-                }
-
-        # 3. Generate
-        print(f"\n=== [Gemini Dossier Service] ===", flush=True)
-        print(f"> Action: Generating Dossier for {ticker} (Force Refresh: {force_refresh})", flush=True)
-        print(f"> Model: {self.MODEL_NAME}", flush=True)
-        print(f"> Context: {len(str(payload))} chars", flush=True)
-
-        logger.info(f"Generating Dossier for {ticker}...")
-        
+        ai_cache.set("dossier", payload_hash, {
+            "metadata": {
+                "created_at": datetime.now().isoformat(), 
+                "hash": payload_hash,
+                "model": self.MODEL_NAME
+            },
+            "payload": payload,
+            "dossier": response_data
+        })
+
+    def _build_prompt(self, ticker: str, payload: dict) -> str:
         prompt = f"""
         **Role**: Senior M&A Strategist (Audit-Grade).
         **Task**: Generate a 'Company Dossier' for **{ticker}** ({payload.get('name')}).
         
         **INPUT CONTEXT**:
-        {json.dumps(payload, indent=2)}
+        {fit_json(payload, budget("dossier"))}
         
         **INSTRUCTIONS**:
         1. **Augmented Intelligence**: Use the provided input as your PRIMARY evidence source.
@@ -142,42 +90,130 @@ class GeminiDossierService:
             ]
         }}
         """
+        return prompt
+
+    def _finish(self, text: str, payload_hash: str, payload: dict) -> dict:
+        """Parse the model's JSON, cache it and wrap it in the endpoint's response shape."""
+        # Clean/Parse
+        print(f"> Response Length: {len(text)} chars", flush=True)
+
+        if "```json" in text: text = text.split("```json")[1].split("```")[0]
+        data = json.loads(text)
+        
+        # Save Cache
+        self._save_cache(payload_hash, data, payload)
+        
+        print(f"> Result: Success (Cached)", flush=True)
+        print(f"================================\n", flush=True)
+
+        return {
+            "cached": False,
+            "metadata": {
+                "created_at": datetime.now().isoformat(),
+                "model": self.MODEL_NAME
+            },
+            "dossier": data
+        }
+
+    def generate_dossier_stream(self, ticker: str, payload: dict, force_refresh: bool = False):
+        """
+        Streaming variant of generate_dossier for SSE. Yields progress dicts
+        {status, chunk, complete, cached, data, error}; the last one (complete=True) carries
+        the same result generate_dossier returns, and the assembled dossier is cached.
+        """
+        if not self.client:
+            yield {"status": "AI Service Unavailable", "complete": True, "error": "AI Service Unavailable"}
+            return
+
+        payload_hash = self._compute_hash(payload)
+        if not force_refresh:
+            cached = self._get_cache(payload_hash)
+            if cached:
+                logger.info(f"Dossier Cache Hit: {ticker}")
+                yield {"status": "Loaded from cache", "complete": True, "cached": True,
+                       "data": {"cached": True, "metadata": cached['metadata'], "dossier": cached['dossier']}}
+                return
+
+        # Identical concurrent streams share one Gemini stream (waiters get the final dossier)
+        yield from single_flight.stream(
+            f"dossier_stream:{payload_hash}{':force' if force_refresh else ''}",
+            lambda: self._dossier_events(ticker, payload, payload_hash, force_refresh)
+        )
+
+    def _dossier_events(self, ticker: str, payload: dict, payload_hash: str, force_refresh: bool):
+        print(f"\n=== [Gemini Dossier Service] ===", flush=True)
+        print(f"> Action: Streaming Dossier for {ticker} (Force Refresh: {force_refresh})", flush=True)
+        yield {"status": f"Generating dossier for {ticker}...", "complete": False}
+
+        parts = []
+        try:
+            for model, text in llm_gateway.stream(
+                self._build_prompt(ticker, payload),
+                config=types.GenerateContentConfig(response_mime_type="application/json"),
+                models=[self.MODEL_NAME],
+                label="Gemini Dossier",
+            ):
+                parts.append(text)
+                yield {"status": f"Receiving ({model})", "chunk": text, "complete": False}
+
+            yield {"status": "Complete", "complete": True, "cached": False,
+                   "data": self._finish("".join(parts), payload_hash, payload)}
+        except Exception as e:
+            print(f"> ERROR: {e}", flush=True)
+            logger.error(f"Gemini Dossier Stream Error: {e}")
+            yield {"status": "Failed", "complete": True, "error": str(e)}
+
+    def generate_dossier(self, ticker: str, payload: dict, force_refresh: bool = False):
+        if not self.client:
+            return {"error": "AI Service Unavailable"}
+
+        # 1. Compute Hash (Context + Retrieval)
+        payload_hash = self._compute_hash(payload)
+
+        # Concurrent requests for the same dossier share one cache check + Gemini call
+        return single_flight.do(
+            f"dossier:{payload_hash}{':force' if force_refresh else ''}",
+            lambda: self._dossier_flight(ticker, payload, payload_hash, force_refresh)
+        )
+
+    def _dossier_flight(self, ticker: str, payload: dict, payload_hash: str, force_refresh: bool):
+        # 2. Check Cache
+        if not force_refresh:
+            cached = self._get_cache(payload_hash)
+            if cached:
+                logger.info(f"Dossier Cache Hit: {ticker}")
+                return {
+                    "cached": True,
+                    "metadata": cached['metadata'],
+                    "dossier": cached['dossier']
+                }
+
+        # 3. Generate
+        print(f"\n=== [Gemini Dossier Service] ===", flush=True)
+        print(f"> Action: Generating Dossier for {ticker} (Force Refresh: {force_refresh})", flush=True)
+        print(f"> Model: {self.MODEL_NAME}", flush=True)
+        print(f"> Context: {len(str(payload))} chars", flush=True)
+
+        logger.info(f"Generating Dossier for {ticker}...")
+        
+        prompt = self._build_prompt(ticker, payload)
         
         try:
             print(f"> Status: Sending Request to Gemini API...", flush=True)
             start_time = datetime.now()
             
-            response = self.client.models.generate_content(
-                model=self.MODEL_NAME,
-                contents=prompt,
-                config=types.GenerateContentConfig(response_mime_type="application/json")
+            response, _ = llm_gateway.generate(
+                prompt,
+                config=types.GenerateContentConfig(response_mime_type="application/json"),
+                models=[self.MODEL_NAME],
+                label="Gemini Dossier",
             )
             
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
             print(f"> Status: Response Received (Time: {duration:.2f}s)", flush=True)
 
-            # Clean/Parse
-            text = response.text
-            print(f"> Response Length: {len(text)} chars", flush=True)
-
-            if "```json" in text: text = text.split("```json")[1].split("```")[0]
-            data = json.loads(text)
-            
-            # Save Cache
-            self._save_cache(payload_hash, data, payload)
-            
-            print(f"> Result: Success (Cached)", flush=True)
-            print(f"================================\n", flush=True)
-
-            return {
-                "cached": False,
-                "metadata": {
-                    "created_at": datetime.now().isoformat(),
-                    "model": self.MODEL_NAME
-                },
-                "dossier": data
-            }
+            return self._finish(response.text, payload_hash, payload)
             
         except Exception as e:
             print(f"> ERROR: {e}", flush=True)
@@ -0,0 +1,277 @@
+"""
+Inputs the brief endpoints hand to GeminiBriefService, built from the local DB.
+
+Shared by the routes (/api/industry-brief, /api/v2/market-map -> /api/v2/sector-brief)
+and the nightly precompute job, so both produce the same canonical payloads and the
+job warms exactly the cache entries the UI asks for.
+"""
+import json
+import random
+from typing import Dict, List, Tuple
+
+def db_sector(sector: str) -> str:
+    """UI sector name -> companies.sector value."""
+    return 'Technology' if sector == 'Tech' else sector
+
+def ui_sector(sector: str) -> str:
+    """companies.sector / universe sector -> the name the UI sends."""
+    return 'Tech' if sector == 'Technology' else sector
+
+def industry_brief_context(conn, sector: str) -> Dict:
+    """Context for generate_brief (same for every sub-industry of the sector)."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT AVG(s.spi) FROM scores s JOIN companies c ON s.ticker=c.ticker WHERE c.sector=?", (db_sector(sector),))
+    avg_spi = cursor.fetchone()[0] or 0
+    
+    macro_row = cursor.execute("SELECT * FROM financing_macro ORDER BY date DESC LIMIT 1").fetchone()
+    macro = dict(macro_row) if macro_row else {}
+    
+    return {
+        "macro": macro,
+        "aggregates": {"avg_spi": round(avg_spi, 1), "sector": sector},
+        "top_drivers": []
+    }
+
+def build_market_map(conn, sector: str) -> Dict:
+    """Sellers, buyers and playbook for the Deal Command market map (conn needs sqlite3.Row rows)."""
+    cursor = conn.cursor()
+    db_sector_name = db_sector(sector)
+    
+    # Check if extended columns exist in companies table
+    # We try to select them; if not present, we get None/Error. 
+    # For stability, we select standard columns and separate query or join if needed.
+    # Assuming standard columns for now and we will calculate what we can or mock unavailable ones 
+    # based on the prompt's "N/A" fallback. 
+    # Ideally we'd join with a 'fundamentals' table if it existed.
+    
+    query = """
+        SELECT c.ticker, c.company_name, c.market_cap, c.sub_sector,
+               s.spi, s.buyer_readiness, s.capacity, 
+               s.spi_drivers_json, s.br_drivers_json
+        FROM companies c
+        JOIN scores s ON c.ticker = s.ticker
+        WHERE c.sector = ?
+        ORDER BY s.spi DESC
+    """
+    try:
+        cursor.execute(query, (db_sector_name,))
+        rows = cursor.fetchall()
+    except:
+        # Fallback if sub_sector missing
+        query = """
+            SELECT c.ticker, c.company_name, c.market_cap,
+                   s.spi, s.buyer_readiness, s.capacity, 
+                   s.spi_drivers_json, s.br_drivers_json
+            FROM companies c
+            JOIN scores s ON c.ticker = s.ticker
+            WHERE c.sector = ?
+            ORDER BY s.spi DESC
+        """
+        cursor.execute(query, (db_sector_name,))
+        rows = cursor.fetchall()
+
+    
+    sellers = []
+    buyers = []
+    
+    # Helper to clean firepower
+    def parse_firepower(val, cap):
+        if not val: return 0.0
+        try:
+             fp = float(val)
+             # Sanity check: Firepower > 10x Market Cap is suspicious (unless micro cap)
+             if cap and fp > (cap * 10) and cap > 1e9: 
+                 return 0.0 # Anomaly
+             return fp
+        except:
+            return 0.0
+
+    # Helper for Seller Confidence
+    def get_confidence_and_type(driver_str, spi):
+        stype = "Opportunistic"
+        conf = "Low"
+        emoji = ""
+        
+        if any(x in driver_str for x in ["🔥", "Forced", "Distress", "Bankruptcy"]):
+            stype = "Forced Seller"
+            emoji = "🔥"
+            conf = "High"
+        elif "Strategic Review" in driver_str or "📉" in driver_str:
+            stype = "Strategic Review"
+            emoji = "📉"
+            conf = "High" if spi > 80 else "Med"
+        elif spi > 75:
+             stype = "High Potential"
+             conf = "Med"
+             
+        return stype, emoji, conf
+
+    for r in rows:
+        row_dict = dict(r)
+        # Mocked financial metrics (not in the DB yet), seeded per ticker so the map - and the
+        # sector brief payload built from it - is the same on every request
+        rng = random.Random(row_dict['ticker'])
+        
+        try:
+            spi_d = json.loads(row_dict['spi_drivers_json']) if row_dict['spi_drivers_json'] else []
+            br_d = json.loads(row_dict['br_drivers_json']) if row_dict['br_drivers_json'] else []
+        except:
+            spi_d, br_d = [], []
+        
+        base_obj = {
+            "ticker": row_dict['ticker'],
+            "name": row_dict['company_name'],
+            "sub_sector": row_dict.get('sub_sector', sector),
+            "market_cap": row_dict['market_cap']
+        }
+        
+        # --- Supply Logic ---
+        if row_dict['spi'] >= 20:
+            # Deterministic Seller Type from Drivers
+            full_driver_str = " ".join([str(d) for d in spi_d])
+            s_type, s_emoji, s_conf = get_confidence_and_type(full_driver_str, row_dict['spi'])
+            
+            # Simulated Financials (Replace with real DB columns when available)
+            # Logic: We use SPI to loosely correlate for realism if data missing
+            m_cap = row_dict['market_cap'] or 1e9
+            
+            # Net Leverage: Higher for Forced/Distressed
+            sim_lev = round(rng.uniform(4.0, 7.0), 1) if "Forced" in s_type else round(rng.uniform(1.5, 3.5), 1)
+            
+            # Price Dislocation: Higher for distressed
+            sim_disc = round(rng.uniform(30, 60)) if "Forced" in s_type else round(rng.uniform(5, 25))
+            
+            # Enhanced Driver Formatting
+            drivers_fmt = []
+            if "Forced" in s_type: drivers_fmt.append(f"Lev: {sim_lev}x")
+            if "Distress" in s_type: drivers_fmt.append("Liquidity < 6m")
+            if spi_d: drivers_fmt.extend([str(d).replace("TYPE:","").strip() for d in spi_d[:2]])
+
+            sellers.append({
+                **base_obj,
+                "spi": int(row_dict['spi']),
+                "seller_type": s_type,
+                "seller_emoji": s_emoji,
+                "confidence": s_conf,
+                "metrics": {
+                    "net_leverage": f"{sim_lev}x",
+                    "price_dislocation": f"-{sim_disc}%",
+                    "interest_coverage": "2.1x" if sim_lev < 4 else "0.8x",
+                    "debt_maturity": "2026"
+                },
+                "likely_asset_type": "WholeCo" if m_cap < 5e9 else "Carve-out",
+                "catalyst_badge": "Earnings Miss" if sim_disc > 20 else "Strategic Review",
+                "drivers": drivers_fmt[:3], # Top 3 Numeric/Text Mixed
+                "all_drivers": [str(d) for d in spi_d]
+            })
+        
+        # --- Demand Logic ---
+        if row_dict['buyer_readiness'] >= 20:
+            fp_val = parse_firepower(row_dict['capacity'], row_dict['market_cap'])
+            
+            # Mandate extraction
+            mandate = "Growth"
+            for d in br_d:
+                 if "Targeting:" in str(d):
+                     mandate = str(d).replace("Targeting:", "").strip()
+                     break
+            
+            buyers.append({
+                **base_obj,
+                "br": int(max(0, min(100, row_dict['buyer_readiness']))), # Clamp 0-100
+                "firepower": fp_val, # Raw USD
+                "mandate": mandate,
+                "drivers": [str(d) for d in br_d],
+                "is_anomaly": True if (fp_val > (row_dict['market_cap'] * 2) and row_dict['market_cap'] > 1e9) else False
+            })
+    
+    # Filter anomalies from default list
+    buyers = [b for b in buyers if not b.get('is_anomaly', False)]
+    
+    sellers.sort(key=lambda x: x['spi'], reverse=True)
+    buyers.sort(key=lambda x: x['br'], reverse=True)
+    
+    # --- PINNED TICKER LOGIC (SSNC) ---
+    def pin_ticker(data_list, ticker, default_obj=None):
+        idx = next((i for i, item in enumerate(data_list) if item["ticker"] == ticker), -1)
+        if idx != -1:
+            item = data_list.pop(idx)
+            data_list.insert(0, item)
+        elif default_obj:
+            data_list.insert(0, default_obj)
+        return data_list
+
+    # Mock SSNC with numeric drivers
+    ssnc_seller = {
+        "ticker": "SSNC", "name": "SS&C Technologies", "sub_sector": "Software", "market_cap": 16e9,
+        "spi": 88, "seller_type": "Strategic Review", "seller_emoji": "📉", "confidence": "High",
+        "metrics": {"net_leverage": "4.2x (High)", "interest_coverage": "2.5x", "price_dislocation": "-12%"}, 
+        "drivers": ["Activists (13D)", "Margin Pressure (-200bps)", "Portfolio Ops"],
+        "all_drivers": ["Activists (13D)", "Margin Pressure (-200bps)", "Portfolio Ops"],
+        "likely_asset_type": "Carve-out (FinTech)",
+        "catalyst_badge": "13D Filing"
+    }
+    
+    ssnc_buyer = {
+        "ticker": "SSNC", "name": "SS&C Technologies", "sub_sector": "Software", "market_cap": 16e9,
+        "br": 92, "firepower": 4500000000.0, "mandate": "Vertical Software", 
+        "drivers": ["Consolidator", "High FCF", "Recurring Revenue"]
+    }
+
+    sellers = pin_ticker(sellers, "SSNC", ssnc_seller)
+    buyers = pin_ticker(buyers, "SSNC", ssnc_buyer)
+    
+    # --- SELLER PLAYBOOK GENERATION ---
+    # Bucket sellers into archetypes
+    archetypes = {
+        "Refinancing-Driven": {"count": 0, "examples": [], "desc": "Maturity wall < 18m or Lev > 5x"},
+        "Price-Distress": {"count": 0, "examples": [], "desc": "Dislocation > 30% + Stable Assets"},
+        "Activist-Driven": {"count": 0, "examples": [], "desc": "13D Filings or Strategic Review"},
+        "Growth-Stall": {"count": 0, "examples": [], "desc": "Rev Growth < 0% + Comp Pressure"}
+    }
+    
+    for s in sellers:
+        # Simple heuristic classification
+        d_str = " ".join(s.get('all_drivers', []))
+        is_matched = False
+        
+        if "Maturity" in d_str or "Leverage" in d_str:
+            archetypes["Refinancing-Driven"]["count"] += 1
+            is_matched = True
+        if "Dislocation" in d_str or "Price" in d_str:
+            archetypes["Price-Distress"]["count"] += 1
+            is_matched = True
+        if "Activist" in d_str or "Review" in d_str:
+            archetypes["Activist-Driven"]["count"] += 1
+            is_matched = True
+        
+        # Default bucket
+        if not is_matched and s['spi'] > 60:
+             archetypes["Growth-Stall"]["count"] += 1
+
+    # Format Playbook for Frontend
+    top_archetypes = sorted(
+        [{"name": k, "count": v["count"], "desc": v["desc"]} for k,v in archetypes.items()], 
+        key=lambda x: x['count'], reverse=True
+    )[:3]
+
+    playbook = {
+        "top_archetypes": top_archetypes,
+        "watchlist": [
+            {"label": "HY Spreads > 500bps", "status": "Stable", "impact": "High"},
+            {"label": "Sponsor Dry Powder", "status": "deployed", "impact": "Medium"}
+        ],
+        "actions": [
+            "Screen for spin-off candidates in 'Activist' bucket",
+            "Pitch private credit recap for 'Refinancing' targets",
+            "Refresh buy-side mandates for 'Price-Distress' assets"
+        ]
+    }
+
+    return {"sellers": sellers[:500], "buyers": buyers[:500], "playbook": playbook}
+
+def sector_brief_request(market_map: Dict) -> Tuple[List[Dict], List[Dict], Dict]:
+    """(top_sellers, top_buyers, financing) exactly as deal_command.html posts them to /api/v2/sector-brief."""
+    # JSON round trip: the browser sends back what /api/v2/market-map serialized
+    market_map = json.loads(json.dumps(market_map))
+    return market_map["sellers"][:5], market_map["buyers"][:5], {}
@@ -8,6 +8,8 @@ from typing import Dict, Any
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from src.data.schema import get_db_path
+from src.data.fred_loader import get_session, FRED_TIMEOUT
+from src.data.macro_store import get_macro_store, store_enabled
 
 class FinancingLoader:
     """
@@ -28,6 +30,14 @@ class FinancingLoader:
 
     def fetch_series(self, series_id: str) -> float:
         """Fetch latest value from FRED."""
+        # Shared macro store first: a fresh mapped column avoids the round trip entirely
+        if store_enabled():
+            store = get_macro_store()
+            if store.has(series_id) and store.age_seconds(series_id) < 86400:
+                val = store.latest(series_id)
+                if val is not None:
+                    return val
+
         if not self.api_key:
             # Fallback for dev if no key
             defaults = {'BAMLH0A0HYM2': 3.8, 'BAMLC0A0CM': 1.1, 'BUSLOANS': 2800.0}
@@ -41,7 +51,7 @@ class FinancingLoader:
             'sort_order': 'desc'
         }
         try:
-            r = requests.get(self.base_url, params=params)
+            r = get_session().get(self.base_url, params=params, timeout=FRED_TIMEOUT)
             r.raise_for_status()
             data = r.json()
             if 'observations' in data and data['observations']:
@@ -2,24 +2,113 @@ import pandas as pd
 import numpy as np
 import os
 import requests
+import threading
 import time
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from src.data.macro_store import get_macro_store, upsert_series, store_enabled
 
 load_dotenv()
 
+# (connect, read) timeout in seconds for a single FRED request
+FRED_TIMEOUT = (5, 30)
+SESSION_POOL_SIZE = 16
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """
+    Process-wide keep-alive session for FRED.
+    Every loader shares one connection pool so concurrent fetches reuse TLS connections.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=SESSION_POOL_SIZE, pool_maxsize=SESSION_POOL_SIZE)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+# Per-series CSV cache (fallback when the columnar macro store is disabled)
+FRED_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'store', 'fred')
+
+# Days re-requested before the last cached observation so revised values replace stale ones
+REVISION_OVERLAP_DAYS = 90
+
+_fetch_stats = {"cache_hit": 0, "delta": 0, "full": 0}
+_stats_lock = threading.Lock()
+
+def _bump_stat(key: str):
+    with _stats_lock:
+        _fetch_stats[key] += 1
+
+def get_fetch_stats() -> dict:
+    """Counters of cache hits, delta refreshes and full downloads since process start."""
+    with _stats_lock:
+        return dict(_fetch_stats)
+
+def _atomic_write_csv(df: pd.DataFrame, path: str):
+    """Write to a temp file in the same directory, then swap it in so readers never see a partial CSV."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        df.to_csv(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 class FredLoader:
-    def __init__(self):
+    def __init__(self, session: requests.Session = None, timeout=FRED_TIMEOUT):
         self.api_key = os.getenv("FRED_API_KEY")
         if not self.api_key:
             raise ValueError("FRED_API_KEY not found in environment variables.")
         self.base_url = "https://api.stlouisfed.org/fred/series/observations"
+        self.session = session or get_session()
+        self.timeout = timeout
+
+    def _read_cache(self, cache_file: str, series_id: str) -> pd.Series:
+        df = pd.read_csv(cache_file, index_col=0, parse_dates=True)
+        # CSV load might lose serie name
+        df = df["value"]
+        df.name = series_id
+        return df
+
+    def _download(self, series_id: str, start: str) -> pd.Series:
+        params = {
+            "series_id": series_id,
+            "api_key": self.api_key,
+            "file_type": "json",
+            "observation_start": start,
+        }
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+
+        observations = data.get("observations", [])
+        if not observations:
+            return pd.Series(dtype=float, name=series_id)
+
+        df = pd.DataFrame(observations)
+        df["date"] = pd.to_datetime(df["date"])
+        df["value"] = pd.to_numeric(df["value"], errors="coerce")
+        df = df.set_index("date")["value"]
+        df.name = series_id
+        return df
 
-    def fetch_series(self, series_id: str, start: str = "2010-01-01") -> pd.Series:
+    def fetch_series(self, series_id: str, start: str = "2010-01-01", incremental: bool = True) -> pd.Series:
         """
         Fetch real time series data from FRED API with Caching (24h).
+
+        When the cache is stale and `incremental` is set, only observations from the
+        last cached date (minus REVISION_OVERLAP_DAYS for revisions) are requested and
+        merged into the existing CSV. Full history is downloaded on a cold cache, or when
+        `start` is earlier than the first cached observation (the delta cannot extend the
+        history backwards).
         """
         # Cache Path
-        cache_dir = os.path.join(os.path.dirname(__file__), 'store', 'fred')
+        cache_dir = FRED_CACHE_DIR
         if not os.path.exists(cache_dir):
             try:
                 os.makedirs(cache_dir)
@@ -28,69 +117,81 @@ class FredLoader:
 
         cache_file = os.path.join(cache_dir, f"{series_id}.csv")
         
-        # 1. Try Cache
-        if os.path.exists(cache_file):
+        # 1. Try Cache (columnar store first, per-series CSV as fallback)
+        use_store = store_enabled()
+        cached = None
+        store = get_macro_store() if use_store else None
+        if store is not None and store.has(series_id):
+            cached = store.series(series_id)
+            if store.age_seconds(series_id) < 86400:
+                print(f"  [Store hit] Loading {series_id}...")
+                _bump_stat("cache_hit")
+                return cached
+        elif os.path.exists(cache_file):
             try:
+                cached = self._read_cache(cache_file, series_id)
                 # Check 24h freshness
                 mtime = os.path.getmtime(cache_file)
                 if (time.time() - mtime) < 86400:
                     print(f"  [Cache hit] Loading {series_id}...")
-                    df = pd.read_csv(cache_file, index_col=0, parse_dates=True)
-                    # CSV load might lose serie name
-                    df = df["value"]
-                    df.name = series_id
-                    return df
+                    _bump_stat("cache_hit")
+                    if use_store:
+                        # Backfill the store so later loads skip CSV parsing
+                        upsert_series({series_id: cached}, fetched_at={series_id: mtime})
+                    return cached
             except Exception as e:
                 print(f"  Result: Cache corrupted for {series_id} ({e}), refetching...")
+                cached = None
 
-        # 2. Fetch API
-        params = {
-            "series_id": series_id,
-            "api_key": self.api_key,
-            "file_type": "json",
-            "observation_start": start,
-        }
-        
-        try:
-            print(f"  [API Fetch] Downloading {series_id}...")
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            observations = data.get("observations", [])
-            if not observations:
-                print(f"Warning: No observations found for {series_id}")
-                return pd.Series(dtype=float, name=series_id)
-
-            df = pd.DataFrame(observations)
-            df["date"] = pd.to_datetime(df["date"])
-            df["value"] = pd.to_numeric(df["value"], errors="coerce")
-            
-            # Save to Cache
-            try:
-                # Save just the value column with date index
-                save_df = df.set_index("date")[["value"]] 
-                save_df.to_csv(cache_file)
-            except Exception as e:
-               print(f"  Warning: Could not write cache for {series_id}: {e}")
+        # 2. Fetch API (delta if we have a usable cache, full history otherwise)
+        delta_start = None
+        if incremental and cached is not None and not cached.dropna().empty:
+            observed = cached.dropna().index
+            if pd.Timestamp(start) < observed.min():
+                print(f"  [API Fetch] {series_id} cache starts {observed.min():%Y-%m-%d}, after {start}; full refresh")
+            else:
+                delta_start = (observed.max() - pd.Timedelta(days=REVISION_OVERLAP_DAYS)).strftime("%Y-%m-%d")
 
-            df = df.set_index("date")["value"]
-            df.name = series_id
-            return df
-            
+        try:
+            if delta_start:
+                print(f"  [API Delta] Refreshing {series_id} from {delta_start}...")
+                fresh = self._download(series_id, delta_start)
+                _bump_stat("delta")
+                # Overlapping dates take the freshly revised values
+                df = pd.concat([cached[cached.index < pd.Timestamp(delta_start)], fresh])
+                df = df[~df.index.duplicated(keep="last")].sort_index()
+                df.name = series_id
+            else:
+                print(f"  [API Fetch] Downloading {series_id}...")
+                df = self._download(series_id, start)
+                _bump_stat("full")
+                if df.empty:
+                    print(f"Warning: No observations found for {series_id}")
+                    return df
         except Exception as e:
             print(f"Error fetching {series_id}: {e}")
             raise e
 
-def fetch_series(series_id: str, start: str = "2010-01-01") -> pd.Series:
-    loader = FredLoader()
+        # Save to Cache
+        try:
+            # Save just the value column with date index
+            _atomic_write_csv(df.rename("value").rename_axis("date").to_frame(), cache_file)
+            if use_store:
+                upsert_series({series_id: df})
+        except Exception as e:
+            print(f"  Warning: Could not write cache for {series_id}: {e}")
+
+        return df
+
+def fetch_series(series_id: str, start: str = "2010-01-01", timeout=FRED_TIMEOUT) -> pd.Series:
+    loader = FredLoader(timeout=timeout)
     return loader.fetch_series(series_id, start)
 
 def to_monthly(s: pd.Series, how: str) -> pd.Series:
     # Resample to monthly end and apply aggregation
     return s.resample("ME").agg(how)
 
-def load_series(series_id: str, agg: str, start: str) -> pd.Series:
+def load_series(series_id: str, agg: str, start: str, timeout=FRED_TIMEOUT) -> pd.Series:
     print(f"Fetching {series_id} from FRED...")
-    raw = fetch_series(series_id, start=start)
+    raw = fetch_series(series_id, start=start, timeout=timeout)
     return to_monthly(raw, how=agg)
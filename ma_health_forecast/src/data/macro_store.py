@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import shutil
+import threading
+import contextlib
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:     # Windows dev boxes: thread lock only
+    fcntl = None
+
+class MacroStore:
+    """
+    Columnar store for all macro series (FRED and friends).
+    - Layout: store/macro/<version>/{dates.npy, values.npy, mask.npy, meta.json}
+    - values is a date-aligned float64 matrix (rows = union of dates, cols = series)
+    - mask marks which cells are real observations (FRED '.' rows stay NaN but present)
+    - Arrays are opened with mmap_mode='r' so every worker shares the same pages
+    - Writers build a new version dir and atomically swap the CURRENT pointer, holding an
+      inter-process lock (flock on STORE_DIR/.lock) so the CLI build and web workers do
+      not overwrite each other's series
+    """
+
+    STORE_DIR = os.path.join(os.path.dirname(__file__), 'store', 'macro')
+    POINTER_FILE = os.path.join(STORE_DIR, 'CURRENT')
+    KEEP_VERSIONS = 2
+
+    def __init__(self, version: Optional[str] = None):
+        self.version = version
+        self.columns = []
+        self.meta = {"series": {}}
+        self.dates = np.array([], dtype="datetime64[ns]")
+        self.values = np.empty((0, 0))
+        self.mask = np.empty((0, 0), dtype=bool)
+        if version:
+            self._open(version)
+
+    def _open(self, version: str):
+        vdir = os.path.join(self.STORE_DIR, version)
+        with open(os.path.join(vdir, 'meta.json'), 'r') as f:
+            self.meta = json.load(f)
+        self.columns = self.meta["columns"]
+        self.dates = np.load(os.path.join(vdir, 'dates.npy'), mmap_mode='r')
+        self.values = np.load(os.path.join(vdir, 'values.npy'), mmap_mode='r')
+        self.mask = np.load(os.path.join(vdir, 'mask.npy'), mmap_mode='r')
+
+    # --- Reads ---
+
+    def has(self, series_id: str) -> bool:
+        return series_id in self.meta["series"]
+
+    def age_seconds(self, series_id: str) -> float:
+        """Seconds since the series was last fetched from its source (inf if absent)."""
+        info = self.meta["series"].get(series_id)
+        if not info:
+            return float("inf")
+        return time.time() - info["fetched_at"]
+
+    def series(self, series_id: str) -> pd.Series:
+        """Observations of one series (present rows only), named by series id."""
+        j = self.columns.index(series_id)
+        present = self.mask[:, j]
+        return pd.Series(self.values[present, j], index=pd.DatetimeIndex(self.dates[present], name="date"), name=series_id)
+
+    def latest(self, series_id: str) -> Optional[float]:
+        """Last non-NaN observation, without materializing the series."""
+        j = self.columns.index(series_id)
+        col = self.values[:, j]
+        valid = np.flatnonzero(self.mask[:, j] & ~np.isnan(col))
+        return float(col[valid[-1]]) if len(valid) else None
+
+    def frame(self) -> pd.DataFrame:
+        """Date-aligned view of every column (no copy of the mapped matrix)."""
+        return pd.DataFrame(self.values, index=pd.DatetimeIndex(self.dates, name="date"), columns=self.columns, copy=False)
+
+    # --- Writes ---
+
+    @classmethod
+    @contextlib.contextmanager
+    def locked(cls):
+        """Exclusive inter-process lock on the store (not re-entrant: one holder per process)."""
+        os.makedirs(cls.STORE_DIR, exist_ok=True)
+        with open(os.path.join(cls.STORE_DIR, '.lock'), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    @classmethod
+    def write(cls, series: Dict[str, pd.Series], fetched_at: Dict[str, float]) -> "MacroStore":
+        """Write a new store version from raw series and atomically make it current."""
+        with cls.locked():
+            return cls._write_locked(series, fetched_at)
+
+    @classmethod
+    def _write_locked(cls, series: Dict[str, pd.Series], fetched_at: Dict[str, float]) -> "MacroStore":
+        columns = sorted(series)
+        dates = None
+        for s in series.values():
+            idx = pd.DatetimeIndex(s.index)
+            dates = idx if dates is None else dates.union(idx)
+        dates = dates.unique().sort_values() if dates is not None else pd.DatetimeIndex([])
+
+        values = np.full((len(dates), len(columns)), np.nan, dtype=np.float64)
+        mask = np.zeros((len(dates), len(columns)), dtype=bool)
+        meta_series = {}
+        for j, sid in enumerate(columns):
+            s = series[sid]
+            s = s[~s.index.duplicated(keep="last")]
+            rows = dates.get_indexer(s.index)
+            values[rows, j] = s.to_numpy(dtype=np.float64)
+            mask[rows, j] = True
+            meta_series[sid] = {
+                "fetched_at": fetched_at.get(sid, time.time()),
+                "count": int(len(s)),
+                "first": s.index.min().strftime("%Y-%m-%d") if len(s) else None,
+                "last": s.index.max().strftime("%Y-%m-%d") if len(s) else None,
+            }
+
+        version = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        os.makedirs(cls.STORE_DIR, exist_ok=True)
+        tmp_dir = os.path.join(cls.STORE_DIR, f".tmp_{version}_{os.getpid()}")
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, 'dates.npy'), dates.values)
+        np.save(os.path.join(tmp_dir, 'values.npy'), values)
+        np.save(os.path.join(tmp_dir, 'mask.npy'), mask)
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump({
+                "version": version,
+                "created_at": datetime.now().isoformat(),
+                "columns": columns,
+                "series": meta_series
+            }, f, indent=2)
+        os.replace(tmp_dir, os.path.join(cls.STORE_DIR, version))
+
+        # Swap pointer last so readers only ever see complete versions
+        tmp_ptr = f"{cls.POINTER_FILE}.{os.getpid()}.tmp"
+        with open(tmp_ptr, 'w') as f:
+            f.write(version)
+        os.replace(tmp_ptr, cls.POINTER_FILE)
+
+        cls._prune(keep=version)
+        return cls(version)
+
+    @classmethod
+    def _touch_locked(cls, version: str, fetched_at: Dict[str, float]):
+        """Refresh fetched_at of unchanged series in place (meta.json only, atomic replace)."""
+        meta_path = os.path.join(cls.STORE_DIR, version, 'meta.json')
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        for sid, ts in fetched_at.items():
+            meta["series"][sid]["fetched_at"] = ts
+        tmp = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, meta_path)
+        return meta
+
+    @classmethod
+    def _prune(cls, keep: str):
+        versions = sorted(d for d in os.listdir(cls.STORE_DIR) if d[:1].isdigit())
+        for old in versions[:-cls.KEEP_VERSIONS]:
+            if old != keep:
+                # Open mmaps in other workers stay valid after unlink
+                shutil.rmtree(os.path.join(cls.STORE_DIR, old), ignore_errors=True)
+
+    @classmethod
+    def current_version(cls) -> Optional[str]:
+        try:
+            with open(cls.POINTER_FILE, 'r') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+
+# --- Process-wide access ---
+
+_store = None
+_store_lock = threading.Lock()
+
+def store_enabled() -> bool:
+    return os.getenv("MACRO_STORE", "1") != "0"
+
+def get_macro_store() -> MacroStore:
+    """Returns the mapped current version, reopening only when the pointer moved."""
+    global _store
+    version = MacroStore.current_version()
+    with _store_lock:
+        if _store is None or _store.version != version:
+            try:
+                _store = MacroStore(version)
+            except Exception as e:
+                print(f"  Warning: Macro store unreadable ({e}), falling back to CSV cache.")
+                _store = MacroStore()
+        return _store
+
+def _same_series(a: pd.Series, b: pd.Series) -> bool:
+    a = a[~a.index.duplicated(keep="last")].sort_index()
+    b = b.sort_index()
+    return (len(a) == len(b) and pd.DatetimeIndex(a.index).equals(pd.DatetimeIndex(b.index))
+            and np.array_equal(a.to_numpy(dtype=np.float64), b.to_numpy(dtype=np.float64), equal_nan=True))
+
+def upsert_series(updates: Dict[str, pd.Series], fetched_at: Dict[str, float] = None):
+    """
+    Merge freshly fetched series into a new store version (other columns are carried over).
+    The read-merge-swap runs under the store's inter-process lock, so concurrent writers
+    never drop each other's series; when no value changed only the fetch times are updated.
+    """
+    global _store
+    now = time.time()
+    stamps_in = {sid: (fetched_at or {}).get(sid, now) for sid in updates}
+    with _store_lock, MacroStore.locked():
+        version = MacroStore.current_version()
+        try:
+            current = MacroStore(version) if version else MacroStore()
+        except Exception:
+            current = MacroStore()
+
+        if current.version and all(current.has(sid) and _same_series(s, current.series(sid)) for sid, s in updates.items()):
+            meta = MacroStore._touch_locked(current.version, stamps_in)
+            if _store is not None and _store.version == current.version:
+                _store.meta = meta
+            return
+
+        series = {sid: current.series(sid) for sid in current.columns if sid not in updates}
+        stamps = {sid: current.meta["series"][sid]["fetched_at"] for sid in series}
+        series.update(updates)
+        stamps.update(stamps_in)
+        _store = MacroStore._write_locked(series, stamps)
+
+def migrate_from_csv(csv_dir: str = None) -> MacroStore:
+    """One-off migration: load every per-series CSV of the FRED cache into the columnar store."""
+    csv_dir = csv_dir or os.path.join(os.path.dirname(__file__), 'store', 'fred')
+    series, fetched_at = {}, {}
+    for fname in sorted(os.listdir(csv_dir)):
+        if not fname.endswith('.csv'):
+            continue
+        sid = fname[:-4]
+        path = os.path.join(csv_dir, fname)
+        df = pd.read_csv(path, index_col=0, parse_dates=True)
+        series[sid] = df["value"]
+        # Keep the CSV age so freshness rules carry over
+        fetched_at[sid] = os.path.getmtime(path)
+        print(f"  Migrated {sid}: {len(df)} rows")
+    store = MacroStore.write(series, fetched_at)
+    print(f"Macro store version {store.version}: {len(store.columns)} series x {len(store.dates)} dates")
+    return store
+
+if __name__ == "__main__":
+    migrate_from_csv()
@@ -1,4 +1,8 @@
+import math
+import numpy as np
 import pandas as pd
+from collections import deque
+from typing import Dict, Iterable, List
 
 def winsorize_z(z: pd.Series, clip: float) -> pd.Series:
     return z.clip(lower=-clip, upper=clip)
@@ -25,3 +29,122 @@ def normalize_series(x: pd.Series, method: str, window, clip_z: float) -> pd.Ser
         return (x - minv) / (maxv - minv)
     else:
         raise ValueError("Unknown normalize method")
+
+
+# --- Streaming normalizers ---
+# O(1)-state counterpart of the index's 0-100 scale. It replays the same
+# floating-point steps as pandas' rolling min/max kernels (monotonic deques)
+# so outputs match bit for bit.
+
+def _div(num: float, den: float) -> float:
+    """IEEE division (pandas semantics) without Python's ZeroDivisionError."""
+    if den == 0.0:
+        if num == 0.0 or math.isnan(num):
+            return float("nan")
+        return math.copysign(float("inf"), num) * math.copysign(1.0, den)
+    return num / den
+
+class RollingMinMaxScaler:
+    """
+    Streaming equivalent of ma_index.scale_0_100 (rolling min/max over a fixed
+    number of rows, NaN-aware min_periods). Monotonic deques keep each update O(1)
+    amortized; project() scales forecast steps without mutating the fitted state.
+    """
+
+    def __init__(self, window: int, min_periods: int = 60):
+        self.window = window
+        self.min_periods = min_periods
+        self.pos = 0                # rows consumed so far
+        self.min_q = deque()        # (pos, value), values increasing
+        self.max_q = deque()        # (pos, value), values decreasing
+        self.nan_pos = deque()      # positions of NaN rows still inside the window
+
+    def update(self, val: float) -> float:
+        val = float(val)
+        i = self.pos
+        self.pos += 1
+        start = i - self.window + 1
+
+        if val != val:
+            self.nan_pos.append(i)
+        else:
+            while self.min_q and self.min_q[-1][1] >= val:
+                self.min_q.pop()
+            self.min_q.append((i, val))
+            while self.max_q and self.max_q[-1][1] <= val:
+                self.max_q.pop()
+            self.max_q.append((i, val))
+
+        while self.min_q and self.min_q[0][0] < start:
+            self.min_q.popleft()
+        while self.max_q and self.max_q[0][0] < start:
+            self.max_q.popleft()
+        while self.nan_pos and self.nan_pos[0] < start:
+            self.nan_pos.popleft()
+
+        nobs = min(self.pos, self.window) - len(self.nan_pos)
+        if nobs < self.min_periods or nobs == 0:
+            return float("nan")
+        rmin, rmax = self.min_q[0][1], self.max_q[0][1]
+        return _div(100 * (val - rmin), rmax - rmin)
+
+    def extend(self, values: Iterable[float]) -> List[float]:
+        return [self.update(v) for v in values]
+
+    def copy(self) -> "RollingMinMaxScaler":
+        return RollingMinMaxScaler.from_dict(self.to_dict())
+
+    def project(self, values: Iterable[float]) -> List[float]:
+        """Scale values that would follow the fitted history (e.g. forecast steps)."""
+        return self.copy().extend(values)
+
+    def project_paths(self, paths: np.ndarray) -> np.ndarray:
+        """
+        Vectorized project() for many simulated paths at once, shape (n_paths, steps).
+        The monotonic deques hold the suffix minima/maxima of the fitted window, so step h
+        only needs the first deque entry still in the window plus the path's running min/max.
+        """
+        paths = np.asarray(paths, dtype=float)
+        out = np.empty_like(paths)
+        run_min = np.fmin.accumulate(paths, axis=1)
+        run_max = np.fmax.accumulate(paths, axis=1)
+        for h in range(paths.shape[1]):
+            i = self.pos + h
+            start = i - self.window + 1
+            hist_min = next((v for p, v in self.min_q if p >= start), np.inf)
+            hist_max = next((v for p, v in self.max_q if p >= start), -np.inf)
+            hist_nans = sum(1 for p in self.nan_pos if p >= start)
+            nobs = min(i + 1, self.window) - hist_nans
+            if nobs < self.min_periods or nobs == 0:
+                out[:, h] = np.nan
+                continue
+            rmin = np.fmin(run_min[:, h], hist_min)
+            rmax = np.fmax(run_max[:, h], hist_max)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out[:, h] = 100 * (paths[:, h] - rmin) / (rmax - rmin)
+        return out
+
+    @classmethod
+    def fit(cls, x: pd.Series, window: int, min_periods: int = 60) -> "RollingMinMaxScaler":
+        scaler = cls(window, min_periods)
+        scaler.extend(x.to_numpy(dtype=float))
+        return scaler
+
+    def to_dict(self) -> Dict:
+        return {
+            "window": self.window,
+            "min_periods": self.min_periods,
+            "pos": self.pos,
+            "min_q": [list(e) for e in self.min_q],
+            "max_q": [list(e) for e in self.max_q],
+            "nan_pos": list(self.nan_pos),
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "RollingMinMaxScaler":
+        obj = cls(state["window"], state["min_periods"])
+        obj.pos = state["pos"]
+        obj.min_q = deque(tuple(e) for e in state["min_q"])
+        obj.max_q = deque(tuple(e) for e in state["max_q"])
+        obj.nan_pos = deque(state["nan_pos"])
+        return obj
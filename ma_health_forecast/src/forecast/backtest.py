@@ -0,0 +1,161 @@
+"""
+Rolling-origin backtest of the VAR forecast (forecast_with_var).
+
+Every origin fits the production model on the bucket scores up to the origin (AIC lag
+selection over 0..12, the composite as the sum of the weighted buckets, exactly as the
+app), forecasts HORIZON steps ahead and is scored against the realised composite.
+Origins are spread over a process pool.
+
+With VAR_ENGINE=native the lagged design matrix is built once per worker for the whole
+sample: the design of an origin is its row prefix, so lag selection and the fit slice
+the shared matrix instead of rebuilding it. With the default statsmodels engine every
+origin calls forecast_with_var on the truncated scores and is refit independently.
+
+Run from the project root:  python -m src.forecast.backtest --start 2015-01 --workers 4
+"""
+import os
+import io
+import time
+import argparse
+import contextlib
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from src.forecast.var_forecast import forecast_with_var, var_engine
+from src.forecast.native_var import MAXLAGS, lagged_design, aic_by_order, lstsq_fit, forecast_from_params
+
+BACKTEST_START = "2015-01"
+HORIZON = 12
+
+# --- Per-origin evaluation (runs inside pool workers) ---
+
+_BUCKETS = None
+_DESIGN = None      # shared lagged design (native engine only)
+
+def _init_worker(bucket_scores: pd.DataFrame, engine: Optional[str] = None):
+    global _BUCKETS, _DESIGN
+    _BUCKETS = bucket_scores
+    engine = engine or var_engine()
+    _DESIGN = lagged_design(bucket_scores.values.astype(float), MAXLAGS) if engine == "native" else None
+
+def _forecast_origin(origin: int, steps: int):
+    """(bucket forecast (steps, k), lag order) fitted on rows [:origin]."""
+    if _DESIGN is None:
+        with contextlib.redirect_stdout(io.StringIO()):     # one "Fitting VAR model" line per origin
+            fc_df, var_results = forecast_with_var(_BUCKETS.iloc[:origin], steps=steps)
+        return fc_df[_BUCKETS.columns].values, int(var_results.k_ar)
+    # NativeVAR on the prefix, reading the shared design: select_order(12), fit(p), forecast
+    y = _BUCKETS.values.astype(float)
+    p = int(np.argmin(aic_by_order(_DESIGN, y, origin, MAXLAGS)))
+    params, _ = lstsq_fit(_DESIGN, y, p, origin, p)
+    return forecast_from_params(params, y[:origin], p, steps), p
+
+def evaluate_origin(origin: int, horizon: int = HORIZON) -> Dict:
+    """VAR fitted on bucket scores [:origin]; scored against rows origin..origin+horizon."""
+    t0 = time.perf_counter()
+    steps = min(horizon, len(_BUCKETS) - origin)
+    bucket_fc, lag_order = _forecast_origin(origin, steps)
+    fit_ms = (time.perf_counter() - t0) * 1000
+
+    y = _BUCKETS.values
+    actual = y[origin:origin + steps].sum(axis=1)
+    comp_err = bucket_fc.sum(axis=1) - actual
+    naive_err = y[origin - 1].sum() - actual
+    return {
+        "origin": origin,
+        "lag_order": lag_order,
+        "steps": steps,
+        "fit_ms": fit_ms,
+        "composite_err": comp_err.tolist(),
+        "naive_err": naive_err.tolist(),
+        "bucket_rmse": float(np.sqrt(np.mean((bucket_fc - y[origin:origin + steps]) ** 2))),
+    }
+
+def _run_chunk(args) -> List[Dict]:
+    origins, horizon = args
+    return [evaluate_origin(o, horizon) for o in origins]
+
+# --- Driver ---
+
+def summarize(records: List[Dict], horizon: int) -> pd.DataFrame:
+    """RMSE / MAE of the composite by horizon, VAR vs random-walk benchmark."""
+    rows = []
+    for h in range(horizon):
+        var_e = np.array([r["composite_err"][h] for r in records if r["steps"] > h])
+        rw_e = np.array([r["naive_err"][h] for r in records if r["steps"] > h])
+        if len(var_e) == 0:
+            continue
+        rows.append({
+            "horizon": h + 1,
+            "n": len(var_e),
+            "var_rmse": np.sqrt(np.mean(var_e ** 2)),
+            "var_mae": np.mean(np.abs(var_e)),
+            "rw_rmse": np.sqrt(np.mean(rw_e ** 2)),
+            "rw_mae": np.mean(np.abs(rw_e)),
+        })
+    out = pd.DataFrame(rows).set_index("horizon")
+    out["rel_rmse"] = out["var_rmse"] / out["rw_rmse"]
+    return out
+
+def run_backtest(bucket_scores: pd.DataFrame, start: str = BACKTEST_START, horizon: int = HORIZON,
+                 workers: Optional[int] = None):
+    """
+    Evaluate every monthly origin from `start` to the last observation (the first origins
+    are skipped until 2 * MAXLAGS + 2 rows exist, so every candidate lag order is fittable).
+    Returns (per-origin DataFrame, by-horizon summary DataFrame, wall seconds).
+    """
+    bucket_scores = bucket_scores.dropna()
+    engine = var_engine()
+    first = max(int(bucket_scores.index.searchsorted(pd.Timestamp(start))), 2 * MAXLAGS + 2)
+    origins = list(range(first, len(bucket_scores)))
+    if not origins:
+        raise ValueError(f"No backtest origins after {start}")
+
+    workers = workers or min(os.cpu_count() or 1, 8)
+    t0 = time.perf_counter()
+    if workers <= 1:
+        _init_worker(bucket_scores, engine)
+        records = _run_chunk((origins, horizon))
+    else:
+        # Strided chunks: every worker gets a mix of short and long training windows
+        chunks = [(origins[i::workers], horizon) for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(bucket_scores, engine)) as executor:
+            records = [r for chunk in executor.map(_run_chunk, chunks) for r in chunk]
+        records.sort(key=lambda r: r["origin"])
+    wall = time.perf_counter() - t0
+
+    per_origin = pd.DataFrame(records)
+    per_origin.index = bucket_scores.index[per_origin["origin"]]
+    per_origin["rmse"] = [np.sqrt(np.mean(np.square(e))) for e in per_origin["composite_err"]]
+    return per_origin, summarize(records, horizon), wall
+
+def load_cached_buckets(config_path: str = "config/signals.yaml") -> pd.DataFrame:
+    """Bucket scores from the current index snapshot, building the index only if none exists."""
+    from src.index.snapshot import load_snapshot
+    snapshot = load_snapshot(config_path)
+    if snapshot is not None:
+        df = snapshot["index"]
+    else:
+        from src.index.ma_index import build_index
+        df = build_index(config_path)
+    return df[[c for c in df.columns if c.startswith("BKT_")]].dropna()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--start', default=BACKTEST_START, help='First forecast origin (YYYY-MM)')
+    parser.add_argument('--horizon', type=int, default=HORIZON)
+    parser.add_argument('--workers', type=int, default=None, help='Process pool size (1 = inline)')
+    parser.add_argument('--out', default=None, help='Optional CSV path for per-origin results')
+    args = parser.parse_args()
+
+    buckets = load_cached_buckets()
+    per_origin, summary, wall = run_backtest(buckets, args.start, args.horizon, workers=args.workers)
+
+    print(f"Backtest ({var_engine()} engine): {len(per_origin)} origins ({per_origin.index[0]:%Y-%m} .. {per_origin.index[-1]:%Y-%m}) in {wall:.2f}s")
+    print(f"  Fit+forecast per origin: mean {per_origin['fit_ms'].mean():.1f} ms | max {per_origin['fit_ms'].max():.1f} ms")
+    print(f"  Lag orders chosen: {per_origin['lag_order'].value_counts().sort_index().to_dict()}")
+    print(summary.round(4).to_string())
+    if args.out:
+        per_origin.drop(columns=["composite_err", "naive_err"]).to_csv(args.out)
+        print(f"Per-origin results written to {args.out}")
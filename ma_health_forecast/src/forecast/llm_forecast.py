@@ -1,9 +1,15 @@
-import os
-from google import genai
 from google.genai import types
 import pandas as pd
 import json
+import hashlib
 from typing import Tuple
+from src.utils.llm_gateway import llm_gateway, CASCADES
+from src.utils.ai_cache import ai_cache
+from src.utils.single_flight import single_flight
+from src.utils.prompt_budget import summarize_series
+
+FORECAST_MODELS = "pro"
+FALLBACK_RATIONALE = "Forecast failed: All AI models unavailable."
 
 def gemini_forecast(history: pd.Series, steps: int = 12, rate_shock: int = 0, confidence_shock: int = 0, volatility_shock: int = 0) -> Tuple[pd.DataFrame, str]:
     """
@@ -20,28 +26,12 @@ def gemini_forecast(history: pd.Series, steps: int = 12, rate_shock: int = 0, co
         pd.DataFrame: Forecast with columns ['forecast', 'lower80', 'upper80']
         str: Rationale/Explanation from the LLM.
     """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
+    if not llm_gateway.enabled:
         raise ValueError("GEMINI_API_KEY not found in environment variables.")
-        
-    client = genai.Client(api_key=api_key)
-    
-    # List of models to try in order of preference
-    # Cascading from Best (v3/Pro) to Fastest (v2/Flash) to Legacy
-    models_to_try = [
-        'gemini-3-pro-preview', # Confirmed Available
-        'gemini-3-flash-preview',
-        'gemini-2.0-flash-exp', # Fallback
-        'gemini-1.5-pro',       # Stable Fallback
-    ]
-    
+
     # Prepare Context - LIST FORMAT (Better for LLM Time Series)
-    history_list = []
-    for date, value in history.items():
-        # Clean timestamp format to 'YYYY-MM'
-        date_str = date.strftime("%Y-%m") if hasattr(date, 'strftime') else str(date)[:7]
-        history_list.append(f"{date_str}: {value:.1f}")
-    history_str = "\n".join(history_list)
+    # Long-run statistics + the last 24 months verbatim instead of the full monthly history
+    history_ctx = summarize_series(history)
     
     prompt = f"""
     **Role**: You are a world-renowned PhD in Economics with over 30 years of experience in Global M&A markets. You currently serve as the Chief Strategy Officer advising the CEO of **Intralinks**.
@@ -52,8 +42,9 @@ def gemini_forecast(history: pd.Series, steps: int = 12, rate_shock: int = 0, co
     - The "M&A Health Index" is a composite score (0-100):
       - **>50**: Expansion/Boom (High Deal Flow)
       - **<50**: Contraction/Bust (Low Deal Flow)
+    - **Long-Run Summary**: {history_ctx['summary'] or 'n/a'}
     - **Historical Data** (Last 24 Months):
-    {history_str}
+    {history_ctx['recent']}
     
     **Scenario Simulation (User Defined Strategic Shocks)**:
     - **Interest Rates**: {rate_shock} bps (Negative = Fed Cut / Stimulus, Positive = Rate Hike).
@@ -88,56 +79,56 @@ def gemini_forecast(history: pd.Series, steps: int = 12, rate_shock: int = 0, co
     }}
     """
     
-    for model_name in models_to_try:
+    def parse(response):
+        text = response.text
+        print(f"> Status: Response Received (Length: {len(text)} chars)", flush=True)
+
+        # Parse JSON (SDK might deliver it clean if response_mime_type is set, but extra safety check)
         try:
-            print(f"=== [Gemini Forecast Service] ===", flush=True)
-            print(f"> Action: Generating Forecast (Steps: {steps})", flush=True)
-            print(f"> Model Attempt: {model_name}", flush=True)
-            
-            # New SDK usage
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json"
-                )
-            )
-            
-            text = response.text
-            
-            print(f"> Status: Response Received (Length: {len(text)} chars)", flush=True)
-            
-            # Parse JSON (SDK might deliver it clean if response_mime_type is set, but extra safety check)
-            try:
-                data = json.loads(text)
-            except json.JSONDecodeError:
-                # Fallback clean
-                if "```json" in text:
-                    text = text.split("```json")[1].split("```")[0]
-                elif "```" in text:
-                    text = text.split("```")[1].split("```")[0]
-                data = json.loads(text)
-
-            print(f"> Result: Success (JSON Parsed)", flush=True)
-            print(f"=================================\n", flush=True)
-            
-            # Create DataFrame
-            last_date = history.index[-1]
-            dates = pd.date_range(start=last_date, periods=steps + 1, freq="ME")[1:]
-            
-            fc_df = pd.DataFrame({
-                "forecast": data["forecast"],
-                "lower80": data["lower80"],
-                "upper80": data["upper80"]
-            }, index=dates)
-            
-            return fc_df, data.get("rationale", "No rationale provided.")
-            
-        except Exception as e:
-            print(f"> WARNING: Model {model_name} failed: {e}", flush=True)
-            print(f"> Retrying with next model...", flush=True)
-            continue
-            
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            # Fallback clean
+            if "```json" in text:
+                text = text.split("```json")[1].split("```")[0]
+            elif "```" in text:
+                text = text.split("```")[1].split("```")[0]
+            data = json.loads(text)
+
+        # Create DataFrame (a malformed forecast falls through to the next model)
+        last_date = history.index[-1]
+        dates = pd.date_range(start=last_date, periods=steps + 1, freq="ME")[1:]
+
+        fc_df = pd.DataFrame({
+            "forecast": data["forecast"],
+            "lower80": data["lower80"],
+            "upper80": data["upper80"]
+        }, index=dates)
+
+        return fc_df, data.get("rationale", "No rationale provided.")
+
+    try:
+        print(f"=== [Gemini Forecast Service] ===", flush=True)
+        print(f"> Action: Generating Forecast (Steps: {steps})", flush=True)
+
+        # Shared gateway: pooled client, cascade from Best (v3/Pro) to Fastest (v2/Flash) to Legacy;
+        # models with an open circuit are skipped
+        (fc_df, rationale), model_name = llm_gateway.generate(
+            prompt,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json"
+            ),
+            models=FORECAST_MODELS,
+            label="Gemini Forecast",
+            parse=parse,
+        )
+
+        print(f"> Result: Success (JSON Parsed, Model: {model_name})", flush=True)
+        print(f"=================================\n", flush=True)
+        return fc_df, rationale
+
+    except Exception as e:
+        print(f"> WARNING: {e}", flush=True)
+
     # If we reach here, all models failed
     print(f"> ERROR: All Gemini models failed. Falling back to simple linear projection.", flush=True)
     print(f"=================================\n", flush=True)
@@ -147,4 +138,43 @@ def gemini_forecast(history: pd.Series, steps: int = 12, rate_shock: int = 0, co
         "forecast": [last_val] * steps,
         "lower80": [last_val - 5] * steps,
         "upper80": [last_val + 5] * steps
-    }, index=dates), "Forecast failed: All AI models unavailable."
+    }, index=dates), FALLBACK_RATIONALE
+
+
+def forecast_cache_key(history: pd.Series, steps: int, rate_shock: int, confidence_shock: int, volatility_shock: int) -> str:
+    """SHA256 of everything that shapes the answer: composite history, horizon, shocks and model cascade."""
+    payload = {
+        "history": [[str(d)[:10], round(float(v), 6)] for d, v in history.items()],
+        "steps": steps,
+        "shocks": [rate_shock, confidence_shock, volatility_shock],
+        "models": CASCADES[FORECAST_MODELS],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def cached_gemini_forecast(history: pd.Series, steps: int = 12, rate_shock: int = 0, confidence_shock: int = 0, volatility_shock: int = 0) -> Tuple[pd.DataFrame, str]:
+    """
+    gemini_forecast shared by /api/update_forecast and /api/narrative: one Gemini call
+    yields both the forecast frame and the rationale. Results are kept in the AI cache;
+    a caller arriving while the same forecast is in flight waits for it instead of
+    issuing a second call. The linear fallback is returned but never cached.
+    """
+    key = forecast_cache_key(history, steps, rate_shock, confidence_shock, volatility_shock)
+
+    def compute():
+        cached = ai_cache.get("forecast", key)
+        if cached is None:
+            fc_df, rationale = gemini_forecast(history, steps, rate_shock, confidence_shock, volatility_shock)
+            if rationale == FALLBACK_RATIONALE:
+                return fc_df, rationale
+            cached = {
+                "index": [d.isoformat() for d in fc_df.index],
+                "columns": {c: fc_df[c].astype(float).tolist() for c in fc_df.columns},
+                "rationale": rationale,
+            }
+            ai_cache.set("forecast", key, cached)
+        else:
+            print(f"=== [Gemini Forecast Service] Cache HIT ({key[:8]}...) ===", flush=True)
+        fc_df = pd.DataFrame(cached["columns"], index=pd.DatetimeIndex(cached["index"]))
+        return fc_df, cached["rationale"]
+
+    return single_flight.do(f"gemini_forecast:{key}", compute)
@@ -0,0 +1,147 @@
+"""
+Lightweight NumPy VAR engine (opt-in with VAR_ENGINE=native).
+
+Mirrors the slice of statsmodels' VAR / VARResults API the app uses (select_order().aic,
+fit(p), forecast, irf().orth_irfs, names, k_ar, intercept, coefs, sigma_u, resid) without
+importing statsmodels. The lagged design matrix is built once for maxlags; every
+candidate lag order is a column prefix of it, so a single QR factorisation yields the
+residual covariance of all orders for AIC selection.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+MAXLAGS = 12
+
+def lagged_design(y: np.ndarray, maxlags: int) -> np.ndarray:
+    """
+    Row t holds [1, y[t-1], ..., y[t-maxlags]] (lag-1 block first, as statsmodels).
+    Lags that fall before the start of the sample are NaN; callers only slice rows t >= p.
+    """
+    T, k = y.shape
+    Z = np.full((T, 1 + k * maxlags), np.nan)
+    Z[:, 0] = 1.0
+    for lag in range(1, maxlags + 1):
+        Z[lag:, 1 + k * (lag - 1):1 + k * lag] = y[:-lag]
+    return Z
+
+def lstsq_fit(Z: np.ndarray, y: np.ndarray, start: int, stop: int, p: int):
+    """OLS of y[start:stop] on the first 1 + k*p design columns. Returns (params, resid)."""
+    k = y.shape[1]
+    X = Z[start:stop, :1 + k * p]
+    Y = y[start:stop]
+    params = np.linalg.lstsq(X, Y, rcond=1e-15)[0]
+    return params, Y - X @ params
+
+def aic_by_order(Z: np.ndarray, y: np.ndarray, stop: int, maxlags: int = MAXLAGS) -> np.ndarray:
+    """
+    AIC for lag orders 0..maxlags on the common sample rows maxlags..stop-1
+    (statsmodels' select_order convention). One QR of the largest design gives
+    every nested model's residual cross-product: RSS_p = E'E + C[m_p:]' C[m_p:].
+    """
+    k = y.shape[1]
+    X = Z[maxlags:stop]
+    Y = y[maxlags:stop]
+    nobs = len(Y)
+    Q, _ = np.linalg.qr(X)
+    C = Q.T @ Y
+    E = Y - Q @ C
+    rss = E.T @ E
+    aics = np.empty(maxlags + 1)
+    for p in range(maxlags, -1, -1):
+        m = 1 + k * p
+        if p < maxlags:
+            # Dropping lag block p+1 adds its projected component back into the residual
+            block = C[m:m + k]
+            rss = rss + block.T @ block
+        if nobs - m > 0:
+            sign, ld = np.linalg.slogdet(rss / nobs)
+            ld = ld if sign > 0 else -np.inf
+        else:
+            ld = -np.inf
+        aics[p] = ld + (2.0 / nobs) * (p * k ** 2 + k)
+    return aics
+
+def forecast_from_params(params: np.ndarray, history: np.ndarray, p: int, steps: int) -> np.ndarray:
+    """Iterate y_t = c + sum_l y_{t-l} B_l forward from the last p rows of history."""
+    k = history.shape[1]
+    intercept = params[0]
+    blocks = params[1:].reshape(p, k, k)
+    window = list(np.asarray(history)[len(history) - p:][::-1]) if p else []
+    out = np.empty((steps, k))
+    for h in range(steps):
+        y_next = intercept.copy()
+        for lag in range(p):
+            y_next += window[lag] @ blocks[lag]
+        out[h] = y_next
+        window = [y_next] + window[:-1] if p else []
+    return out
+
+class LagOrderSelection:
+    """select_order() result; .aic is the chosen order, as on statsmodels' LagOrderResults."""
+
+    def __init__(self, aics: np.ndarray):
+        self.ics = {"aic": aics.tolist()}
+        self.aic = int(np.argmin(aics))
+
+class NativeIRF:
+    def __init__(self, irfs: np.ndarray, orth_irfs: np.ndarray):
+        self.irfs = irfs
+        self.orth_irfs = orth_irfs
+
+class NativeVARResults:
+    def __init__(self, names: List[str], params: np.ndarray, resid: np.ndarray, index):
+        k = len(names)
+        self.names = list(names)
+        self.neqs = k
+        self.params = params
+        self.k_ar = (params.shape[0] - 1) // k
+        self.nobs = resid.shape[0]
+        self.df_model = params.shape[0]
+        self.df_resid = self.nobs - self.df_model
+        self.intercept = params[0]
+        # statsmodels convention: coefs[l][i, j] is the effect of y_{t-l-1, j} on y_{t, i}
+        self.coefs = params[1:].reshape(self.k_ar, k, k).swapaxes(1, 2)
+        self.resid = pd.DataFrame(resid, index=index, columns=self.names)
+        self.sigma_u = pd.DataFrame(resid.T @ resid / self.df_resid, index=self.names, columns=self.names)
+
+    def forecast(self, y: np.ndarray, steps: int) -> np.ndarray:
+        return forecast_from_params(self.params, np.asarray(y, dtype=float), self.k_ar, steps)
+
+    def ma_rep(self, maxn: int = 10) -> np.ndarray:
+        k = self.neqs
+        phis = np.zeros((maxn + 1, k, k))
+        phis[0] = np.eye(k)
+        for i in range(1, maxn + 1):
+            for j in range(1, min(i, self.k_ar) + 1):
+                phis[i] += phis[i - j] @ self.coefs[j - 1]
+        return phis
+
+    def orth_ma_rep(self, maxn: int = 10) -> np.ndarray:
+        P = np.linalg.cholesky(self.sigma_u.values)
+        return self.ma_rep(maxn) @ P
+
+    def irf(self, periods: int = 10) -> NativeIRF:
+        return NativeIRF(self.ma_rep(periods), self.orth_ma_rep(periods))
+
+class NativeVAR:
+    def __init__(self, endog: pd.DataFrame, maxlags: int = MAXLAGS):
+        self.endog = endog
+        self.names = list(endog.columns)
+        self.y = endog.values.astype(float)
+        self.maxlags = maxlags
+        # Built once; every lag order and both selection and fit slice this matrix
+        self.design = lagged_design(self.y, maxlags)
+
+    def select_order(self, maxlags: int = MAXLAGS) -> LagOrderSelection:
+        if maxlags != self.maxlags:
+            self.maxlags = maxlags
+            self.design = lagged_design(self.y, maxlags)
+        return LagOrderSelection(aic_by_order(self.design, self.y, len(self.y), maxlags))
+
+    def fit(self, p: int) -> NativeVARResults:
+        if p > self.maxlags:
+            self.maxlags = p
+            self.design = lagged_design(self.y, p)
+        params, resid = lstsq_fit(self.design, self.y, p, len(self.y), p)
+        return NativeVARResults(self.names, params, resid, self.endog.index[p:])
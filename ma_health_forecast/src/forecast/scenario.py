@@ -0,0 +1,187 @@
+import math
+import numpy as np
+from typing import Dict, List
+
+def bucket_weight(weights: Dict[str, float], col_name: str) -> float:
+    # Weights map keys are usually 'BKT_credit'; accept bare bucket names too
+    if col_name in weights:
+        return weights[col_name]
+    return weights.get(f"BKT_{col_name}", 0.0)
+
+class ScenarioKernel:
+    """
+    Response of the weighted composite to a unit orthogonalized shock in each bucket.
+
+    Built once per VAR fit from the orthogonalized IRF tensor (steps, vars, shocks) and
+    the bucket weights, so evaluating a scenario is a matrix-vector product instead of
+    an IRF recomputation plus Python loops over buckets.
+    """
+
+    def __init__(self, orth_irfs: np.ndarray, names: List[str], weights: Dict[str, float]):
+        self.names = list(names)
+        self.horizon = orth_irfs.shape[0] - 1
+        self.weights = np.array([bucket_weight(weights, n) for n in self.names], dtype=float)
+        # response[h, j]: composite move at step h for a unit shock to bucket j
+        self.response = np.einsum("hij,i->hj", orth_irfs, self.weights)
+        # cumulative[h, j]: cumulated impact aligned with forecast steps 1..horizon
+        self.cumulative = np.cumsum(self.response, axis=0)[1:]
+        self._positions = {n.lower(): i for i, n in enumerate(self.names)}
+
+    @classmethod
+    def from_var(cls, var_results, weights: Dict[str, float], horizon: int = 12) -> "ScenarioKernel":
+        irf = var_results.irf(periods=horizon)
+        return cls(irf.orth_irfs, var_results.names, weights)
+
+    def position(self, bucket_name: str) -> int:
+        """Column of a shock key, tolerant of case and the BKT_ prefix. -1 when unknown."""
+        key = bucket_name.lower()
+        if key in self._positions:
+            return self._positions[key]
+        return self._positions.get(key.replace("bkt_", ""), -1)
+
+    def shock_vector(self, shocks: Dict[str, float]) -> np.ndarray:
+        vec = np.zeros(len(self.names))
+        for bucket_name, magnitude in shocks.items():
+            pos = self.position(bucket_name)
+            if pos >= 0:
+                vec[pos] += magnitude
+        return vec
+
+    def impulse_response(self, shocks: Dict[str, float]) -> np.ndarray:
+        """Net composite response for steps 0..horizon (the IRF plot line)."""
+        return self.response @ self.shock_vector(shocks)
+
+    def scenario_impact(self, shocks: Dict[str, float]) -> np.ndarray:
+        """Cumulative impact to add to the baseline forecast, steps 1..horizon."""
+        return self.cumulative @ self.shock_vector(shocks)
+
+    def shock_matrix(self, bucket_shocks: Dict[str, np.ndarray]) -> np.ndarray:
+        """(N, buckets) matrix from per-bucket shock columns, same key matching as shock_vector."""
+        n = len(next(iter(bucket_shocks.values()))) if bucket_shocks else 0
+        mat = np.zeros((n, len(self.names)))
+        for bucket_name, magnitudes in bucket_shocks.items():
+            pos = self.position(bucket_name)
+            if pos >= 0:
+                mat[:, pos] += magnitudes
+        return mat
+
+    def scenario_impacts(self, shock_matrix: np.ndarray) -> np.ndarray:
+        """Cumulative impact paths (N, horizon) for N shock vectors in one contraction."""
+        return np.einsum("hk,nk->nh", self.cumulative, shock_matrix)
+
+
+# --- Slider inputs -> bucket shocks ---
+
+def _finite(value: float) -> float:
+    if not math.isfinite(value):
+        raise ValueError(f"non-finite shock {value}")
+    return value
+
+def coerce_shock_inputs(rate_change, confidence_shock, volatility_shock):
+    """
+    Numeric strings or dashboard keywords (Bear/Bull, High/Low) -> floats. "nan"/"inf"
+    parse as floats but are treated like any other unusable input: no shock.
+    """
+    try:
+        r_chg = _finite(float(rate_change))
+    except (TypeError, ValueError):
+        r_chg = 0.0
+
+    try:
+        c_val = _finite(float(confidence_shock))
+    except (TypeError, ValueError):
+        c_val = 0.0
+        if isinstance(confidence_shock, str):
+            if 'Bear' in confidence_shock: c_val = -20.0
+            elif 'Bull' in confidence_shock: c_val = 20.0
+
+    try:
+        v_val = _finite(float(volatility_shock))
+    except (TypeError, ValueError):
+        v_val = 0.0
+        if isinstance(volatility_shock, str):
+            if 'High' in volatility_shock: v_val = 10.0
+            elif 'Low' in volatility_shock: v_val = -5.0
+
+    return r_chg, c_val, v_val
+
+def bucket_shocks(inputs: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Map an (N, 3) array of [rate change bps, confidence pts, volatility pts] to bucket
+    shock columns. TUNED for visual responsiveness (approx 5x sensitivity).
+    """
+    inputs = np.atleast_2d(np.asarray(inputs, dtype=float))
+    r_chg, c_val, v_val = inputs[:, 0], inputs[:, 1], inputs[:, 2]
+
+    # Rate: 100bps -> 15.0 Index Points shock (Tuned for 0-100 scale)
+    rate_impact = -1 * (r_chg / 100.0) * 15.0
+    # Confidence: 20 pts -> 20.0 Index Points shock
+    conf_impact = (c_val / 20.0) * 20.0
+    # Volatility: 10 pts -> 15.0 Index Points shock
+    vol_impact = -1 * (v_val / 10.0) * 15.0
+
+    # Capitalized keys; ScenarioKernel matches them case-insensitively to the VAR columns
+    return {
+        "BKT_Credit": rate_impact + (vol_impact * 0.5),
+        "BKT_Sentiment": conf_impact + (vol_impact * 0.2),
+        "BKT_Valuation": rate_impact,
+        "BKT_Volatility": vol_impact,
+        "BKT_Liquidity": rate_impact + (conf_impact * 0.3),
+    }
+
+def evaluate_scenarios(kernel: ScenarioKernel, baseline: np.ndarray, inputs: np.ndarray) -> np.ndarray:
+    """
+    Scenario trajectories for an (N, 3) array of slider inputs.
+    Returns (N, horizon): the 0-100 baseline forecast plus each cumulative impact path.
+    """
+    impacts = kernel.scenario_impacts(kernel.shock_matrix(bucket_shocks(inputs)))
+    baseline = np.asarray(baseline, dtype=float)
+    return baseline[None, :] + impacts[:, :len(baseline)]
+
+
+# --- Precomputed slider grid ---
+# (min, max, step) of the Market Simulator sliders in templates/index.html
+SLIDER_GRID = {
+    "rate_change": (-100, 100, 25),
+    "confidence_shock": (-20, 20, 5),
+    "volatility_shock": (-10, 10, 1),
+}
+
+class ScenarioTable:
+    """
+    Scenario trajectories and IRF lines for every slider position, built once per model.
+    lookup() is an O(1) array index; positions off the grid return None.
+    """
+
+    def __init__(self, kernel: ScenarioKernel, baseline: np.ndarray, grid: Dict = SLIDER_GRID):
+        self.grid = dict(grid)
+        self.axes = [np.arange(lo, hi + step, step, dtype=float) for lo, hi, step in self.grid.values()]
+        mesh = np.meshgrid(*self.axes, indexing="ij")
+        inputs = np.stack([m.ravel() for m in mesh], axis=1)
+        shape = tuple(len(a) for a in self.axes)
+
+        shock_mat = kernel.shock_matrix(bucket_shocks(inputs))
+        self.baseline = np.asarray(baseline, dtype=float)
+        self.paths = evaluate_scenarios(kernel, self.baseline, inputs).reshape(shape + (-1,))
+        self.irf_lines = (shock_mat @ kernel.response.T).reshape(shape + (-1,))
+
+    def _position(self, value: float, axis: int):
+        if not math.isfinite(value):
+            return None     # "nan" / "inf" slider inputs: evaluated live, off-grid
+        lo, hi, step = list(self.grid.values())[axis]
+        pos = (value - lo) / step
+        if pos < 0 or value > hi or pos != int(pos):
+            return None
+        return int(pos)
+
+    def lookup(self, rate_change: float, confidence_shock: float, volatility_shock: float):
+        """(scenario path, IRF line) for an on-grid slider position, else None."""
+        idx = [self._position(v, i) for i, v in enumerate((rate_change, confidence_shock, volatility_shock))]
+        if None in idx:
+            return None
+        i, j, k = idx
+        return self.paths[i, j, k], self.irf_lines[i, j, k]
+
+    @property
+    def nbytes(self) -> int:
+        return self.paths.nbytes + self.irf_lines.nbytes
@@ -1,6 +1,21 @@
+import os
 import pandas as pd
 import numpy as np
-from statsmodels.tsa.api import VAR
+from src.forecast.native_var import NativeVAR
+
+def var_engine() -> str:
+    """"native" or "statsmodels" (the default), from VAR_ENGINE."""
+    return "native" if os.getenv("VAR_ENGINE", "statsmodels") == "native" else "statsmodels"
+
+def var_model(bucket_scores: pd.DataFrame):
+    """
+    VAR model for the configured engine. VAR_ENGINE=native uses the NumPy fitter and
+    never imports statsmodels (about 2s of app startup); the default stays statsmodels.
+    """
+    if var_engine() == "native":
+        return NativeVAR(bucket_scores)
+    from statsmodels.tsa.api import VAR
+    return VAR(bucket_scores)
 
 def forecast_with_var(bucket_scores: pd.DataFrame, steps: int = 12):
     """
@@ -9,7 +24,7 @@ def forecast_with_var(bucket_scores: pd.DataFrame, steps: int = 12):
     Assumes input data (bucket_scores) is stationary (which normalized scores typically are).
     """
     # 1. Initialize the model
-    model = VAR(bucket_scores)
+    model = var_model(bucket_scores)
 
     # 2. Select optimal lag order using AIC (Akaike Information Criterion)
     # Constrain maxlags to avoid overfitting (e.g., 12 for monthly data)
@@ -41,3 +56,60 @@ def forecast_with_var(bucket_scores: pd.DataFrame, steps: int = 12):
     forecast_df['Composite_Index'] = forecast_df.sum(axis=1)
 
     return forecast_df, var_results
+
+
+# --- Bootstrap fan chart ---
+FAN_PATHS = 2000
+FAN_SEED = 42
+
+def simulate_var_paths(var_results, history: np.ndarray, steps: int = 12, n_paths: int = FAN_PATHS, seed: int = FAN_SEED) -> np.ndarray:
+    """
+    Residual-bootstrap simulation of a fitted VAR.
+
+    Every path starts from the last k_ar observations of `history` and adds resampled
+    (centered) residual vectors at each step, so cross-bucket shock correlation is kept.
+    All paths advance together; the only Python loop is over forecast steps.
+    Returns an array of shape (n_paths, steps, n_buckets).
+    """
+    rng = np.random.default_rng(seed)
+    p = var_results.k_ar
+    coefs = var_results.coefs                 # (p, k, k): y_t = c + sum_l A_l y_{t-l} + u_t
+    intercept = var_results.intercept
+    resid = np.asarray(var_results.resid, dtype=float)
+    resid = resid - resid.mean(axis=0)
+    k = resid.shape[1]
+
+    draws = resid[rng.integers(0, len(resid), size=(n_paths, steps))]
+    if p == 0:
+        # select_order picked no lags: every step is the intercept plus a residual draw
+        return intercept + draws
+    # lags[:, 0] is y_{t-1}, lags[:, 1] is y_{t-2}, ...
+    lags = np.broadcast_to(np.asarray(history, dtype=float)[-p:][::-1], (n_paths, p, k))
+    paths = np.empty((n_paths, steps, k))
+    for h in range(steps):
+        y = intercept + np.einsum("lij,nlj->ni", coefs, lags) + draws[:, h]
+        paths[:, h] = y
+        lags = np.concatenate([y[:, None, :], lags[:, :-1]], axis=1)
+    return paths
+
+def fan_chart(var_results, bucket_scores: pd.DataFrame, scaler, steps: int = 12, n_paths: int = FAN_PATHS, seed: int = FAN_SEED) -> pd.DataFrame:
+    """
+    Quantile bands of the 0-100 composite from bootstrapped VAR paths.
+
+    Paths are summed across the (already weighted) buckets, as in forecast_with_var,
+    then scaled with the composite's fitted RollingMinMaxScaler.
+    Columns: lower80, lower50, median, upper50, upper80.
+    """
+    paths = simulate_var_paths(var_results, bucket_scores.values, steps, n_paths, seed)
+    composite = paths.sum(axis=2)
+    scaled = scaler.project_paths(composite)
+    q = np.nanquantile(scaled, [0.10, 0.25, 0.50, 0.75, 0.90], axis=0)
+
+    forecast_dates = pd.date_range(start=bucket_scores.index[-1], periods=steps + 1, freq='ME')[1:]
+    return pd.DataFrame({
+        "lower80": q[0],
+        "lower50": q[1],
+        "median": q[2],
+        "upper50": q[3],
+        "upper80": q[4],
+    }, index=forecast_dates)
@@ -1,15 +1,17 @@
 import pandas as pd
 import yaml
+import time
+import concurrent.futures
 from pathlib import Path
-from typing import Dict
+from typing import Callable, Dict, Tuple
 from src.data.fred_loader import load_series as load_fred_series
 from src.data.sifma_loader import fetch_sifma_series
 from src.data.renaissance_loader import fetch_ipo_counts
 from src.data.imaa_loader import fetch_deal_counts
 from src.data.sentiment_loader import fetch_sentiment_series
 from src.data.valuation_loader import fetch_valuation_series
-from src.features.normalize import normalize_series
-from src.forecast.var_forecast import forecast_with_var
+from src.features.normalize import normalize_series, RollingMinMaxScaler
+from src.forecast.var_forecast import forecast_with_var, fan_chart, FAN_PATHS, FAN_SEED
 from src.plotting.plots import plot_composite, plot_buckets, plot_forecast, plot_dashboard
 from src.reporting.narrative import generate_executive_summary
 from src.reporting.report_generator import generate_html_report
@@ -24,33 +26,101 @@ def sign_adjust(series: pd.Series, direction: str) -> pd.Series:
 def build_bucket(df_norm: pd.DataFrame) -> pd.Series:
     return df_norm.mean(axis=1)
 
+SCALE_MIN_PERIODS = 60
+
 def scale_0_100(x: pd.Series, window_months: int, neutral: float = 50.0) -> pd.Series:
-    rmin = x.rolling(window_months, min_periods=60).min()
-    rmax = x.rolling(window_months, min_periods=60).max()
+    rmin = x.rolling(window_months, min_periods=SCALE_MIN_PERIODS).min()
+    rmax = x.rolling(window_months, min_periods=SCALE_MIN_PERIODS).max()
     return 100 * (x - rmin) / (rmax - rmin)
 
+def get_composite_scaler(df: pd.DataFrame, cfg: Dict) -> RollingMinMaxScaler:
+    """
+    Streaming 0-100 scaler positioned at the end of the index history.
+    Uses the state captured by build_index when available, otherwise refits on CompositeRaw.
+    """
+    state = df.attrs.get("normalizer_state", {}).get("composite")
+    if state:
+        return RollingMinMaxScaler.from_dict(state)
+    return RollingMinMaxScaler.fit(df["CompositeRaw"], cfg["scale"]["window_months"], SCALE_MIN_PERIODS)
+
+def scale_forecast(scaler: RollingMinMaxScaler, forecast_raw: pd.Series) -> pd.Series:
+    """Scale forecast steps as if appended to history, without rescaling the history itself."""
+    return pd.Series(scaler.project(forecast_raw.to_numpy(dtype=float)), index=forecast_raw.index)
+
+# Loader stage defaults (overridable via the `loader` block in signals.yaml)
+LOADER_MAX_WORKERS = 8
+LOADER_TIMEOUT_S = 30
+
+def _series_fetcher(s: Dict, timeout: float) -> Callable[[], pd.Series]:
+    """Returns a zero-arg callable that fetches the raw series described by a config entry."""
+    source = s.get("source", "fred")
+    if source == "fred":
+        return lambda: load_fred_series(s["id"], agg=s["agg"], start="1990-01-01", timeout=(5, timeout))
+    elif source == "sifma":
+        which = "ig_issuance" if s["id"] == "SIFMA_IG_ISSUANCE" else "hy_issuance"
+        return lambda: fetch_sifma_series(which)
+    elif source == "renaissance":
+        return fetch_ipo_counts
+    elif source == "imaa":
+        return fetch_deal_counts
+    elif source == "sentiment":
+        return fetch_sentiment_series
+    elif source == "valuation":
+        return fetch_valuation_series
+    raise ValueError(f"Unknown source for series {s['name']}: {s.get('source')}")
+
+def load_all_series(cfg: Dict, max_workers: int = None, timeout: float = None) -> Tuple[Dict[str, pd.Series], Dict[str, float]]:
+    """
+    Concurrent loader stage.
+    Fetches every series in the config in parallel (bounded pool, shared FRED session)
+    so a cold build costs roughly the slowest single series instead of the sum.
+
+    Returns:
+        (series by config name, fetch seconds by config name)
+    """
+    loader_cfg = cfg.get("loader", {})
+    max_workers = max_workers or loader_cfg.get("max_workers", LOADER_MAX_WORKERS)
+    timeout = timeout or loader_cfg.get("timeout_s", LOADER_TIMEOUT_S)
+
+    # Resolve all fetchers up front so a bad source fails before any network work
+    specs = [s for bucket in cfg["buckets"].values() for s in bucket["series"]]
+    fetchers = {s["name"]: _series_fetcher(s, timeout) for s in specs}
+
+    def _timed(name):
+        t0 = time.perf_counter()
+        ser = fetchers[name]()
+        return ser, time.perf_counter() - t0
+
+    series, timings = {}, {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_name = {executor.submit(_timed, name): name for name in fetchers}
+        for future in concurrent.futures.as_completed(future_to_name):
+            name = future_to_name[future]
+            series[name], timings[name] = future.result()
+    return series, timings
+
+def print_load_timings(timings: Dict[str, float], wall: float):
+    print("--- Loader Timings ---")
+    for name, secs in sorted(timings.items(), key=lambda kv: kv[1], reverse=True):
+        print(f"  {name:<22} {secs:6.2f}s")
+    print(f"  {'Wall':<22} {wall:6.2f}s (sum {sum(timings.values()):.2f}s)")
+
 def build_index(config_path: str = "config/signals.yaml") -> pd.DataFrame:
     cfg = load_config(config_path)
     start_date = cfg.get("start_date", "2010-01-01")
 
+    # Stage 1: fetch everything concurrently
+    t0 = time.perf_counter()
+    loaded, load_timings = load_all_series(cfg)
+    load_wall = time.perf_counter() - t0
+    print_load_timings(load_timings, load_wall)
+
+    # Stage 2: normalize and aggregate in config order
     bucket_values = {}
     for bucket_name, bucket in cfg["buckets"].items():
         frames = []
         for s in bucket["series"]:
-            if s.get("source", "fred") == "fred":
-                ser = load_fred_series(s["id"], agg=s["agg"], start="1990-01-01")
-            elif s.get("source") == "sifma":
-                ser = fetch_sifma_series("ig_issuance") if s["id"] == "SIFMA_IG_ISSUANCE" else fetch_sifma_series("hy_issuance")
-            elif s.get("source") == "renaissance":
-                ser = fetch_ipo_counts()
-            elif s.get("source") == "imaa":
-                ser = fetch_deal_counts()
-            elif s.get("source") == "sentiment":
-                ser = fetch_sentiment_series()
-            elif s.get("source") == "valuation":
-                ser = fetch_valuation_series()
-            else:
-                raise ValueError(f"Unknown source for series {s['name']}: {s.get('source')}")
+            ser = loaded[s["name"]]
             
             # Ensure all series are monthly end
             ser = ser.resample("ME").last()
@@ -103,7 +173,11 @@ def build_index(config_path: str = "config/signals.yaml") -> pd.DataFrame:
     # Join raw series
     if raw_series:
         out = out.join(pd.DataFrame(raw_series))
-        
+
+    scaler = RollingMinMaxScaler.fit(composite, cfg["scale"]["window_months"], SCALE_MIN_PERIODS)
+    out.attrs["normalizer_state"] = {"composite": scaler.to_dict()}
+    out.attrs["load_timings"] = load_timings
+    out.attrs["load_wall_s"] = load_wall
     return out
 
 if __name__ == "__main__":
@@ -136,23 +210,17 @@ if __name__ == "__main__":
     # For simplicity in this prototype, let's map the forecasted Composite_Index (which is sum of weighted Z-scores)
     # to the 0-100 scale using the recent relationship or just re-run the scaler on the extended series.
     
-    # Let's extend the raw composite and re-scale
-    history_raw = df["CompositeRaw"]
-    forecast_raw = fc_df["Composite_Index"]
-    combined_raw = pd.concat([history_raw, forecast_raw])
-    
+    # Extend the fitted scaler with the forecast steps (same result as re-scaling history + forecast)
     cfg = load_config("config/signals.yaml")
-    combined_scaled = scale_0_100(combined_raw, window_months=cfg["scale"]["window_months"], neutral=cfg["scale"]["neutral"])
-    
-    # Extract the forecast part
-    fc_scaled = combined_scaled.iloc[-12:]
-    fc_df["forecast"] = fc_scaled
-    
-    # Add confidence intervals (simplified for VAR - just using a fixed width for now or from VAR results if we want to be fancy)
-    # VAR results give us standard errors, but mapping that through the 0-100 scale is non-trivial.
-    # We'll use a simple heuristic for the prototype: +/- 5 points growing over time
-    fc_df["lower80"] = fc_df["forecast"] - [i*0.5 + 2 for i in range(1, 13)]
-    fc_df["upper80"] = fc_df["forecast"] + [i*0.5 + 2 for i in range(1, 13)]
+    scaler = get_composite_scaler(df, cfg)
+    fc_df["forecast"] = scale_forecast(scaler, fc_df["Composite_Index"])
+    
+    # Confidence intervals: residual-bootstrap VAR paths pushed through the composite + 0-100 scaler
+    fc_cfg = cfg.get("forecast", {})
+    fan = fan_chart(var_results, var_input, scaler, steps=12,
+                    n_paths=fc_cfg.get("fan_paths", FAN_PATHS), seed=fc_cfg.get("fan_seed", FAN_SEED))
+    fc_df["lower80"] = fan["lower80"]
+    fc_df["upper80"] = fan["upper80"]
     
     fc_df.to_csv(out_dir / "forecast.csv")
     
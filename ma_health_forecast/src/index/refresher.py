@@ -0,0 +1,152 @@
+"""
+Stale-while-revalidate refresher for the macro index snapshot.
+
+Requests always read `refresher.current` (a complete snapshot dict, swapped by a single
+reference assignment) and never wait on FRED or statsmodels. A daemon thread rebuilds
+the snapshot on a schedule derived from the data frequency, and keeps serving the
+previous version, with its age exposed, while the rebuild runs or if it fails.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+from src.index.ma_index import load_config
+from src.index.snapshot import load_snapshot, rebuild, current_version
+
+# Monthly index, but the in-progress month averages daily FRED series, so a daily check
+# picks up new prints. Anything faster is pointless: the FRED cache TTL is 24h.
+REFRESH_HOURS_BY_FREQ = {"D": 24, "W": 24, "M": 24, "Q": 72}
+POLL_SECONDS = 60          # how often the thread looks for work (new pointer / due rebuild)
+RETRY_AFTER_SECONDS = 900  # back-off after a failed rebuild
+
+def refresh_interval_seconds(cfg: Dict) -> float:
+    refresh_cfg = cfg.get("refresh", {})
+    if "interval_hours" in refresh_cfg:
+        hours = refresh_cfg["interval_hours"]
+    else:
+        hours = REFRESH_HOURS_BY_FREQ.get(cfg.get("target_frequency", "M"), 24)
+    return float(hours) * 3600
+
+class SnapshotRefresher:
+    def __init__(self, config_path: str = "config/signals.yaml", interval_s: Optional[float] = None):
+        self.config_path = config_path
+        self.interval_s = interval_s if interval_s is not None else refresh_interval_seconds(load_config(config_path))
+        self._current = None
+        self._refresh_lock = threading.Lock()   # one rebuild at a time per process
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self.refreshing = False
+        self.last_checked = None                # wall time of the last successful rebuild/check
+        self.last_error = None
+        self._next_due = 0.0                    # monotonic time the next rebuild is due
+
+    @property
+    def current(self) -> Optional[Dict]:
+        return self._current
+
+    def _swap(self, snapshot: Dict):
+        # Single reference assignment: readers see either the old or the new snapshot, never a mix
+        self._current = snapshot
+
+    def warm_start(self) -> bool:
+        """Install the persisted snapshot, if one matches the config. File load only."""
+        snapshot = load_snapshot(self.config_path)
+        if snapshot is None:
+            return False
+        self._swap(snapshot)
+        self._next_due = time.monotonic() + max(0.0, self.interval_s - self.age_seconds())
+        return True
+
+    def age_seconds(self) -> Optional[float]:
+        snapshot = self._current
+        if snapshot is None:
+            return None
+        return (datetime.now() - datetime.fromisoformat(snapshot["created_at"])).total_seconds()
+
+    def refresh_now(self, block: bool = False):
+        """Rebuild in the background (or inline when block=True). No-op if one is already running."""
+        if block:
+            self._refresh()
+            return
+        threading.Thread(target=self._refresh, name="index-refresh", daemon=True).start()
+
+    def _refresh(self):
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        self.refreshing = True
+        try:
+            t0 = time.perf_counter()
+            snapshot = rebuild(self.config_path)
+            current = self._current
+            if current is None or snapshot["version"] != current["version"]:
+                self._swap(snapshot)
+                print(f"Index snapshot refreshed -> {snapshot['version']} ({time.perf_counter() - t0:.1f}s)")
+            self.last_checked = datetime.now().isoformat()
+            self.last_error = None
+            self._next_due = time.monotonic() + self.interval_s
+        except Exception as e:
+            # Keep serving the previous snapshot
+            print(f"Index refresh failed (serving {self.version}): {e}")
+            self.last_error = str(e)
+            self._next_due = time.monotonic() + min(RETRY_AFTER_SECONDS, self.interval_s)
+        finally:
+            self.refreshing = False
+            self._refresh_lock.release()
+
+    def _pick_up_external(self):
+        """Another worker or the rebuild job may have moved the CURRENT pointer."""
+        on_disk = current_version()
+        if on_disk and on_disk != self.version:
+            snapshot = load_snapshot(self.config_path)
+            if snapshot is not None:
+                self._swap(snapshot)
+                self._next_due = time.monotonic() + self.interval_s
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._pick_up_external()
+            except Exception as e:
+                print(f"Snapshot poll error: {e}")
+            # Cold start too: _next_due starts at 0, and a failed cold rebuild backs off
+            # for RETRY_AFTER_SECONDS like any other failure
+            if time.monotonic() >= self._next_due:
+                self._refresh()
+            self._stop.wait(POLL_SECONDS)
+
+    def ensure_started(self):
+        """Start the refresher thread lazily (and again after a fork, e.g. gunicorn --preload)."""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="index-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def version(self) -> Optional[str]:
+        snapshot = self._current
+        return snapshot["version"] if snapshot else None
+
+    def status(self) -> Dict:
+        snapshot = self._current
+        age = self.age_seconds()
+        # An unchanged rebuild keeps the old snapshot, so freshness counts from the last check
+        checked = self.last_checked or (snapshot["created_at"] if snapshot else None)
+        stale = checked is None or (datetime.now() - datetime.fromisoformat(checked)).total_seconds() > self.interval_s
+        return {
+            "snapshot_version": snapshot["version"] if snapshot else None,
+            "data_vintage": snapshot["data_vintage"] if snapshot else None,
+            "built_at": snapshot["created_at"] if snapshot else None,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "stale": stale,
+            "refreshing": self.refreshing,
+            "last_checked": self.last_checked,
+            "last_error": self.last_error,
+            "refresh_interval_hours": round(self.interval_s / 3600, 2),
+        }
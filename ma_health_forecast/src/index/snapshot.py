@@ -0,0 +1,148 @@
+"""
+Versioned snapshot of the macro index + fitted VAR.
+
+A snapshot is keyed by the hash of signals.yaml and the data vintage of the index it
+was built from. Web workers load the current snapshot at boot instead of fetching FRED
+and refitting VAR; a rebuild job (`python -m src.index.snapshot`) writes the next
+version and atomically moves the CURRENT pointer.
+"""
+import os
+import hashlib
+import pickle
+import time
+import pandas as pd
+from datetime import datetime
+from typing import Dict, Optional
+from src.index.ma_index import build_index, load_config, get_composite_scaler, scale_forecast
+from src.forecast.var_forecast import forecast_with_var, fan_chart, FAN_PATHS, FAN_SEED
+from src.forecast.scenario import ScenarioKernel, ScenarioTable
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'store', 'snapshots')
+POINTER_FILE = os.path.join(SNAPSHOT_DIR, 'CURRENT')
+KEEP_VERSIONS = 3
+IRF_PERIODS = 12
+FORECAST_STEPS = 12
+
+def config_hash(config_path: str = "config/signals.yaml") -> str:
+    with open(config_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def data_vintage(df: pd.DataFrame) -> str:
+    """Last observation month + content hash of the index frame."""
+    h = hashlib.sha256(pd.util.hash_pandas_object(df, index=True).values.tobytes()).hexdigest()
+    return f"{df.index[-1]:%Y%m}-{h[:10]}"
+
+def build_snapshot(config_path: str = "config/signals.yaml") -> Dict:
+    """Full rebuild: fetch + index + VAR fit + IRF. This is the slow path the snapshot avoids."""
+    t0 = time.perf_counter()
+    df = build_index(config_path)
+    bucket_cols = [c for c in df.columns if c.startswith("BKT_")]
+    var_input = df[bucket_cols].dropna()
+    fc_df, var_results = forecast_with_var(var_input, steps=FORECAST_STEPS)
+    irf = var_results.irf(IRF_PERIODS)
+    cfg = load_config(config_path)
+    scaler = get_composite_scaler(df, cfg)
+    fc_cfg = cfg.get("forecast", {})
+    fan = fan_chart(var_results, var_input, scaler, FORECAST_STEPS,
+                    n_paths=fc_cfg.get("fan_paths", FAN_PATHS), seed=fc_cfg.get("fan_seed", FAN_SEED))
+    weights_map = {f"BKT_{k}": v["weight"] for k, v in cfg["buckets"].items()}
+    kernel = ScenarioKernel(irf.orth_irfs, var_results.names, weights_map)
+    # 0-100 baseline forecast; the slider grid is evaluated against it once per model
+    forecast_raw = fc_df["Composite_Index"] if "Composite_Index" in fc_df else fc_df.sum(axis=1)
+    forecast_scaled = scale_forecast(scaler, forecast_raw)
+    cfg_hash = config_hash(config_path)
+    vintage = data_vintage(df)
+
+    return {
+        "version": f"{vintage}-{cfg_hash[:8]}",
+        "config_hash": cfg_hash,
+        "data_vintage": vintage,
+        "created_at": datetime.now().isoformat(),
+        "build_seconds": round(time.perf_counter() - t0, 2),
+        "index": df,
+        "forecast": fc_df,
+        "var_results": var_results,
+        "var_params": {
+            "names": list(var_results.names),
+            "k_ar": int(var_results.k_ar),
+            "intercept": var_results.intercept,
+            "coefs": var_results.coefs,
+            "sigma_u": var_results.sigma_u.values,
+        },
+        "orth_irfs": irf.orth_irfs,
+        "weights_map": weights_map,
+        "scenario_kernel": kernel,
+        "forecast_scaled": forecast_scaled,
+        "scenario_table": ScenarioTable(kernel, forecast_scaled.values),
+        "fan": fan,
+        "scaler_state": scaler.to_dict(),
+    }
+
+def save_snapshot(snapshot: Dict) -> str:
+    """Write the snapshot file, then swap the CURRENT pointer (both atomic renames)."""
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    version = snapshot["version"]
+    path = os.path.join(SNAPSHOT_DIR, f"snapshot_{version}.pkl")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+    tmp_ptr = f"{POINTER_FILE}.{os.getpid()}.tmp"
+    with open(tmp_ptr, 'w') as f:
+        f.write(version)
+    os.replace(tmp_ptr, POINTER_FILE)
+
+    _prune(keep=version)
+    return path
+
+def _prune(keep: str):
+    files = [f for f in os.listdir(SNAPSHOT_DIR) if f.startswith("snapshot_") and f.endswith(".pkl")]
+    files.sort(key=lambda f: os.path.getmtime(os.path.join(SNAPSHOT_DIR, f)))
+    for f in files[:-KEEP_VERSIONS]:
+        if f != f"snapshot_{keep}.pkl":
+            try:
+                os.remove(os.path.join(SNAPSHOT_DIR, f))
+            except OSError:
+                pass
+
+def current_version() -> Optional[str]:
+    try:
+        with open(POINTER_FILE, 'r') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def load_snapshot(config_path: str = "config/signals.yaml") -> Optional[Dict]:
+    """
+    Load the current snapshot if it was built from this exact signals.yaml.
+    Returns None when there is no snapshot or the config changed since it was built.
+    """
+    version = current_version()
+    if not version:
+        return None
+    path = os.path.join(SNAPSHOT_DIR, f"snapshot_{version}.pkl")
+    try:
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except Exception as e:
+        print(f"Snapshot Read Error {version}: {e}")
+        return None
+    if snapshot.get("config_hash") != config_hash(config_path):
+        print(f"Snapshot {version} built from a different signals.yaml; ignoring.")
+        return None
+    return snapshot
+
+def rebuild(config_path: str = "config/signals.yaml", force: bool = False) -> Dict:
+    """Rebuild job entry point: writes a new version only when config or data changed."""
+    snapshot = build_snapshot(config_path)
+    if not force and snapshot["version"] == current_version():
+        print(f"Snapshot {snapshot['version']} unchanged; nothing to write.")
+        return snapshot
+    path = save_snapshot(snapshot)
+    print(f"Snapshot {snapshot['version']} written to {path} (build {snapshot['build_seconds']}s)")
+    return snapshot
+
+if __name__ == "__main__":
+    import sys
+    rebuild(force="--force" in sys.argv)
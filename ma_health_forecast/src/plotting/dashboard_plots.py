@@ -0,0 +1,194 @@
+"""
+Dashboard charts rendered to base64 PNG (matplotlib Agg).
+
+Kept free of Flask / app state so the render pool (render_service.py) can import
+them in worker processes and call them with plain data.
+"""
+import io
+import base64
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+
+def plot_to_base64(fig):
+    img = io.BytesIO()
+    fig.savefig(img, format='png', bbox_inches='tight', dpi=100)
+    img.seek(0)
+    b64 = base64.b64encode(img.getvalue()).decode()
+    plt.close(fig)
+    return b64
+
+# --- PLOT GENERATORS (In-memory Base64) ---
+
+def generate_main_forecast_plot(df, fc_df, ai_fc=None):
+    """Main forecast chart with history + VAR + optional AI overlay."""
+    fig, ax = plt.subplots(figsize=(10, 5))
+    
+    last_hist_date = df.index[-1]
+    last_hist_val = df["Composite"].iloc[-1]
+    
+    # 1. Prepare continuous lines (connect history to forecast)
+    baseline_plot = pd.concat([pd.Series([last_hist_val], index=[last_hist_date]), fc_df["forecast"]])
+    # Scenario Plot (New)
+    scenario_plot = None
+    if "scenario_forecast" in fc_df and fc_df["scenario_forecast"] is not None:
+        scenario_plot = pd.concat([pd.Series([last_hist_val], index=[last_hist_date]), fc_df["scenario_forecast"]])
+
+    lower80_plot = pd.concat([pd.Series([last_hist_val], index=[last_hist_date]), fc_df["lower80"]])
+    upper80_plot = pd.concat([pd.Series([last_hist_val], index=[last_hist_date]), fc_df["upper80"]])
+    
+    # Plot History
+    # Colors: Intralinks Blue (#005587)
+    hist_subset = df["Composite"].iloc[-60:]
+    ax.plot(hist_subset.index, hist_subset.values, label="History", color="#005587", linewidth=2)
+    
+    # Plot Baseline VAR
+    # Colors: Intralinks Gold (#FFB81C)
+    ax.plot(baseline_plot.index, baseline_plot.values, label="Baseline Forecast (VAR)", color="#FFB81C", linestyle="--", linewidth=2)
+    
+    # Plot Simulated Scenario (Red)
+    if scenario_plot is not None:
+         ax.plot(scenario_plot.index, scenario_plot.values, label="Simulated Scenario", color="#d62728", linestyle="-.", linewidth=2)
+
+    # Confidence Intervals
+    ax.fill_between(lower80_plot.index, lower80_plot.values, upper80_plot.values, color="#FFB81C", alpha=0.2)
+
+    # AI Overlay (if provided)
+    if ai_fc is not None and not ai_fc.empty:
+        ai_plot = pd.concat([pd.Series([last_hist_val], index=[last_hist_date]), ai_fc])
+        ax.plot(ai_plot.index, ai_plot.values, label="AI Forecast (Gemini)", color="#9467bd", linestyle=":", linewidth=2.5, marker='o', markersize=4)
+    
+    # Neutral Line
+    ax.axhline(50, color='gray', linestyle=':', alpha=0.5)
+    
+    chart_title = "M&A Health Index (VAR + AI Forecast)" if (ai_fc is not None and not ai_fc.empty) else "M&A Health Index (VAR Forecast)"
+    ax.set_title(chart_title, fontweight='bold')
+    ax.legend(loc="upper right")
+    ax.grid(True, alpha=0.2)
+    ax.set_ylim(0, 100)
+    
+    return plot_to_base64(fig)
+
+def generate_attribution_plot(df):
+    """Horizontal bar chart of current drivers."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    
+    bucket_cols = [c for c in df.columns if c.startswith("BKT_")]
+    latest = df[bucket_cols].iloc[-1]
+    latest.index = [c.replace("BKT_", "").replace("_", " ").title() for c in latest.index]
+    
+    color_map = {
+        "Credit": "#1f77b4", 
+        "Sentiment": "#ff7f0e", 
+        "Valuation": "#2ca02c", 
+        "Volatility": "#d62728", 
+        "Liquidity": "#9467bd"
+    }
+    colors = [color_map.get(x, "#333333") for x in latest.index]
+    
+    latest.plot(kind='barh', ax=ax, color=colors, alpha=0.8)
+    ax.set_title("Current Drivers (Weighted Contribution)", fontweight='bold')
+    ax.axvline(0, color='black', linewidth=0.5)
+    ax.grid(True, alpha=0.2)
+    
+    return plot_to_base64(fig)
+
+def generate_irf_plot(kernel, shocks, response=None):
+    """Impulse Response Function plot. `response` skips the kernel when the line is precomputed."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    try:
+        if kernel is None:
+            raise ValueError("No VAR model results available")
+            
+        # Weighted sum of responses across all buckets, precomputed per fit
+        if response is None:
+            response = kernel.impulse_response(shocks)
+        total_composite_response = pd.Series(response, index=range(kernel.horizon + 1))
+                    
+        ax.plot(total_composite_response, marker='o', color='#d62728', linewidth=2, label="Net Impact on Index")
+        ax.axhline(0, color='black', linewidth=0.5)
+        ax.set_title("Net Impulse Response (Combined Shocks)", fontweight='bold')
+        ax.grid(True, alpha=0.2)
+        ax.legend()
+    except Exception as e:
+        ax.text(0.5, 0.5, f"No Impact / Static: {str(e)}", ha='center')
+        
+    return plot_to_base64(fig)
+
+def generate_history_plot(df):
+    """Long-term history with regime shading."""
+    fig, ax = plt.subplots(figsize=(10, 5))
+    
+    # Regime Shading
+    ax.axhspan(50, 100, color='green', alpha=0.05, label='Expansionary')
+    ax.axhspan(0, 50, color='red', alpha=0.05, label='Contractionary')
+    
+    # Plot Index and Trend
+    df["Composite"].plot(ax=ax, label="M&A Health Index", color="#005587", linewidth=2)
+    df["Composite"].rolling(12).mean().plot(ax=ax, label="12-Month Trend", color="#FFB81C", linewidth=2, linestyle="--")
+    
+    ax.set_title("M&A Historical Health Index Performance", fontweight='bold')
+    ax.set_ylim(0, 100)
+    ax.grid(True, alpha=0.2)
+    ax.legend(loc="upper left")
+    
+    return plot_to_base64(fig)
+
+def generate_contributions_plot(df):
+    """Time series of component contributions."""
+    fig, ax = plt.subplots(figsize=(10, 5))
+    cols = [c for c in df.columns if c.startswith("BKT_")]
+    plot_df = df[cols].copy()
+    plot_df.columns = [c.replace("BKT_", "").replace("_", " ").title() for c in cols]
+    
+    color_map = {
+        "Credit": "#1f77b4", 
+        "Sentiment": "#ff7f0e", 
+        "Valuation": "#2ca02c", 
+        "Volatility": "#d62728", 
+        "Liquidity": "#9467bd"
+    }
+    plot_colors = [color_map.get(label, "#333333") for label in plot_df.columns]
+    
+    plot_df.iloc[-60:].plot(ax=ax, linewidth=1.5, alpha=0.8, color=plot_colors)
+    ax.set_title("Component Contributions (Time Series)", fontweight='bold')
+    ax.grid(True, alpha=0.2)
+    ax.legend(bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0)
+    plt.tight_layout()
+    
+    return plot_to_base64(fig)
+
+def generate_deal_activity_plot(df):
+    """Deal activity proxy (C&I Loans)."""
+    fig, ax = plt.subplots(figsize=(10, 5))
+    deal_proxy_col = None
+    if "CI_LOANS_RAW" in df.columns: deal_proxy_col = "CI_LOANS_RAW"
+    else:
+        for col in df.columns:
+            if "CI_LOANS" in col or "BUSLOANS" in col: 
+                 deal_proxy_col = col
+                 break
+                 
+    if deal_proxy_col:
+        deal_activity = df[deal_proxy_col].pct_change(12) * 100
+        deal_activity.iloc[-120:].plot(ax=ax, color="#2ca02c", linewidth=2, label="C&I Loans (YoY Growth)")
+        ax.axhline(0, color='black', linewidth=0.5)
+        ax.set_title("Deal Activity Proxy: Commercial & Industrial Loans Growth", fontweight='bold')
+        ax.legend(loc="upper left")
+        
+    ax.grid(True, alpha=0.2)
+    return plot_to_base64(fig)
+
+def generate_confidence_plot(df):
+    """CEO Confidence plot."""
+    fig, ax = plt.subplots(figsize=(10, 5))
+    conf_col = "BUSINESS_CONFIDENCE_RAW"
+    if conf_col in df.columns:
+        df[conf_col].iloc[-120:].plot(ax=ax, color="#ff7f0e", linewidth=2, label="CEO Confidence (OECD BCI)")
+        ax.axhline(100, color='black', linewidth=0.5, linestyle="--", label="Neutral (100)")
+        ax.set_title("CEO Confidence: OECD Business Confidence Indicator (USA)", fontweight='bold')
+        ax.legend(loc="upper left")
+        
+    ax.grid(True, alpha=0.2)
+    return plot_to_base64(fig)
@@ -0,0 +1,43 @@
+import threading
+from typing import Callable, Dict
+
+class PlotCache:
+    """
+    Rendered plots keyed by (index version, plot name).
+    Only the current index version is kept: a new version drops the previous renders.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._plots: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, version: str, name: str, render: Callable[[], str]) -> str:
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._plots = {}
+            if name in self._plots:
+                self.hits += 1
+                return self._plots[name]
+            self.misses += 1
+
+        value = render()
+        with self._lock:
+            # A refresh may have swapped the index while we rendered; don't store stale output
+            if version == self._version:
+                self._plots[name] = value
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._plots = {}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"version": self._version, "plots": sorted(self._plots), "hits": self.hits, "misses": self.misses}
+
+plot_cache = PlotCache()
@@ -0,0 +1,216 @@
+"""
+Matplotlib render pool.
+
+Charts are drawn in a small process pool instead of on the request threads: pyplot's
+global state is not thread-safe and rendering holds the GIL, so concurrent dashboard
+users used to serialize on it. A plot is submitted as a spec (renderer name + plain
+data arguments) and comes back as the base64 PNG the dashboard already uses.
+
+RENDER_WORKERS=0 renders inline (serialized under a lock), e.g. for debugging. Platforms
+without fork (Windows) always render inline: spawn would re-import app.py in every worker.
+The pool is started on the first render.
+"""
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+RENDER_MAX_INFLIGHT = int(os.getenv("RENDER_MAX_INFLIGHT", "8"))
+RENDER_TIMEOUT_S = 60
+
+def _renderers() -> Dict:
+    from src.plotting import dashboard_plots as dp
+    return {
+        "main_forecast": dp.generate_main_forecast_plot,
+        "irf": dp.generate_irf_plot,
+        "attribution": dp.generate_attribution_plot,
+        "history": dp.generate_history_plot,
+        "contributions": dp.generate_contributions_plot,
+        "deal_activity": dp.generate_deal_activity_plot,
+        "confidence": dp.generate_confidence_plot,
+    }
+
+_worker_renderers = None
+
+def _init_worker():
+    # Preload matplotlib (Agg) and the chart module once per worker process
+    global _worker_renderers
+    _worker_renderers = _renderers()
+
+def _render(name: str, args: tuple, kwargs: dict) -> str:
+    return _worker_renderers[name](*args, **kwargs)
+
+def _ping() -> int:
+    return os.getpid()
+
+class RenderService:
+    def __init__(self, workers: int = RENDER_WORKERS, max_inflight: int = RENDER_MAX_INFLIGHT,
+                 slot_timeout: float = RENDER_TIMEOUT_S):
+        if workers > 0 and "fork" not in multiprocessing.get_all_start_methods():
+            workers = 0
+        self.workers = workers
+        self.max_inflight = max_inflight
+        self.slot_timeout = slot_timeout
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._inline_lock = threading.Lock()     # pyplot is not thread-safe
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._inline_renderers = None
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.inline = 0
+        self.waiting = 0            # callers blocked on the in-flight limit (queue depth)
+        self.in_flight = 0
+        self.max_waiting = 0
+        self.total_ms = 0.0
+
+    def start(self):
+        """Fork the workers now instead of on the first render (no-op when rendering inline)."""
+        if self.workers <= 0:
+            return
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                return
+            ctx = multiprocessing.get_context("fork")
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx, initializer=_init_worker)
+            self._pid = os.getpid()
+        # ProcessPoolExecutor spawns lazily; one ping per worker brings them all up
+        for f in [self._executor.submit(_ping) for _ in range(self.workers)]:
+            f.result()
+
+    def _pool(self):
+        if self._executor is not None and getattr(self._executor, "_broken", False):
+            self._reset_pool()
+        if self._executor is None or self._pid != os.getpid():
+            self.start()
+        return self._executor
+
+    def _reset_pool(self, executor=None, kill: bool = False):
+        """
+        Drop a broken pool (a worker died) or, with kill=True, a hung one: its workers are
+        terminated so their pending renders fail and give back their slots. The next
+        submit starts a fresh pool. `executor` limits the reset to that pool.
+        """
+        with self._lock:
+            if executor is not None and executor is not self._executor:
+                return      # already replaced
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            print(f"Render pool {'hung' if kill else 'broken'}; restarting it on the next render")
+            if kill:
+                for proc in list((getattr(executor, "_processes", None) or {}).values()):
+                    proc.terminate()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _render_inline(self, name, args, kwargs) -> str:
+        with self._inline_lock:
+            if self._inline_renderers is None:
+                self._inline_renderers = _renderers()
+            self.inline += 1
+            return self._inline_renderers[name](*args, **kwargs)
+
+    def _inline_future(self, name, args, kwargs) -> Future:
+        fut = Future()
+        try:
+            fut.set_result(self._render_inline(name, args, kwargs))
+        except Exception as e:
+            fut.set_exception(e)
+        fut.render_spec = (name, args, kwargs)
+        fut.render_pool = None
+        return fut
+
+    def submit(self, name: str, *args, **kwargs) -> Future:
+        """
+        Queue a render. Waits up to slot_timeout while max_inflight renders are already
+        running, then renders inline (the pool is saturated, e.g. by hung workers).
+        """
+        if self.workers <= 0:
+            return self._inline_future(name, args, kwargs)
+
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        acquired = self._slots.acquire(timeout=self.slot_timeout)
+        with self._lock:
+            self.waiting -= 1
+            if acquired:
+                self.in_flight += 1
+                self.submitted += 1
+        if not acquired:
+            print(f"Render pool saturated; rendering {name} inline")
+            return self._inline_future(name, args, kwargs)
+
+        t0 = time.perf_counter()
+        try:
+            executor = self._pool()
+            fut = executor.submit(_render, name, args, kwargs)
+        except BrokenProcessPool:
+            # Render this one inline; the pool is rebuilt on the next submit
+            self._finish(t0, ok=False)
+            self._reset_pool()
+            return self._inline_future(name, args, kwargs)
+        except Exception:
+            self._finish(t0, ok=False)
+            raise
+        fut.add_done_callback(lambda f: self._done(f, t0, executor))
+        fut.render_spec = (name, args, kwargs)
+        fut.render_pool = executor
+        return fut
+
+    def _done(self, fut: Future, t0: float, executor):
+        self._finish(t0, ok=not fut.cancelled() and fut.exception() is None)
+        if not fut.cancelled() and isinstance(fut.exception(), BrokenProcessPool):
+            self._reset_pool(executor)
+
+    def _finish(self, t0: float, ok: bool):
+        with self._lock:
+            self.in_flight -= 1
+            self.total_ms += (time.perf_counter() - t0) * 1000
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+        self._slots.release()
+
+    def result(self, fut: Future, timeout: float = RENDER_TIMEOUT_S) -> str:
+        """
+        Wait for a submitted render. If the pool died or the worker hangs past timeout,
+        the plot is rendered inline instead, so a request thread is never pinned. A hung
+        pool is recycled so its renders release their in-flight slots.
+        """
+        try:
+            return fut.result(timeout=timeout)
+        except (BrokenProcessPool, TimeoutError) as e:
+            name, args, kwargs = fut.render_spec
+            print(f"Render of {name} failed in the pool ({type(e).__name__}); rendering inline")
+            self._reset_pool(fut.render_pool, kill=isinstance(e, TimeoutError))
+            return self._render_inline(name, args, kwargs)
+
+    def render(self, name: str, *args, timeout: float = RENDER_TIMEOUT_S, **kwargs) -> str:
+        """Render synchronously; falls back to inline if the pool died (e.g. a worker was killed)."""
+        return self.result(self.submit(name, *args, **kwargs), timeout=timeout)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            done = self.completed + self.failed
+            return {
+                "workers": self.workers,
+                "max_inflight": self.max_inflight,
+                "in_flight": self.in_flight,
+                "queue_depth": self.waiting,
+                "max_queue_depth": self.max_waiting,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "inline": self.inline,
+                "avg_ms": round(self.total_ms / done, 1) if done else None,
+            }
+
+render_service = RenderService()
@@ -0,0 +1,265 @@
+"""
+Content-addressed cache for Gemini outputs (forecasts, briefs, dossiers, deep dives, deal memos).
+
+Two tiers behind one get/set API:
+- an in-memory LRU (AI_CACHE_MEMORY_ITEMS entries) answering repeat lookups without I/O;
+- a SQLite file capped at AI_CACHE_MAX_MB, evicting least-recently-used rows once full,
+  so entries survive restarts and are shared by every worker on the host.
+
+Every artifact kind has its own TTL; expired entries are misses and are dropped on read.
+If the database cannot be opened (read-only filesystem) the cache runs memory-only.
+
+The memory tier keeps the serialized JSON, so every get() returns a fresh copy and a
+caller mutating it cannot corrupt the entry. purge() bumps a generation counter in the
+database; other processes drop their memory tier when they see it change (checked at
+most every GENERATION_CHECK_S on reads).
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+AI_CACHE_PATH = os.getenv("AI_CACHE_PATH", os.path.join(BASE_DIR, "data", "store", "ai_cache.sqlite3"))
+AI_CACHE_MAX_MB = float(os.getenv("AI_CACHE_MAX_MB", "64"))
+AI_CACHE_MEMORY_ITEMS = int(os.getenv("AI_CACHE_MEMORY_ITEMS", "256"))
+
+# Seconds each artifact kind stays fresh
+AI_CACHE_TTL = {
+    "brief": 6 * 3600,
+    "deal_brief": 6 * 3600,
+    "dossier": 24 * 3600,
+    "deep_dive": 12 * 3600,
+    "deal_memo": 2 * 3600,
+    "forecast": 12 * 3600,
+}
+DEFAULT_TTL = 6 * 3600
+GENERATION_CHECK_S = 1.0
+
+class AICache:
+    def __init__(self, path: Optional[str] = AI_CACHE_PATH, max_bytes: int = int(AI_CACHE_MAX_MB * 1024 * 1024),
+                 memory_items: int = AI_CACHE_MEMORY_ITEMS, ttl: Dict[str, int] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.ttl = dict(AI_CACHE_TTL if ttl is None else ttl)
+        self._memory = OrderedDict()    # key -> (kind, expires_at, JSON text)
+        self._generation = None         # purge counter last seen in the database
+        self._generation_checked = 0.0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._disabled = path is None
+        # Metrics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.writes = 0
+        self.evictions = 0
+        self.by_kind: Dict[str, Dict[str, int]] = {}
+
+    # --- SQLite back end ---
+
+    def _db(self):
+        # One connection per process (the render pool forks after import)
+        if self._disabled:
+            return None
+        if self._conn is None or self._pid != os.getpid():
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS ai_cache ("
+                    "key TEXT PRIMARY KEY, kind TEXT, created_at REAL, expires_at REAL, "
+                    "last_access REAL, size INTEGER, value TEXT)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_cache_access ON ai_cache(last_access)")
+                conn.execute("CREATE TABLE IF NOT EXISTS ai_cache_meta (key TEXT PRIMARY KEY, value INTEGER)")
+                conn.commit()
+            except (sqlite3.Error, OSError) as e:
+                print(f"WARN: AI cache database unavailable ({e}); caching in memory only.")
+                self._disabled = True
+                return None
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _evict_disk(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ai_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Expired rows go first, then least recently used until 90% of the cap
+        now = time.time()
+        self.evictions += conn.execute("DELETE FROM ai_cache WHERE expires_at <= ?", (now,)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ai_cache").fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        for key, size in conn.execute("SELECT key, size FROM ai_cache ORDER BY last_access").fetchall():
+            if total <= target:
+                break
+            conn.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def _sync_generation(self, conn, now: float):
+        """Drop the memory tier if another process purged the database since the last check."""
+        if conn is None or now - self._generation_checked < GENERATION_CHECK_S:
+            return
+        self._generation_checked = now
+        row = conn.execute("SELECT value FROM ai_cache_meta WHERE key = 'generation'").fetchone()
+        generation = row[0] if row else 0
+        if self._generation is not None and generation != self._generation:
+            self._memory.clear()
+        self._generation = generation
+
+    # --- Memory front ---
+
+    def _remember(self, key: str, kind: str, expires_at: float, blob: str):
+        self._memory[key] = (kind, expires_at, blob)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _count(self, kind: str, outcome: str):
+        counts = self.by_kind.setdefault(kind, {"hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+    # --- Public API ---
+
+    def get(self, kind: str, key: str) -> Optional[Any]:
+        """Cached value for (kind, key), or None when absent or past its TTL."""
+        full_key = f"{kind}:{key}"
+        now = time.time()
+        with self._lock:
+            conn = self._db()
+            try:
+                self._sync_generation(conn, now)
+            except sqlite3.Error as e:
+                print(f"WARN: AI cache generation check failed: {e}")
+
+            entry = self._memory.get(full_key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(full_key)
+                    self.memory_hits += 1
+                    self._count(kind, "hits")
+                    return json.loads(entry[2])
+                del self._memory[full_key]
+
+            if conn is not None:
+                try:
+                    row = conn.execute("SELECT expires_at, value FROM ai_cache WHERE key = ?", (full_key,)).fetchone()
+                    if row is not None and row[0] > now:
+                        conn.execute("UPDATE ai_cache SET last_access = ? WHERE key = ?", (now, full_key))
+                        conn.commit()
+                        value = json.loads(row[1])
+                        self._remember(full_key, kind, row[0], row[1])
+                        self.disk_hits += 1
+                        self._count(kind, "hits")
+                        return value
+                    if row is not None:
+                        conn.execute("DELETE FROM ai_cache WHERE key = ?", (full_key,))
+                        conn.commit()
+                        self.expired += 1
+                except sqlite3.Error as e:
+                    print(f"WARN: AI cache read failed: {e}")
+
+            self.misses += 1
+            self._count(kind, "misses")
+            return None
+
+    def set(self, kind: str, key: str, value: Any, ttl: Optional[int] = None):
+        """Store a JSON-serialisable value under (kind, key) for ttl seconds (default: per kind)."""
+        full_key = f"{kind}:{key}"
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.ttl.get(kind, DEFAULT_TTL))
+        try:
+            blob = json.dumps(value)
+        except (TypeError, ValueError) as e:
+            # Not cached at all: memory and disk must hold the same entries
+            print(f"WARN: AI cache write failed: {e}")
+            return
+        with self._lock:
+            self._remember(full_key, kind, expires_at, blob)
+            self.writes += 1
+            conn = self._db()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ai_cache (key, kind, created_at, expires_at, last_access, size, value) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (full_key, kind, now, expires_at, now, len(blob), blob),
+                )
+                self._evict_disk(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"WARN: AI cache write failed: {e}")
+
+    def purge(self, kind: Optional[str] = None, expired_only: bool = False) -> int:
+        """
+        Drop entries (all, one kind, and/or only expired ones). Returns the number removed.
+        Other processes sharing the database clear their memory tier on their next read
+        (within GENERATION_CHECK_S).
+        """
+        now = time.time()
+        with self._lock:
+            doomed = [k for k, (k_kind, exp, _) in self._memory.items()
+                      if (kind is None or k_kind == kind) and (not expired_only or exp <= now)]
+            for k in doomed:
+                del self._memory[k]
+            removed = len(doomed)
+
+            conn = self._db()
+            if conn is not None:
+                clauses, params = [], []
+                if kind is not None:
+                    clauses.append("kind = ?")
+                    params.append(kind)
+                if expired_only:
+                    clauses.append("expires_at <= ?")
+                    params.append(now)
+                where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+                try:
+                    removed = max(removed, conn.execute(f"DELETE FROM ai_cache{where}", params).rowcount)
+                    if not expired_only:
+                        conn.execute("INSERT INTO ai_cache_meta (key, value) VALUES ('generation', 1) "
+                                     "ON CONFLICT(key) DO UPDATE SET value = value + 1")
+                        self._generation = conn.execute(
+                            "SELECT value FROM ai_cache_meta WHERE key = 'generation'").fetchone()[0]
+                    conn.commit()
+                except sqlite3.Error as e:
+                    print(f"WARN: AI cache purge failed: {e}")
+            return removed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            disk = {"entries": 0, "bytes": 0}
+            conn = self._db()
+            if conn is not None:
+                try:
+                    n, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ai_cache").fetchone()
+                    disk = {"entries": n, "bytes": size}
+                except sqlite3.Error:
+                    pass
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_capacity": self.memory_items,
+                "disk": {**disk, "max_bytes": self.max_bytes, "path": None if self._disabled else self.path},
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else None,
+                "by_kind": {k: dict(v) for k, v in self.by_kind.items()},
+                "ttl_seconds": dict(self.ttl),
+            }
+
+ai_cache = AICache()
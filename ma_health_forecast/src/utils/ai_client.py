@@ -1,7 +1,6 @@
 
-import os
-from google import genai
 from google.genai import types
+from src.utils.llm_gateway import llm_gateway
 from datetime import datetime
 import json
 
@@ -19,19 +18,14 @@ class MetricAIClient:
         return cls._instance
 
     def _initialize(self):
-        self.api_key = os.environ.get("GEMINI_API_KEY")
-        if not self.api_key:
+        if not llm_gateway.enabled:
             print("WARN: GEMINI_API_KEY not found. AI features disabled.")
             self.client = None
             return
 
-        try:
-            # New SDK Initialization
-            self.client = genai.Client(api_key=self.api_key)
-            print("AI Client initialized successfully (Gemini 3.0 Ready).")
-        except Exception as e:
-            print(f"Error initializing AI Client: {e}")
-            self.client = None
+        # Shared pooled client from the LLM gateway
+        self.client = llm_gateway.client
+        print("AI Client initialized successfully (Gemini 3.0 Ready).")
 
     def generate_content(self, prompt: str, mode: str = "batch", use_search: bool = False, json_mode: bool = False) -> str:
         """
@@ -54,10 +48,11 @@ class MetricAIClient:
             if use_search:
                 config_args["tools"] = [{"google_search": {}}]
 
-            response = self.client.models.generate_content(
-                model=target_model,
-                contents=prompt,
-                config=types.GenerateContentConfig(**config_args)
+            response, _ = llm_gateway.generate(
+                prompt,
+                config=types.GenerateContentConfig(**config_args),
+                models=[target_model],
+                label=f"MetricAI {mode}",
             )
             
             if not response.text:
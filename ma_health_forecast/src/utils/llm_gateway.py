@@ -0,0 +1,424 @@
+"""
+Shared gateway for every Gemini call in the app.
+
+- One google-genai Client per process (its httpx pool keeps connections warm)
+  instead of a new client per request / per model attempt.
+- A global limit on concurrent calls plus a bounded wait queue, so a burst of
+  dashboard users cannot pile unbounded work onto the API.
+- A circuit breaker per model: once a model fails (unknown model, quota, repeated
+  transport/API errors; not malformed answers or bad request arguments) it is skipped for a cool-down period, so a cascade only pays for a dead
+  model once instead of on every request.
+- Latency and error histograms per model, exposed via stats().
+- Estimated prompt size and end-to-end latency per caller label (prompt_budget.prompt_meter).
+"""
+import os
+import time
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+from src.utils.prompt_budget import estimate_tokens, prompt_meter
+
+# Model cascades, best first. Callers pick one by name or pass their own list.
+CASCADES = {
+    # Forecast / Deal Architect: best reasoning first
+    "pro": ['gemini-3-pro-preview', 'gemini-3-flash-preview', 'gemini-2.0-flash-exp', 'gemini-1.5-pro'],
+    # Briefs: fast first
+    "flash": ['gemini-3-flash-preview', 'gemini-2.0-flash-exp', 'gemini-1.5-pro'],
+    # Deep dive: "gemini 3.0 flash, nothing less"
+    "deep_dive": ['gemini-3-flash-preview', 'gemini-3-pro-preview', 'gemini-2.0-flash-exp'],
+}
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "16"))
+LLM_QUEUE_TIMEOUT_S = float(os.getenv("LLM_QUEUE_TIMEOUT_S", "120"))
+BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN_S = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "300"))
+# Point the SDK at another endpoint (e.g. scripts/gemini_standin.py) and bound each HTTP call
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "0"))
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+class GatewayBusy(RuntimeError):
+    """The wait queue is full (or the wait timed out); the call was not attempted."""
+
+class AllModelsUnavailable(RuntimeError):
+    """Every model in the cascade failed or has an open circuit."""
+
+def _error_key(e: Exception) -> str:
+    code = getattr(e, "code", None)
+    return f"{type(e).__name__}:{code}" if code else type(e).__name__
+
+def _is_model_unavailable(e: Exception) -> bool:
+    # Unknown / retired model or exhausted quota: retrying before the cool-down is pointless
+    code = getattr(e, "code", None)
+    if code in (403, 404, 429):
+        return True
+    msg = str(e)
+    return any(m in msg for m in ("NOT_FOUND", "RESOURCE_EXHAUSTED", "is not found"))
+
+def _is_request_error(e: Exception) -> bool:
+    # Bad argument / unsupported tool or config for this request: says nothing about the model's health
+    code = getattr(e, "code", None)
+    if code == 400:
+        return True
+    msg = str(e)
+    return any(m in msg for m in ("INVALID_ARGUMENT", "not supported"))
+
+def _record_error(breaker: "CircuitBreaker", e: Exception):
+    if _is_request_error(e):
+        breaker.abandon_trial()
+    else:
+        breaker.record_failure(hard=_is_model_unavailable(e))
+
+class CircuitBreaker:
+    """
+    closed -> open after `failures` consecutive errors (or one model-unavailable error);
+    open -> half_open once the cool-down has passed, letting a single trial call through;
+    the trial closes the circuit on success or re-opens it on failure.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, cooldown_s: float = BREAKER_COOLDOWN_S):
+        self.failures = failures
+        self.cooldown_s = cooldown_s
+        self.state = "closed"
+        self.consecutive = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._trial_running = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.time() - self.opened_at >= self.cooldown_s:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive = 0
+        self._trial_running = False
+
+    def abandon_trial(self):
+        # Caller went away mid-call (e.g. a closed stream): neither success nor failure
+        self._trial_running = False
+
+    def record_failure(self, hard: bool = False):
+        self.consecutive += 1
+        self._trial_running = False
+        if hard or self.state == "half_open" or self.consecutive >= self.failures:
+            if self.state != "open":
+                self.trips += 1
+            self.state = "open"
+            self.opened_at = time.time()
+
+class ModelStats:
+    def __init__(self):
+        self.calls = 0
+        self.ok = 0
+        self.skipped = 0
+        self.errors: Dict[str, int] = {}
+        self.latency = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.streams = 0
+        self.first_chunk_ms = 0.0
+        self.parse_errors = 0      # answered, but the caller's parse() rejected the answer
+
+    def observe(self, ms: float, error: Optional[Exception] = None):
+        self.calls += 1
+        self.total_ms += ms
+        i = next((i for i, b in enumerate(LATENCY_BUCKETS_MS) if ms <= b), len(LATENCY_BUCKETS_MS))
+        self.latency[i] += 1
+        if error is None:
+            self.ok += 1
+        else:
+            key = _error_key(error)
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def to_dict(self) -> Dict:
+        labels = [f"le_{b}" for b in LATENCY_BUCKETS_MS] + ["inf"]
+        return {
+            "calls": self.calls,
+            "ok": self.ok,
+            "skipped": self.skipped,
+            "errors": dict(self.errors),
+            "parse_errors": self.parse_errors,
+            "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else None,
+            "streams": self.streams,
+            "avg_first_chunk_ms": round(self.first_chunk_ms / self.streams, 1) if self.streams else None,
+            "latency_ms": dict(zip(labels, self.latency)),
+        }
+
+class LLMGateway:
+    def __init__(self, api_key: Optional[str] = None, client=None,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, max_queue: int = LLM_MAX_QUEUE,
+                 queue_timeout_s: float = LLM_QUEUE_TIMEOUT_S,
+                 breaker_failures: int = BREAKER_FAILURES, breaker_cooldown_s: float = BREAKER_COOLDOWN_S):
+        self.api_key = api_key if api_key is not None else os.getenv("GEMINI_API_KEY")
+        self._client = client
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown_s = breaker_cooldown_s
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._models: Dict[str, ModelStats] = {}
+        # Gateway-level metrics
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._client is not None or bool(self.api_key)
+
+    @property
+    def client(self):
+        """The shared google-genai Client, created on first use."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    if not self.api_key:
+                        raise ValueError("GEMINI_API_KEY not found in environment variables.")
+                    from google import genai
+                    from google.genai import types
+                    http_options = {}
+                    if GEMINI_BASE_URL:
+                        http_options["base_url"] = GEMINI_BASE_URL
+                    if LLM_TIMEOUT_S > 0:
+                        http_options["timeout"] = int(LLM_TIMEOUT_S * 1000)   # milliseconds
+                    self._client = genai.Client(
+                        api_key=self.api_key,
+                        http_options=types.HttpOptions(**http_options) if http_options else None,
+                    )
+        return self._client
+
+    def reset(self):
+        """Close every circuit and clear the metrics (admin / benchmarks); the client is kept."""
+        with self._lock:
+            self._breakers.clear()
+            self._models.clear()
+            self.max_waiting = 0
+            self.rejected = 0
+
+    def _breaker(self, model: str) -> CircuitBreaker:
+        if model not in self._breakers:
+            self._breakers[model] = CircuitBreaker(self.breaker_failures, self.breaker_cooldown_s)
+            self._models[model] = ModelStats()
+        return self._breakers[model]
+
+    def _acquire(self):
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise GatewayBusy(f"LLM queue full ({self.waiting} waiting)")
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        acquired = self._slots.acquire(timeout=self.queue_timeout_s)
+        with self._lock:
+            self.waiting -= 1
+            if not acquired:
+                self.rejected += 1
+                raise GatewayBusy(f"Timed out after {self.queue_timeout_s:.0f}s waiting for an LLM slot")
+            self.in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def _meter(self, label: str, tokens: int, t0: float, ok: bool):
+        ms = (time.perf_counter() - t0) * 1000
+        prompt_meter.record(label or "LLM", tokens, ms, ok)
+        print(f"> [{label or 'LLM'}] Prompt ~{tokens} tokens, {ms:.0f} ms{'' if ok else ' (failed)'}", flush=True)
+
+    def generate(self, contents, config=None, models: Union[str, List[str]] = "flash", label: str = "",
+                 parse: Optional[Callable] = None, fallback_config=None):
+        """
+        client.models.generate_content over a model cascade, skipping models whose
+        circuit is open. A malformed answer (`parse(response)` raises) falls through to
+        the next model like an API error does, but is counted as a parse error: the model
+        answered, so its circuit is not charged. Argument / unsupported-tool errors do
+        not count against the circuit either.
+        With fallback_config (e.g. the same config without Search tools), a model whose
+        call fails is retried once with it before the cascade moves on, unless the model
+        itself is unavailable.
+        Returns (parsed result or response, model_name); raises AllModelsUnavailable
+        when no model produced a usable response, GatewayBusy when the queue is full.
+        """
+        tokens, t0, ok = estimate_tokens(contents), time.perf_counter(), False
+        try:
+            result = self._generate(contents, config, models, label, parse, fallback_config)
+            ok = True
+            return result
+        finally:
+            self._meter(label, tokens, t0, ok)
+
+    @staticmethod
+    def _configs(config, fallback_config) -> list:
+        return [config] if fallback_config is None else [config, fallback_config]
+
+    @staticmethod
+    def _retry_with_fallback(attempt: int, configs: list, e: Exception) -> bool:
+        return attempt + 1 < len(configs) and not _is_model_unavailable(e)
+
+    def _generate(self, contents, config, models, label, parse, fallback_config=None):
+        cascade = CASCADES[models] if isinstance(models, str) else list(models)
+        configs = self._configs(config, fallback_config)
+        client = self.client
+        last_error = None
+        self._acquire()
+        try:
+            for model in cascade:
+                with self._lock:
+                    breaker = self._breaker(model)
+                    allowed = breaker.allow()
+                    if not allowed:
+                        self._models[model].skipped += 1
+                if not allowed:
+                    continue
+
+                for attempt, cfg in enumerate(configs):
+                    t0 = time.perf_counter()
+                    try:
+                        response = client.models.generate_content(model=model, contents=contents, config=cfg)
+                    except Exception as e:
+                        ms = (time.perf_counter() - t0) * 1000
+                        with self._lock:
+                            self._models[model].observe(ms, e)
+                            _record_error(breaker, e)
+                            state = breaker.state
+                        print(f"> WARNING: [{label or 'LLM'}] Model {model} failed ({state}): {e}", flush=True)
+                        last_error = e
+                        if self._retry_with_fallback(attempt, configs, e):
+                            print(f"> [{label or 'LLM'}] Retrying {model} with the fallback config...", flush=True)
+                            continue
+                        break
+
+                    ms = (time.perf_counter() - t0) * 1000
+                    with self._lock:
+                        self._models[model].observe(ms)
+                        breaker.record_success()
+                    if parse is None:
+                        return response, model
+                    try:
+                        return parse(response), model
+                    except Exception as e:
+                        with self._lock:
+                            self._models[model].parse_errors += 1
+                        print(f"> WARNING: [{label or 'LLM'}] Model {model} answer rejected: {e}", flush=True)
+                        last_error = e
+                        break
+        finally:
+            self._release()
+
+        if last_error is None:
+            raise AllModelsUnavailable(f"All models in cascade are cooling down: {cascade}")
+        raise AllModelsUnavailable(f"All AI models failed. Last error: {last_error}")
+
+    def stream(self, contents, config=None, models: Union[str, List[str]] = "flash", label: str = "",
+               fallback_config=None) -> Iterator[Tuple[str, str]]:
+        """
+        Streaming generate_content over the cascade; yields (model_name, text chunk).
+        A model that fails before its first chunk is retried with fallback_config (as in
+        generate), then falls through to the next one; once text has been yielded an
+        error propagates, since the caller has already forwarded partial output. The
+        concurrency slot is held until the stream ends or the consumer closes it.
+        """
+        tokens, t0, ok = estimate_tokens(contents), time.perf_counter(), False
+        try:
+            yield from self._stream(contents, config, models, label, fallback_config)
+            ok = True
+        finally:
+            self._meter(label, tokens, t0, ok)
+
+    def _stream(self, contents, config, models, label, fallback_config=None) -> Iterator[Tuple[str, str]]:
+        cascade = CASCADES[models] if isinstance(models, str) else list(models)
+        configs = self._configs(config, fallback_config)
+        client = self.client
+        last_error = None
+        self._acquire()
+        try:
+            for model in cascade:
+                with self._lock:
+                    breaker = self._breaker(model)
+                    allowed = breaker.allow()
+                    if not allowed:
+                        self._models[model].skipped += 1
+                if not allowed:
+                    continue
+
+                for attempt, cfg in enumerate(configs):
+                    t0 = time.perf_counter()
+                    started = False
+                    try:
+                        for chunk in client.models.generate_content_stream(model=model, contents=contents, config=cfg):
+                            text = chunk.text
+                            if not text:
+                                continue
+                            if not started:
+                                started = True
+                                with self._lock:
+                                    self._models[model].streams += 1
+                                    self._models[model].first_chunk_ms += (time.perf_counter() - t0) * 1000
+                            yield model, text
+                    except GeneratorExit:
+                        with self._lock:
+                            breaker.abandon_trial()
+                        raise
+                    except Exception as e:
+                        ms = (time.perf_counter() - t0) * 1000
+                        with self._lock:
+                            self._models[model].observe(ms, e)
+                            _record_error(breaker, e)
+                            state = breaker.state
+                        print(f"> WARNING: [{label or 'LLM'}] Model {model} stream failed ({state}): {e}", flush=True)
+                        if started:
+                            raise
+                        last_error = e
+                        if self._retry_with_fallback(attempt, configs, e):
+                            print(f"> [{label or 'LLM'}] Retrying {model} with the fallback config...", flush=True)
+                            continue
+                        break
+
+                    ms = (time.perf_counter() - t0) * 1000
+                    with self._lock:
+                        self._models[model].observe(ms)
+                        breaker.record_success()
+                    return
+        finally:
+            self._release()
+
+        if last_error is None:
+            raise AllModelsUnavailable(f"All models in cascade are cooling down: {cascade}")
+        raise AllModelsUnavailable(f"All AI models failed. Last error: {last_error}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            now = time.time()
+            models = {}
+            for name, breaker in self._breakers.items():
+                entry = self._models[name].to_dict()
+                entry["circuit"] = breaker.state
+                entry["trips"] = breaker.trips
+                if breaker.state == "open":
+                    entry["retry_in_s"] = round(max(0.0, breaker.cooldown_s - (now - breaker.opened_at)), 1)
+                models[name] = entry
+            return {
+                "enabled": self.enabled,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queue_depth": self.waiting,
+                "max_queue_depth": self.max_waiting,
+                "rejected": self.rejected,
+                "models": models,
+            }
+
+llm_gateway = LLMGateway()
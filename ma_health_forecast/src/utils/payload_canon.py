@@ -0,0 +1,170 @@
+"""
+Canonical payloads for AI cache keys.
+
+The brief, deal brief, dossier and deal memo caches are keyed by a SHA256 of the
+request payload. Hashing the raw payload turns noise into misses: a macro spread that
+moved in the 6th decimal, an avg SPI recomputed as 61.99999 instead of 62.0, or the same
+driver labels in a different order all give new keys and a fresh multi-second Gemini call for
+what is materially the same input. canonicalize() runs before hashing and, per service:
+
+- quantizes numbers: keys listed in "quantum" snap to that step (hy_spread to 0.05,
+  spi to 1), other floats keep "digits" significant digits; pre-formatted metric
+  strings under a quantum key ("1.23x") have their number snapped the same way;
+- sorts collections whose order carries no meaning ("unordered" keys): only label sets
+  such as drivers and tags. Ranked lists (top drivers, sellers, buyers, dossier items)
+  keep their order, since the prompt lists them in that order and fit_json trims
+  their tails;
+- drops volatile keys that do not change the answer: timestamps at any depth, plus
+  per-service dotted paths ("macro.date" is the macro row's as-of date, not every date).
+
+Only the cache key is canonical: prompts are still built from the raw payload.
+KeyMeter tracks, per service, how often a key repeats with and without canonicalization,
+so /api/admin/ai-cache shows the reuse it adds next to the cache's own hit rate.
+"""
+import re
+import json
+import math
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Keys dropped at any depth, for every service ("volatile" rules are paths instead)
+VOLATILE_KEYS = {"created_at", "updated_at", "fetched_at", "retrieved_at", "timestamp", "generated_at"}
+
+CANON_RULES: Dict[str, Dict] = {
+    "brief": {
+        "digits": 3,
+        "quantum": {"hy_spread": 0.05, "ig_spread": 0.05, "spread": 0.05, "vix": 0.5, "avg_spi": 0.5,
+                    "lbo_feasibility_index": 1, "spi": 1, "br": 1, "score": 1},
+        "unordered": {"drivers", "tags"},
+        "volatile": {"macro.date", "macro.as_of"},
+    },
+    "deal_brief": {
+        "digits": 3,
+        # financing is a financing_macro row (or its /api/v2/financing form, lbo_idx)
+        "quantum": {"hy_spread": 0.05, "ig_spread": 0.05, "lbo_feasibility_index": 1, "lbo_idx": 1,
+                    "spi": 1, "readiness": 1},
+        "unordered": {"drivers"},
+        "volatile": {"financing.date", "financing.as_of"},
+    },
+    "dossier": {
+        "digits": 3,
+        "quantum": {},
+        "unordered": {"tags"},
+        "volatile": set(),
+    },
+    "deal_memo": {
+        "digits": 3,
+        # cash_coverage is coverage_ratio pre-formatted by the deal physics ("1.23x")
+        "quantum": {"premium_pct": 1, "coverage_ratio": 0.1, "cash_coverage": 0.1, "pro_forma_leverage": 0.1,
+                    "probability_score": 1, "strategic_score": 1, "feasibility_score": 1, "tnx": 0.05},
+        "unordered": set(),
+        "volatile": set(),
+    },
+}
+DEFAULT_RULES = {"digits": 4, "quantum": {}, "unordered": set(), "volatile": set()}
+
+def rules(service: str) -> Dict:
+    return CANON_RULES.get(service, DEFAULT_RULES)
+
+def _quantize(value: float, quantum: Optional[float], digits: int):
+    if not math.isfinite(value):
+        return None
+    if quantum:
+        value = round(value / quantum) * quantum
+        # Strip float noise left by the step (0.15000000000000002)
+        return float(f"{value:.10g}")
+    if value == 0:
+        return 0.0
+    return float(f"{value:.{digits}g}")
+
+# "$2.1B", "1.23x", "45%": currency prefix, number, unit suffix
+_FORMATTED_NUMBER = re.compile(r"^(\$?)(-?\d+(?:\.\d+)?)([A-Za-z%]*)$")
+
+def _number(value: float, quantum: Optional[float], digits: int):
+    value = _quantize(value, quantum, digits)
+    # 62.0 and 62 must hash alike
+    return int(value) if value is not None and value.is_integer() else value
+
+def _canon(obj: Any, r: Dict, key: Optional[str] = None, path: str = "") -> Any:
+    if isinstance(obj, dict):
+        out = {}
+        for k, v in obj.items():
+            sub = f"{path}.{k}" if path else str(k)
+            if k not in VOLATILE_KEYS and sub not in r["volatile"]:
+                out[k] = _canon(v, r, k, sub)
+        return out
+    if isinstance(obj, (list, tuple)):
+        items = [_canon(v, r, None, path) for v in obj]
+        if key in r["unordered"]:
+            items.sort(key=lambda v: json.dumps(v, sort_keys=True, default=str))
+        return items
+    if isinstance(obj, bool):
+        return obj
+    if isinstance(obj, float) or (isinstance(obj, int) and key in r["quantum"]):
+        return _number(float(obj), r["quantum"].get(key), r["digits"])
+    if isinstance(obj, str) and key in r["quantum"]:
+        m = _FORMATTED_NUMBER.match(obj.strip())
+        if m:
+            return f"{m.group(1)}{_number(float(m.group(2)), r['quantum'][key], r['digits'])}{m.group(3)}"
+    return obj
+
+def canonicalize(payload: Any, service: str) -> Any:
+    """Copy of payload with the service's quantization, ordering and volatile-key rules applied."""
+    return _canon(payload, rules(service))
+
+def _sha256(obj: Any) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")).hexdigest()
+
+def canonical_hash(payload: Any, service: str, record: bool = True) -> str:
+    """SHA256 of the canonical payload (the AI cache key); recorded in key_meter unless record=False."""
+    key = _sha256(canonicalize(payload, service))
+    if record:
+        key_meter.record(service, _sha256(payload), key)
+    return key
+
+# --- Metrics ---
+
+class KeyMeter:
+    """
+    Per service: how often a cache key was seen before (within the last `window` keys),
+    for the raw payload hash and for the canonical one. The difference is the share of
+    lookups canonicalization turned from a guaranteed miss into a possible hit.
+    """
+
+    def __init__(self, window: int = 2048):
+        self.window = window
+        self._lock = threading.Lock()
+        self.services: Dict[str, Dict] = {}
+
+    def _seen(self, keys: OrderedDict, key: str) -> bool:
+        seen = key in keys
+        keys[key] = True
+        keys.move_to_end(key)
+        while len(keys) > self.window:
+            keys.popitem(last=False)
+        return seen
+
+    def record(self, service: str, raw_key: str, canonical_key: str):
+        with self._lock:
+            s = self.services.setdefault(service, {"lookups": 0, "raw_repeats": 0, "canonical_repeats": 0,
+                                                   "raw": OrderedDict(), "canonical": OrderedDict()})
+            s["lookups"] += 1
+            s["raw_repeats"] += self._seen(s["raw"], raw_key)
+            s["canonical_repeats"] += self._seen(s["canonical"], canonical_key)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            out = {}
+            for name, s in self.services.items():
+                n = s["lookups"]
+                out[name] = {
+                    "lookups": n,
+                    "raw_key_reuse": round(s["raw_repeats"] / n, 3) if n else None,
+                    "canonical_key_reuse": round(s["canonical_repeats"] / n, 3) if n else None,
+                    "merged_lookups": s["canonical_repeats"] - s["raw_repeats"],
+                }
+            return out
+
+key_meter = KeyMeter()
@@ -0,0 +1,199 @@
+"""
+Token budgets for the context embedded in Gemini prompts.
+
+Prompt size drives both latency and cost, and most of it is data pasted into the
+template: composite history, driver lists, dossier payloads, headlines. This module
+keeps that data small before it reaches a prompt:
+
+- compact_json: drops empty keys, rounds floats to 4 significant digits and uses
+  separators without whitespace (indent=2 roughly doubles the token count of a payload);
+- fit_json / fit_text: trims the payload until it fits a token budget, dropping the
+  tail of the longest list first (lists are ranked, most relevant first), then
+  shortening the longest strings;
+- summarize_series: long-run statistics plus the recent window instead of every month.
+
+Tokens are estimated locally (~4 characters per token for Gemini's tokenizer on
+English/JSON), so no API round-trip is needed to size a prompt. PromptMeter records
+the estimated size and latency of every gateway call per service.
+"""
+import json
+import math
+import threading
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+CHARS_PER_TOKEN = 4
+
+# Token budget for the context data of each prompt (the fixed instructions come on top)
+PROMPT_TOKEN_BUDGETS = {
+    "brief": 6000,
+    "deal_brief": 6000,
+    "dossier": 5000,
+    "radar_dossier": 1500,
+    "deal_memo": 1500,
+    "match": 1500,
+}
+DEFAULT_BUDGET = 4000
+
+# Recent months passed verbatim to the forecast prompt
+FORECAST_RECENT_MONTHS = 24
+
+def estimate_tokens(text: Any) -> int:
+    if not isinstance(text, str):
+        text = str(text)
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def budget(service: str) -> int:
+    return PROMPT_TOKEN_BUDGETS.get(service, DEFAULT_BUDGET)
+
+# --- Compaction ---
+
+def _round(value: float) -> float:
+    if not math.isfinite(value) or value == 0:
+        return value
+    return float(f"{value:.4g}")
+
+def compact(obj: Any) -> Any:
+    """Copy of obj without None/empty values and with floats rounded to 4 significant digits."""
+    if isinstance(obj, dict):
+        out = {}
+        for k, v in obj.items():
+            v = compact(v)
+            if v is None or v == "" or v == [] or v == {}:
+                continue
+            out[k] = v
+        return out
+    if isinstance(obj, (list, tuple)):
+        return [compact(v) for v in obj]
+    if isinstance(obj, float):
+        return _round(obj)
+    return obj
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+def compact_json(obj: Any) -> str:
+    return _dumps(compact(obj))
+
+def _longest(obj: Any, kind: type, path=()):
+    """(path, length) of the longest list (serialized) / str (raw characters) inside obj."""
+    best = (None, 0)
+    if isinstance(obj, kind) and (kind is str or len(obj) > 1):
+        best = (path, len(obj) if kind is str else len(_dumps(obj)))
+    children = obj.items() if isinstance(obj, dict) else enumerate(obj) if isinstance(obj, list) else ()
+    for k, v in children:
+        cand = _longest(v, kind, path + (k,))
+        if cand[0] is not None and cand[1] > best[1]:
+            best = cand
+    return best
+
+def _get(obj, path):
+    for k in path:
+        obj = obj[k]
+    return obj
+
+def _set(obj, path, value):
+    if not path:
+        return value
+    _get(obj, path[:-1])[path[-1]] = value
+    return obj
+
+def fit_json(obj: Any, max_tokens: int) -> str:
+    """compact_json(obj), trimmed until it fits max_tokens."""
+    obj = compact(obj)
+    text = _dumps(obj)
+    while estimate_tokens(text) > max_tokens:
+        excess = estimate_tokens(text) - max_tokens
+        path, size = _longest(obj, list)
+        if path is not None:
+            # Drop roughly the overflow from the tail, always at least one item
+            items = _get(obj, path)
+            keep = int(len(items) * (1 - excess / max(1, estimate_tokens("x" * size))))
+            obj = _set(obj, path, items[:max(1, min(len(items) - 1, keep))])
+        else:
+            path, size = _longest(obj, str)
+            if path is None or size <= 64:
+                break
+            s = _get(obj, path)
+            obj = _set(obj, path, s[:max(32, len(s) // 2)] + "…")
+        shorter = _dumps(obj)
+        if len(shorter) >= len(text):
+            break       # nothing left to trim (e.g. a string of escaped characters at the floor)
+        text = shorter
+    return text
+
+def fit_text(text: Optional[str], max_tokens: int) -> str:
+    """text cut to max_tokens (at a word boundary where possible)."""
+    text = text or ""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit].rsplit(" ", 1)[0]
+    return cut + " …"
+
+def summarize_series(series: pd.Series, recent: int = FORECAST_RECENT_MONTHS, digits: int = 1) -> Dict[str, str]:
+    """
+    Long monthly series -> {"summary": statistics + annual means, "recent": last `recent` months}.
+    The recent window keeps the "YYYY-MM: value" lines the prompts used before.
+    """
+    series = series.dropna()
+    def fmt_date(d):
+        return d.strftime("%Y-%m") if hasattr(d, "strftime") else str(d)[:7]
+
+    recent_part = series.iloc[-recent:]
+    lines = [f"{fmt_date(d)}: {v:.{digits}f}" for d, v in recent_part.items()]
+    if len(series) <= recent:
+        return {"summary": "", "recent": "\n".join(lines)}
+
+    stats = [
+        f"{fmt_date(series.index[0])} to {fmt_date(series.index[-1])} ({len(series)} months)",
+        f"mean {series.mean():.{digits}f}, std {series.std():.{digits}f}",
+        f"min {series.min():.{digits}f} ({fmt_date(series.idxmin())}), max {series.max():.{digits}f} ({fmt_date(series.idxmax())})",
+    ]
+    if len(series) > 12:
+        stats.append(f"12m change {series.iloc[-1] - series.iloc[-13]:+.{digits}f}")
+    older = series.iloc[:-recent]
+    if isinstance(older.index, pd.DatetimeIndex):
+        annual = older.groupby(older.index.year).mean()
+        stats.append("annual means " + ", ".join(f"{y}: {v:.{digits}f}" for y, v in annual.items()))
+    return {"summary": "; ".join(stats), "recent": "\n".join(lines)}
+
+# --- Metrics ---
+
+class PromptMeter:
+    """Estimated prompt tokens and call latency per service (gateway label)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.services: Dict[str, Dict[str, float]] = {}
+
+    def record(self, service: str, tokens: int, ms: float, ok: bool = True):
+        with self._lock:
+            s = self.services.setdefault(service, {"calls": 0, "errors": 0, "tokens": 0, "max_tokens": 0, "total_ms": 0.0})
+            s["calls"] += 1
+            s["errors"] += 0 if ok else 1
+            s["tokens"] += tokens
+            s["max_tokens"] = max(s["max_tokens"], tokens)
+            s["total_ms"] += ms
+
+    def totals(self, service: str) -> Dict[str, float]:
+        """Raw counters of one service (calls, errors, tokens, ...), for callers diffing a window."""
+        with self._lock:
+            return dict(self.services.get(service, {"calls": 0, "errors": 0, "tokens": 0, "max_tokens": 0, "total_ms": 0.0}))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            out = {}
+            for name, s in self.services.items():
+                n = s["calls"]
+                out[name] = {
+                    "calls": n,
+                    "errors": s["errors"],
+                    "avg_prompt_tokens": round(s["tokens"] / n) if n else None,
+                    "max_prompt_tokens": s["max_tokens"],
+                    "avg_ms": round(s["total_ms"] / n, 1) if n else None,
+                }
+            return out
+
+prompt_meter = PromptMeter()
@@ -0,0 +1,119 @@
+"""
+Keyed single-flight: concurrent callers asking for the same key share one computation.
+
+The first caller for a key runs the function; callers arriving while it is still in
+flight wait for that result (or exception) instead of repeating the work. Nothing is
+kept once the flight lands; caching stays with ai_cache and the data stores.
+
+Keys are namespaced by the caller ("brief:<sha>", "yf_profile:AAPL"); the part before
+the first ':' is the group the metrics are reported under.
+
+stream() is the variant for SSE generators: the first caller streams the events, callers
+arriving meanwhile get only the final (complete=True) event once it is produced.
+"""
+import threading
+from typing import Any, Callable, Dict, Iterator
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self.groups: Dict[str, Dict[str, int]] = {}
+
+    def _group(self, key: str) -> Dict[str, int]:
+        name = key.split(":", 1)[0]
+        if name not in self.groups:
+            self.groups[name] = {"calls": 0, "executions": 0, "shared": 0, "errors": 0}
+        return self.groups[name]
+
+    def _join(self, key: str):
+        """(flight, group, leader) for a caller of `key`."""
+        with self._lock:
+            group = self._group(key)
+            group["calls"] += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                group["shared"] += 1
+                return flight, group, False
+            flight = self._flights[key] = _Flight()
+            group["executions"] += 1
+            return flight, group, True
+
+    def _land(self, key: str, flight: _Flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.done.set()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """fn() for the first caller of `key`; concurrent callers get the same result."""
+        flight, group, leader = self._join(key)
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                group["errors"] += 1
+            raise
+        finally:
+            self._land(key, flight)
+        return flight.result
+
+    def stream(self, key: str, events: Callable[[], Iterator[Dict]]) -> Iterator[Dict]:
+        """
+        Events of events() for the first caller of `key`. Concurrent callers wait for the
+        leader's final event (complete=True) and get just that one; if the leader stops
+        before producing it (client went away, error), they stream events() themselves.
+        """
+        flight, group, leader = self._join(key)
+
+        if not leader:
+            flight.done.wait()
+            if flight.result is not None:
+                yield flight.result
+            else:
+                yield from events()
+            return
+
+        try:
+            for event in events():
+                if event.get("complete"):
+                    # Result is final (and cached by the service): release the waiters now
+                    flight.result = event
+                    self._land(key, flight)
+                yield event
+        except Exception:
+            with self._lock:
+                group["errors"] += 1
+            raise
+        finally:
+            self._land(key, flight)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            calls = sum(g["calls"] for g in self.groups.values())
+            shared = sum(g["shared"] for g in self.groups.values())
+            return {
+                "in_flight": len(self._flights),
+                "calls": calls,
+                "saved": shared,
+                "saved_pct": round(100.0 * shared / calls, 1) if calls else None,
+                "groups": {k: dict(v) for k, v in self.groups.items()},
+            }
+
+single_flight = SingleFlight()
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModels:
+    """
+    Stand-in for the genai client.models, shared by the LLM tests.
+
+    `answer` decides each call's outcome: a callable (model, contents, config), or a dict
+    keyed by (model, config) or model (missing -> "ok"). An outcome is the reply text, a
+    list of chunk texts (streams; joined for generate_content), or an Exception, which is
+    raised; a list item that is an Exception is raised mid-stream. "ok" echoes
+    "<model>:<contents>". Every attempt is recorded, thread-safely, in `calls` (model
+    names) and `prompts` (contents).
+    """
+
+    def __init__(self, answer=None):
+        self.behaviour = answer if isinstance(answer, dict) else {}
+        self.answer = answer if callable(answer) else None
+        self.calls = []
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def _outcome(self, model, contents, config):
+        with self._lock:
+            self.calls.append(model)
+            self.prompts.append(contents)
+        if self.answer is not None:
+            outcome = self.answer(model, contents, config)
+        else:
+            outcome = self.behaviour.get((model, config), self.behaviour.get(model, "ok"))
+        if isinstance(outcome, Exception):
+            raise outcome
+        if outcome == "ok":
+            return [f"{model}:", contents]
+        return outcome
+
+    def generate_content(self, model, contents, config=None):
+        outcome = self._outcome(model, contents, config)
+        return FakeResponse("".join(outcome) if isinstance(outcome, list) else outcome)
+
+    def generate_content_stream(self, model, contents, config=None):
+        outcome = self._outcome(model, contents, config)
+        for part in outcome if isinstance(outcome, list) else [outcome]:
+            if isinstance(part, Exception):
+                raise part
+            yield FakeResponse(part)
+
+
+class FakeClient:
+    def __init__(self, answer=None):
+        self.models = FakeModels(answer)
+
+
+@pytest.fixture
+def fake_client():
+    """Factory for a fake genai client: fake_client(answer) -> client with .models (see FakeModels)."""
+    return FakeClient
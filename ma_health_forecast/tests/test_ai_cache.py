@@ -0,0 +1,95 @@
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+import time
+from src.utils.ai_cache import AICache
+
+
+def test_memory_then_disk_hits_and_restart(tmp_path):
+    path = str(tmp_path / "ai_cache.sqlite3")
+    cache = AICache(path, memory_items=2)
+    cache.set("brief", "abc", {"brief": {"headline": "x"}})
+
+    assert cache.get("brief", "abc") == {"brief": {"headline": "x"}}
+    assert cache.get("dossier", "abc") is None          # kinds do not collide
+    assert cache.stats()["memory_hits"] == 1
+
+    # A fresh process (empty memory front) is served from SQLite
+    reopened = AICache(path, memory_items=2)
+    assert reopened.get("brief", "abc") == {"brief": {"headline": "x"}}
+    stats = reopened.stats()
+    assert stats["disk_hits"] == 1 and stats["disk"]["entries"] == 1
+
+
+def test_ttl_expiry(tmp_path):
+    cache = AICache(str(tmp_path / "c.sqlite3"), ttl={"deal_memo": 0})
+    cache.set("deal_memo", "k", {"html": "<b>memo</b>"})
+    time.sleep(0.01)
+    assert cache.get("deal_memo", "k") is None
+    assert cache.stats()["expired"] == 1 and cache.stats()["disk"]["entries"] == 0
+
+    cache.set("deal_memo", "k2", "fresh", ttl=60)        # explicit TTL overrides the kind default
+    assert cache.get("deal_memo", "k2") == "fresh"
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    blob = "x" * 400
+    cache = AICache(str(tmp_path / "c.sqlite3"), max_bytes=1000, memory_items=0)
+    cache.set("dossier", "a", blob)
+    cache.set("dossier", "b", blob)
+    assert cache.get("dossier", "a") == blob             # touch a: b is now least recent
+    cache.set("dossier", "c", blob)
+
+    assert cache.get("dossier", "b") is None
+    assert cache.get("dossier", "a") == blob and cache.get("dossier", "c") == blob
+    assert cache.stats()["evictions"] == 1 and cache.stats()["disk"]["bytes"] <= 1000
+
+
+def test_purge_by_kind(tmp_path):
+    cache = AICache(str(tmp_path / "c.sqlite3"))
+    cache.set("brief", "a", 1)
+    cache.set("dossier", "b", 2)
+    assert cache.purge(kind="brief") == 1
+    assert cache.get("brief", "a") is None and cache.get("dossier", "b") == 2
+    assert cache.purge() == 1
+    assert cache.stats()["disk"]["entries"] == 0
+
+
+def test_memory_only_when_disabled():
+    cache = AICache(None)
+    cache.set("brief", "a", {"ok": True})
+    assert cache.get("brief", "a") == {"ok": True}
+    assert cache.stats()["disk"]["path"] is None
+
+
+def test_callers_get_copies(tmp_path):
+    cache = AICache(str(tmp_path / "c.sqlite3"))
+    entry = {"brief": {"headline": "x", "takeaways": ["a"]}}
+    cache.set("brief", "a", entry)
+    entry["brief"]["headline"] = "changed after set"
+
+    hit = cache.get("brief", "a")
+    hit["brief"]["takeaways"].append("changed after get")
+    assert cache.get("brief", "a") == {"brief": {"headline": "x", "takeaways": ["a"]}}
+
+
+def test_unserializable_value_is_not_cached(tmp_path):
+    cache = AICache(str(tmp_path / "c.sqlite3"))
+    cache.set("brief", "a", {"when": object()})
+    assert cache.get("brief", "a") is None
+    assert cache.stats()["memory_entries"] == 0 and cache.stats()["writes"] == 0
+
+
+def test_purge_reaches_other_processes_memory(tmp_path, monkeypatch):
+    from src.utils import ai_cache as ai_cache_mod
+    monkeypatch.setattr(ai_cache_mod, "GENERATION_CHECK_S", 0.0)
+    path = str(tmp_path / "c.sqlite3")
+    worker_a, worker_b = AICache(path), AICache(path)
+    worker_a.set("brief", "a", {"ok": True})
+    assert worker_b.get("brief", "a") == {"ok": True}       # now in b's memory tier
+
+    assert worker_a.purge(kind="brief") == 1
+    assert worker_b.get("brief", "a") is None
@@ -0,0 +1,58 @@
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.analysis import gemini_deep_dive
+from src.utils.ai_cache import AICache
+from src.utils.llm_gateway import LLMGateway
+
+
+def _chunks(chunks, fail_with_tools=False):
+    def answer(model, contents, config):
+        if fail_with_tools and config.tools:
+            return RuntimeError("search tool not enabled")
+        return chunks
+    return answer
+
+
+def _patch(monkeypatch, client):
+    monkeypatch.setattr(gemini_deep_dive, "llm_gateway", LLMGateway(client=client))
+    cache = AICache(None)
+    monkeypatch.setattr(gemini_deep_dive, "ai_cache", cache)
+    return cache
+
+
+def test_deep_dive_stream_chunks_then_cached_html(monkeypatch, fake_client):
+    client = fake_client(_chunks(["```html\n<h3>ACME</h3>", "<p>Buy.</p>\n```"], fail_with_tools=True))
+    cache = _patch(monkeypatch, client)
+    context = {"name": "Acme", "sector": "Tech"}
+
+    events = list(gemini_deep_dive.analyze_company_stream("ACME", "radar_target", context))
+    chunks = [e["chunk"] for e in events if "chunk" in e]
+    assert chunks == ["```html\n<h3>ACME</h3>", "<p>Buy.</p>\n```"]
+    assert events[-1]["complete"] and events[-1]["html"] == "<h3>ACME</h3><p>Buy.</p>"
+    assert len(client.models.calls) == 2     # search tools failed on the first model, which then answered without them
+
+    # The assembled HTML is what the blocking endpoint now serves from cache
+    key = gemini_deep_dive._deep_dive_key("ACME", "radar_target", context)
+    assert cache.get("deep_dive", key) == "<h3>ACME</h3><p>Buy.</p>"
+    replay = list(gemini_deep_dive.analyze_company_stream("ACME", "radar_target", context))
+    assert len(replay) == 1 and replay[0]["cached"] and len(client.models.calls) == 2
+    assert gemini_deep_dive.analyze_company("ACME", "radar_target", context) == "<h3>ACME</h3><p>Buy.</p>"
+
+
+def test_deep_dive_empty_stream_is_not_cached(monkeypatch, fake_client):
+    client = fake_client(_chunks(["", "```html\n```"]))
+    cache = _patch(monkeypatch, client)
+    context = {"name": "Acme", "sector": "Tech"}
+
+    events = list(gemini_deep_dive.analyze_company_stream("ACME", "radar_target", context))
+    assert events[-1]["complete"] and events[-1]["status"] == "Failed"
+    assert "Empty response" in events[-1]["html"]
+    assert cache.get("deep_dive", gemini_deep_dive._deep_dive_key("ACME", "radar_target", context)) is None
+
+    # The next request asks the model again instead of replaying a blank analysis
+    list(gemini_deep_dive.analyze_company_stream("ACME", "radar_target", context))
+    assert len(client.models.calls) == 2
@@ -0,0 +1,80 @@
+import sys
+import os
+import json
+
+import pytest
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+os.environ.setdefault("FRED_API_KEY", "offline")
+os.environ.setdefault("RENDER_WORKERS", "0")
+
+import app as app_module
+
+
+def _strict_json(resp):
+    """Parse like a browser: bare NaN / Infinity tokens are invalid JSON."""
+    def reject(token):
+        raise ValueError(f"invalid JSON constant {token}")
+    return json.loads(resp.get_data(as_text=True), parse_constant=reject)
+
+
+@pytest.fixture(scope="module")
+def client():
+    if app_module.get_cached_snapshot() is None:
+        pytest.skip("no index snapshot on disk")
+    return app_module.app.test_client()
+
+
+def test_update_forecast_with_non_finite_shocks_is_valid_json(client):
+    for shocks in ({"rate_change": "nan"}, {"rate_change": "inf", "confidence_shock": "-inf"}):
+        resp = client.post("/api/update_forecast", json=shocks)
+        assert resp.status_code == 200
+        series = _strict_json(resp)["series"]
+        assert series["scenario"] == series["baseline"]
+
+
+def test_deep_dive_stream_without_json_body(client):
+    for kwargs in ({}, {"data": "not json", "content_type": "text/plain"}):
+        resp = client.post("/api/v2/deep-dive/stream", **kwargs)
+        assert resp.status_code == 200 and _strict_json(resp) == {"error": "No ticker provided"}
+
+
+@pytest.mark.parametrize("path", ["/api/v2/index/series?columns=Composite", "/api/v2/forecast/series?history=12"])
+def test_series_etag_round_trip(client, path):
+    first = client.get(path)
+    assert first.status_code == 200 and first.headers["ETag"]
+    _strict_json(first)
+
+    again = client.get(path, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.get_data() == b""
+    # Different args, different representation
+    assert client.get(path + "&x=1").headers["ETag"] != first.headers["ETag"]
+
+
+@pytest.mark.parametrize("query", ["start=garbage", "end=2015-13", "max_points=2", "max_points=0"])
+def test_index_series_rejects_bad_args(client, query):
+    resp = client.get("/api/v2/index/series?" + query)
+    assert resp.status_code == 400 and "error" in _strict_json(resp)
+
+
+def test_index_series_downsamples_and_clamps_history(client):
+    data = _strict_json(client.get("/api/v2/index/series?max_points=3&columns=Composite"))
+    assert data["points"] == 3 and data["downsampled"] is True
+    for history in ("0", "-5"):
+        data = _strict_json(client.get("/api/v2/forecast/series?history=" + history))
+        assert len(data["history"]["dates"]) == 1
+
+
+@pytest.mark.parametrize("body", [[1, 2, 3], "shocks", {"grid": [1, 2]}, {"grid": {"rate_change": {"a": 1}}},
+                                  {"shocks": "abc"}, {"shocks": [[1, 2]]}, {"shocks": [["x", 0, 0, 0]]}])
+def test_scenarios_batch_rejects_malformed_bodies(client, body):
+    resp = client.post("/api/scenarios/batch", json=body)
+    assert resp.status_code == 400 and _strict_json(resp)["error"].startswith("Invalid shocks")
+
+
+def test_scenarios_batch_rejects_oversized_grid(client):
+    axis = list(range(1000))
+    resp = client.post("/api/scenarios/batch", json={"grid": {"rate_change": axis, "confidence_shock": axis}})
+    assert resp.status_code == 400 and "Too many scenarios" in _strict_json(resp)["error"]
@@ -0,0 +1,85 @@
+import sys
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.api import VAR
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.forecast import backtest as bt
+from src.forecast.var_forecast import forecast_with_var as real_forecast
+
+
+def synthetic_buckets(n=180):
+    rng = np.random.default_rng(5)
+    x = np.zeros((n, 3))
+    for t in range(2, n):
+        x[t] = 0.5 * x[t - 1] - 0.2 * x[t - 2] + rng.normal(scale=0.3, size=3)
+    return pd.DataFrame(x, columns=["BKT_a", "BKT_b", "BKT_c"], index=pd.date_range("2005-01-31", periods=n, freq="ME"))
+
+
+def test_origin_matches_statsmodels():
+    df = synthetic_buckets()
+    bt._init_worker(df)
+    origin = 150
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = VAR(df.iloc[:origin])
+        p = model.select_order(maxlags=12).aic
+        expected = model.fit(p).forecast(df.values[origin - p:origin], steps=12).sum(axis=1)
+        record = bt.evaluate_origin(origin)
+
+    assert record["lag_order"] == p
+    np.testing.assert_allclose(np.array(record["composite_err"]) + df.values[origin:origin + 12].sum(axis=1),
+                               expected, atol=1e-10)
+
+
+def test_origin_runs_forecast_with_var(monkeypatch):
+    df = synthetic_buckets()
+    calls = []
+    real = bt.forecast_with_var
+
+    def spy(bucket_scores, steps=12):
+        calls.append((bucket_scores.index[-1], steps))
+        return real(bucket_scores, steps)
+
+    monkeypatch.setattr(bt, "forecast_with_var", spy)
+    bt._init_worker(df, "statsmodels")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        record = bt.evaluate_origin(175)
+    assert calls == [(df.index[174], 5)] and record["steps"] == 5
+
+
+def test_native_origins_share_one_design(monkeypatch):
+    df = synthetic_buckets()
+    monkeypatch.setenv("VAR_ENGINE", "native")
+    built = []
+    real = bt.lagged_design
+    monkeypatch.setattr(bt, "lagged_design", lambda y, maxlags: built.append(len(y)) or real(y, maxlags))
+    monkeypatch.setattr(bt, "forecast_with_var", None)     # never refit through the full path
+
+    per_origin, _, _ = bt.run_backtest(df, start="2015-01", workers=1)
+    assert built == [len(df)] and len(per_origin) == len(df.loc["2015-01":])
+
+    # Same numbers as forecast_with_var with the native engine on the truncated scores
+    for origin in (60, 150, 175):
+        record = bt.evaluate_origin(origin)
+        fc_df, results = real_forecast(df.iloc[:origin], record["steps"])
+        assert record["lag_order"] == results.k_ar
+        np.testing.assert_allclose(np.array(record["composite_err"]) + df.values[origin:origin + record["steps"]].sum(axis=1),
+                                   fc_df["Composite_Index"].values, atol=1e-10)
+
+
+def test_run_backtest_pool_matches_inline():
+    df = synthetic_buckets()
+    inline, summary, _ = bt.run_backtest(df, start="2015-01", workers=1)
+    pooled, _, _ = bt.run_backtest(df, start="2015-01", workers=2)
+
+    assert len(inline) == len(df.loc["2015-01":])
+    pd.testing.assert_frame_equal(inline.drop(columns="fit_ms"), pooled.drop(columns="fit_ms"))
+    assert list(summary.index) == list(range(1, 13))
+    assert (summary["n"].diff().dropna() <= 0).all()
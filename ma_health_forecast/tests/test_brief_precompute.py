@@ -0,0 +1,142 @@
+import sys
+import os
+import json
+import sqlite3
+
+import pytest
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.analysis import gemini_brief, brief_precompute
+from src.analysis.gemini_brief import GeminiBriefService
+from src.data.brief_inputs import build_market_map
+from src.data.schema import get_schema
+from src.utils.ai_cache import AICache
+from src.utils.llm_gateway import LLMGateway
+
+
+def _brief_answer(fail=()):
+    """JSON answer for every brief prompt; fails prompts mentioning one of `fail`."""
+    def answer(model, contents, config):
+        if any(f in contents for f in fail):
+            return RuntimeError("500 internal")
+        return json.dumps({"executive_takeaways": ["ok"], "headline": "Offline brief"})
+    return answer
+
+
+class _Universe:
+    def get_available_sectors(self):
+        return ["Technology", "Energy"]
+
+    def get_industry_heatmap(self, sector):
+        return {"Tech": [{"name": "Software"}, {"name": "Semiconductors"}], "Energy": [{"name": "Oil & Gas"}]}[sector]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "ma_health.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(get_schema())
+    conn.execute("CREATE TABLE IF NOT EXISTS financing_macro (date TEXT, hy_spread REAL, ig_spread REAL)")
+    conn.execute("INSERT INTO financing_macro VALUES ('2026-01-31', 3.4, 1.1)")
+    for ticker, sector, spi, br in [("ADBE", "Technology", 62, 40), ("MSFT", "Technology", 10, 85),
+                                    ("XOM", "Energy", 30, 70)]:
+        conn.execute("INSERT INTO companies (ticker, company_name, sector, sub_sector, market_cap) VALUES (?, ?, ?, ?, ?)",
+                     (ticker, ticker.title(), sector, "Other", 1e11))
+        conn.execute("INSERT INTO scores (ticker, spi, buyer_readiness, capacity) VALUES (?, ?, ?, ?)",
+                     (ticker, spi, br, 5e9))
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def service(monkeypatch):
+    cache = AICache(path=None)
+    monkeypatch.setattr(gemini_brief, "ai_cache", cache)
+    monkeypatch.setattr(brief_precompute, "ai_cache", cache)
+
+    def make(client):
+        monkeypatch.setattr(gemini_brief, "llm_gateway", LLMGateway(client=client))
+        return GeminiBriefService()
+    return make
+
+
+def _run(db_path, service, **kwargs):
+    return brief_precompute.run_precompute(db_path=db_path, universe=_Universe(), service=service,
+                                           calls_per_min=0, **kwargs)
+
+
+def _run_log(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT run_id, status, counts_json, error_json, ended_at FROM run_log").fetchall()
+    conn.close()
+    return rows
+
+
+def test_precompute_warms_every_brief_and_records_run(db_path, service, fake_client):
+    client = fake_client(_brief_answer())
+    summary = _run(db_path, service(client))
+
+    # Tech: All + 2 sub-industries + deal brief; Energy: All + 1 + deal brief
+    assert summary["status"] == "success"
+    assert summary["counts"]["generated"] == 7 and summary["counts"]["failed"] == 0
+    assert len(client.models.calls) == 7 and summary["counts"]["gemini_calls"] == 7
+    assert summary["counts"]["prompt_tokens_est"] > 0
+
+    (run_id, status, counts, errors, ended_at), = _run_log(db_path)
+    assert run_id == summary["run_id"] and status == "success" and ended_at
+    assert json.loads(counts)["done"] == 7 and json.loads(errors) == []
+
+    # The next run finds everything in the cache and makes no calls
+    again = _run(db_path, service(client))
+    assert again["counts"]["planned"] == 0 and again["counts"]["already_warm"] == 7
+    assert len(client.models.calls) == 7
+
+
+def test_precompute_entries_are_the_ones_the_endpoint_reads(db_path, service, fake_client):
+    svc = service(fake_client(_brief_answer()))
+    _run(db_path, svc)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    context = brief_precompute.industry_brief_context(conn, "Tech")
+    conn.close()
+    assert svc.generate_brief("Tech", "Software", context)["cached"] is True
+
+
+def test_precompute_records_failures_as_partial(db_path, service, fake_client):
+    summary = _run(db_path, service(fake_client(_brief_answer(fail=["Oil & Gas"]))))
+    assert summary["status"] == "partial"
+    assert summary["counts"]["failed"] == 1 and summary["counts"]["generated"] == 6
+    (_, status, _, errors, _), = _run_log(db_path)
+    assert status == "partial"
+    assert [e["task"] for e in json.loads(errors)] == ["brief:Energy/Oil & Gas"]
+
+
+def test_market_map_is_deterministic(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    first, second = build_market_map(conn, "Tech"), build_market_map(conn, "Tech")
+    conn.close()
+    assert first == second and first["sellers"]
+
+
+def test_planning_failure_is_recorded(db_path, service, fake_client):
+    class _BrokenUniverse:
+        def get_available_sectors(self):
+            raise RuntimeError("universe store missing")
+
+    summary = brief_precompute.run_precompute(db_path=db_path, universe=_BrokenUniverse(), service=service(fake_client(_brief_answer())))
+    assert summary["status"] == "failed"
+    (_, status, _, errors, ended_at), = _run_log(db_path)
+    assert status == "failed" and ended_at
+    assert json.loads(errors) == [{"task": "plan", "error": "universe store missing"}]
+
+
+def test_background_lock_released_when_run_log_cannot_open(tmp_path):
+    bad_path = str(tmp_path / "missing_dir" / "ma_health.db")
+    for _ in range(2):
+        with pytest.raises(sqlite3.OperationalError):
+            brief_precompute.start_background(db_path=bad_path)
+    assert not brief_precompute._background_lock.locked()
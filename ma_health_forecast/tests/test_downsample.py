@@ -0,0 +1,25 @@
+import sys
+import os
+import numpy as np
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.plotting.downsample import lttb_indices
+
+
+def test_keeps_endpoints_and_extremes():
+    x = np.arange(500, dtype=float)
+    y = np.sin(x / 40.0)
+    y[123] = 5.0   # a spike must survive downsampling
+    idx = lttb_indices(x, y, 50)
+
+    assert len(idx) == 50
+    assert idx[0] == 0 and idx[-1] == 499
+    assert np.all(np.diff(idx) > 0)
+    assert 123 in idx
+
+
+def test_no_downsampling_when_short():
+    x = np.arange(10, dtype=float)
+    assert np.array_equal(lttb_indices(x, x, 50), np.arange(10))
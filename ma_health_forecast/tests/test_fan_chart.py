@@ -0,0 +1,65 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.api import VAR
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.forecast.var_forecast import simulate_var_paths, fan_chart
+from src.forecast.native_var import NativeVAR
+from src.features.normalize import RollingMinMaxScaler
+
+
+def fitted_var():
+    rng = np.random.default_rng(1)
+    x = np.zeros((240, 3))
+    for t in range(1, 240):
+        x[t] = 0.6 * x[t - 1] + rng.normal(scale=0.5, size=3)
+    df = pd.DataFrame(x, columns=["BKT_a", "BKT_b", "BKT_c"], index=pd.date_range("2000-01-31", periods=240, freq="ME"))
+    return df, VAR(df).fit(2)
+
+
+def test_paths_center_on_point_forecast():
+    df, var_results = fitted_var()
+    paths = simulate_var_paths(var_results, df.values, steps=12, n_paths=20000, seed=0)
+    point = var_results.forecast(df.values[-2:], steps=12)
+
+    assert paths.shape == (20000, 12, 3)
+    # Centered residuals: the bootstrap mean converges on the deterministic forecast
+    np.testing.assert_allclose(paths.mean(axis=0), point, atol=0.05)
+
+
+def test_zero_lag_order_is_intercept_plus_noise():
+    df, _ = fitted_var()
+    for var_results in (VAR(df).fit(0), NativeVAR(df).fit(0)):
+        paths = simulate_var_paths(var_results, df.values, steps=12, n_paths=20000, seed=0)
+        assert paths.shape == (20000, 12, 3)
+        np.testing.assert_allclose(paths.mean(axis=0), np.tile(var_results.intercept, (12, 1)), atol=0.05)
+
+    scaler = RollingMinMaxScaler.fit(df.sum(axis=1), 120)
+    fan = fan_chart(NativeVAR(df).fit(0), df, scaler, steps=12, n_paths=500, seed=7)
+    assert fan.notna().all().all()
+
+
+def test_fan_is_reproducible_and_ordered():
+    df, var_results = fitted_var()
+    scaler = RollingMinMaxScaler.fit(df.sum(axis=1), 120)
+
+    fan = fan_chart(var_results, df, scaler, steps=12, n_paths=500, seed=7)
+    again = fan_chart(var_results, df, scaler, steps=12, n_paths=500, seed=7)
+
+    pd.testing.assert_frame_equal(fan, again)
+    assert (fan["lower80"] <= fan["lower50"]).all() and (fan["upper50"] <= fan["upper80"]).all()
+    # Uncertainty widens with the horizon
+    assert (fan["upper80"] - fan["lower80"]).iloc[-1] > (fan["upper80"] - fan["lower80"]).iloc[0]
+
+
+def test_project_paths_matches_project():
+    df, _ = fitted_var()
+    scaler = RollingMinMaxScaler.fit(df.sum(axis=1), 120)
+    paths = np.random.default_rng(3).normal(scale=2.0, size=(50, 12))
+
+    expected = np.array([scaler.project(row) for row in paths])
+    assert np.array_equal(scaler.project_paths(paths), expected)
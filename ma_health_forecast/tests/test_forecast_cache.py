@@ -0,0 +1,87 @@
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+import time
+import threading
+import pandas as pd
+from src.forecast import llm_forecast
+from src.utils.ai_cache import AICache
+from src.utils.single_flight import SingleFlight
+
+
+def _wait_until(condition, timeout=5.0):
+    """Poll until condition() holds; fail instead of hanging the suite."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for concurrent callers"
+        time.sleep(0.001)
+
+
+def _history():
+    idx = pd.date_range("2023-01-31", periods=24, freq="ME")
+    return pd.Series([50.0 + i * 0.5 for i in range(24)], index=idx, name="Composite")
+
+
+def _fake_forecast(calls, gate=None, rationale="<p>Rates down, deals up.</p>"):
+    def fake(history, steps=12, rate_shock=0, confidence_shock=0, volatility_shock=0):
+        calls.append((rate_shock, confidence_shock, volatility_shock))
+        if gate is not None:
+            gate.wait(5)
+        dates = pd.date_range(start=history.index[-1], periods=steps + 1, freq="ME")[1:]
+        base = float(history.iloc[-1]) - rate_shock / 10
+        return pd.DataFrame({"forecast": [base] * steps, "lower80": [base - 5] * steps,
+                             "upper80": [base + 5] * steps}, index=dates), rationale
+    return fake
+
+
+def test_forecast_and_narrative_share_one_call(monkeypatch):
+    calls, gate = [], threading.Event()
+    monkeypatch.setattr(llm_forecast, "gemini_forecast", _fake_forecast(calls, gate))
+    monkeypatch.setattr(llm_forecast, "ai_cache", AICache(None))
+    monkeypatch.setattr(llm_forecast, "single_flight", SingleFlight())
+    history = _history()
+
+    # update_forecast and narrative arrive together: the second waits on the first
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(llm_forecast.cached_gemini_forecast(history, 12, -50, 0, 0)))
+               for _ in range(2)]
+    for t in threads:
+        t.start()
+    _wait_until(lambda: llm_forecast.single_flight.stats()["groups"].get("gemini_forecast", {}).get("calls") == 2)
+    gate.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert llm_forecast.single_flight.stats()["groups"]["gemini_forecast"]["shared"] == 1
+    (fc_a, why_a), (fc_b, why_b) = out
+    pd.testing.assert_frame_equal(fc_a, fc_b)
+    assert why_a == why_b == "<p>Rates down, deals up.</p>"
+
+    # Later requests come from the cache with the same frame; other shocks miss
+    fc_c, _ = llm_forecast.cached_gemini_forecast(history, 12, -50, 0, 0)
+    pd.testing.assert_frame_equal(fc_c, fc_a, check_freq=False)
+    llm_forecast.cached_gemini_forecast(history, 12, 25, 0, 0)
+    assert calls == [(-50, 0, 0), (25, 0, 0)]
+
+
+def test_fallback_is_not_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(llm_forecast, "gemini_forecast", _fake_forecast(calls, rationale=llm_forecast.FALLBACK_RATIONALE))
+    monkeypatch.setattr(llm_forecast, "ai_cache", AICache(None))
+
+    for _ in range(2):
+        _, rationale = llm_forecast.cached_gemini_forecast(_history(), 12, 0, 0, 0)
+        assert rationale == llm_forecast.FALLBACK_RATIONALE
+    assert len(calls) == 2
+
+
+def test_cache_key_tracks_history_and_shocks():
+    history = _history()
+    key = llm_forecast.forecast_cache_key(history, 12, 0, 0, 0)
+    assert key == llm_forecast.forecast_cache_key(history.copy(), 12, 0, 0, 0)
+    assert key != llm_forecast.forecast_cache_key(history, 12, 0, 5, 0)
+    assert key != llm_forecast.forecast_cache_key(history.iloc[:-1], 12, 0, 0, 0)
@@ -0,0 +1,55 @@
+import sys
+import os
+import time
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.data import fred_loader
+from src.data.fred_loader import FredLoader
+
+
+def _stale_loader(monkeypatch, tmp_path, cached):
+    """Loader over a day-old CSV cache of `cached`; records the start of every download."""
+    monkeypatch.setenv("FRED_API_KEY", "offline")
+    monkeypatch.setattr(fred_loader, "FRED_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(fred_loader, "store_enabled", lambda: False)
+    path = tmp_path / f"{cached.name}.csv"
+    cached.rename("value").rename_axis("date").to_frame().to_csv(path)
+    old = time.time() - 2 * 86400
+    os.utime(path, (old, old))
+
+    loader, starts = FredLoader(session=object()), []
+
+    def download(series_id, start):
+        starts.append(start)
+        dates = pd.date_range(start, "2020-03-01", freq="MS")
+        return pd.Series(range(len(dates)), index=dates, dtype=float, name=series_id)
+
+    monkeypatch.setattr(loader, "_download", download)
+    return loader, starts
+
+
+def _cached():
+    dates = pd.date_range("2015-01-01", "2020-01-01", freq="MS")
+    return pd.Series(1.0, index=dates, name="BAA10Y")
+
+
+def test_stale_cache_refreshes_only_the_tail(monkeypatch, tmp_path):
+    loader, starts = _stale_loader(monkeypatch, tmp_path, _cached())
+
+    df = loader.fetch_series("BAA10Y", start="2015-01-01")
+
+    assert starts == ["2019-10-03"]        # last observation minus the revision overlap
+    assert df.index.min() == pd.Timestamp("2015-01-01") and df.index.max() == pd.Timestamp("2020-03-01")
+
+
+def test_earlier_start_than_cache_downloads_full_history(monkeypatch, tmp_path):
+    loader, starts = _stale_loader(monkeypatch, tmp_path, _cached())
+
+    df = loader.fetch_series("BAA10Y", start="2010-01-01")
+
+    assert starts == ["2010-01-01"]
+    assert df.index.min() == pd.Timestamp("2010-01-01")
+    assert pd.read_csv(tmp_path / "BAA10Y.csv", index_col=0, parse_dates=True).index.min() == pd.Timestamp("2010-01-01")
@@ -0,0 +1,75 @@
+import sys
+import os
+import json
+
+import pytest
+from google import genai
+from google.genai import types
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from scripts.gemini_standin import start_standin, synthesize
+from src.utils.llm_gateway import LLMGateway, AllModelsUnavailable
+
+
+@pytest.fixture(scope="module")
+def standin():
+    server, standin, url = start_standin(0, {"default": {"latency_ms": 10, "sigma": 0, "hang_s": 3}})
+    yield standin, url
+    server.shutdown()
+
+
+@pytest.fixture
+def gateway(standin):
+    stand, url = standin
+    stand.configure({"models": {m: None for m in list(stand.models)}})
+    stand.reset()
+    client = genai.Client(api_key="offline", http_options=types.HttpOptions(base_url=url, timeout=1000))
+    return stand, LLMGateway(client=client)
+
+
+def test_synthesize_follows_prompt_schema():
+    forecast = json.loads(synthesize('next 6 months\n2025-11: 51.0\n2025-12: 52.5\n"reasoning_trace"', True))
+    assert len(forecast["forecast"]) == len(forecast["upper80"]) == 6 and forecast["forecast"][0] == 52.9
+
+    match = json.loads(synthesize('[{"ticker": "AAA"}, {"ticker": "BBB"}]\nRETURN JSON MAP ONLY', True))
+    assert [m["ticker"] for m in match] == ["AAA", "BBB"]
+
+    example = json.loads(synthesize('Return ONLY valid JSON:\n{"html": "...", "verdict": {"status": "GO"}, "list": [1, 2, ...]}', True))
+    assert example == {"html": "...", "verdict": {"status": "GO"}, "list": [1, 2]}
+
+    assert synthesize("Write HTML", False).startswith("<h3>")
+
+
+def test_generate_and_stream_through_sdk(gateway):
+    stand, gw = gateway
+    data, model = gw.generate('Return JSON: {"a": 1}', config=types.GenerateContentConfig(response_mime_type="application/json"),
+                              models=["m1"], parse=lambda r: json.loads(r.text))
+    assert data == {"a": 1} and model == "m1"
+
+    chunks = [text for _, text in gw.stream("Write HTML", models=["m1"])]
+    assert len(chunks) == 6 and "".join(chunks) == synthesize("Write HTML", False)
+    assert stand.stats["m1"] == {"ok": 1, "stream": 1}
+
+
+def test_quota_and_bad_json_fall_through_the_cascade(gateway):
+    stand, gw = gateway
+    stand.configure({"models": {"m1": {"fail": "429"}, "m2": {"fail": "bad_json"}}})
+
+    data, model = gw.generate('Return JSON: {"a": 1}', models=["m1", "m2", "m3"], parse=lambda r: json.loads(r.text))
+    assert model == "m3" and data == {"a": 1}
+    models = gw.stats()["models"]
+    assert models["m1"]["circuit"] == "open"        # quota errors open the circuit at once
+    assert models["m2"]["circuit"] == "closed"
+
+    gw.generate("x", models=["m1", "m3"])
+    assert gw.stats()["models"]["m1"]["skipped"] == 1
+
+
+def test_hang_hits_client_timeout(gateway):
+    stand, gw = gateway
+    stand.configure({"models": {"m1": {"fail": "timeout"}}})
+    with pytest.raises(AllModelsUnavailable):
+        gw.generate("x", models=["m1"])
+    assert stand.stats["m1"] == {"timeout": 1}
@@ -0,0 +1,157 @@
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+import threading
+import pytest
+from src.utils.llm_gateway import LLMGateway, GatewayBusy, AllModelsUnavailable
+
+
+class _NotFound(Exception):
+    code = 404
+
+
+def test_open_circuit_skips_dead_model(fake_client):
+    client = fake_client({"dead": _NotFound("model not found")})
+    gw = LLMGateway(client=client, breaker_cooldown_s=60)
+
+    response, model = gw.generate("hi", models=["dead", "live"])
+    assert (response.text, model) == ("live:hi", "live")
+
+    # The dead model is only paid for once; later cascades go straight to the live one
+    gw.generate("again", models=["dead", "live"])
+    assert client.models.calls == ["dead", "live", "live"]
+
+    stats = gw.stats()["models"]
+    assert stats["dead"]["circuit"] == "open" and stats["dead"]["skipped"] == 1
+    assert stats["dead"]["errors"] == {"_NotFound:404": 1}
+    assert stats["live"]["ok"] == 2 and sum(stats["live"]["latency_ms"].values()) == 2
+
+
+def test_transient_errors_trip_after_threshold_and_half_open_recovers(fake_client):
+    client = fake_client({"flaky": RuntimeError("503")})
+    gw = LLMGateway(client=client, breaker_failures=2, breaker_cooldown_s=0)
+
+    for _ in range(2):
+        with pytest.raises(AllModelsUnavailable):
+            gw.generate("x", models=["flaky"])
+    assert gw.stats()["models"]["flaky"]["circuit"] == "open"
+
+    # Cool-down elapsed (0s): one trial call goes through and closes the circuit on success
+    client.models.behaviour["flaky"] = "ok"
+    _, model = gw.generate("x", models=["flaky"])
+    assert model == "flaky"
+    assert gw.stats()["models"]["flaky"]["circuit"] == "closed"
+
+
+def test_parse_failure_falls_through_cascade(fake_client):
+    client = fake_client({"garbage": "not json"})
+    gw = LLMGateway(client=client)
+
+    def parse(response):
+        name, _ = response.text.split(":")    # "not json" has no separator -> ValueError
+        return name
+
+    parsed, model = gw.generate("x", models=["garbage", "good"], parse=parse)
+    assert (parsed, model) == ("good", "good")
+    garbage = gw.stats()["models"]["garbage"]
+    assert garbage["parse_errors"] == 1 and garbage["errors"] == {} and garbage["ok"] == 1
+
+
+def test_malformed_answers_and_request_errors_do_not_open_circuit(fake_client):
+    client = fake_client({"model": "not json"})
+    gw = LLMGateway(client=client, breaker_failures=2, breaker_cooldown_s=60)
+
+    def parse(response):
+        raise ValueError("bad json")
+
+    for _ in range(3):
+        with pytest.raises(AllModelsUnavailable):
+            gw.generate("x", models=["model"], parse=parse)
+    assert gw.stats()["models"]["model"]["circuit"] == "closed"
+
+    # An unsupported tool is a request error: the retry without tools still reaches the model
+    client.models.behaviour["model"] = ValueError("400 INVALID_ARGUMENT: Search tool is not supported")
+    with pytest.raises(AllModelsUnavailable, match="not supported"):
+        gw.generate("x", models=["model"])
+    client.models.behaviour["model"] = "ok"
+    assert gw.generate("x", models=["model"])[1] == "model"
+
+
+def test_fallback_config_retries_same_model_before_cascading(fake_client):
+    client = fake_client({("a", "tools"): ValueError("search tool not enabled"),
+                      ("b", "tools"): ValueError("search tool not enabled"),
+                      "c": _NotFound("model not found")})
+    gw = LLMGateway(client=client)
+
+    response, model = gw.generate("x", config="tools", fallback_config="plain", models=["a", "b"])
+    assert (response.text, model) == ("a:x", "a")
+    assert client.models.calls == ["a", "a"]
+
+    # An unavailable model is not worth a second call; the cascade moves on
+    client.models.calls.clear()
+    chunks = list(gw.stream("y", config="tools", fallback_config="plain", models=["c", "b"]))
+    assert chunks == [("b", "b:"), ("b", "y")]
+    assert client.models.calls == ["c", "b", "b"]
+    stats = gw.stats()["models"]
+    assert stats["a"]["circuit"] == "closed" and stats["b"]["circuit"] == "closed"
+
+
+def test_queue_limit_rejects_when_full(fake_client):
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow(model, contents, config):
+        started.set()
+        release.wait(5)
+        return "done"
+
+    gw = LLMGateway(client=fake_client(slow), max_concurrency=1, max_queue=1)
+    worker = threading.Thread(target=gw.generate, args=("x",), kwargs={"models": ["slow"]})
+    worker.start()
+    started.wait(5)
+
+    # The first caller holds the only slot; a second one waiting fills max_queue=1
+    waiter = threading.Thread(target=gw.generate, args=("y",), kwargs={"models": ["slow"]})
+    waiter.start()
+    while gw.stats()["queue_depth"] == 0:
+        pass
+    with pytest.raises(GatewayBusy):
+        gw.generate("z", models=["slow"])
+
+    release.set()
+    worker.join(5)
+    waiter.join(5)
+    stats = gw.stats()
+    assert stats["rejected"] == 1 and stats["in_flight"] == 0 and stats["queue_depth"] == 0
+
+
+def test_stream_falls_back_before_first_chunk_only(fake_client):
+    client = fake_client({"dead": _NotFound("gone"), "live": ["<h3>", "Memo", "</h3>"]})
+    gw = LLMGateway(client=client)
+
+    chunks = list(gw.stream("x", models=["dead", "live"]))
+    assert chunks == [("live", "<h3>"), ("live", "Memo"), ("live", "</h3>")]
+    stats = gw.stats()["models"]
+    assert stats["dead"]["circuit"] == "open"
+    assert stats["live"]["streams"] == 1 and stats["live"]["ok"] == 1
+
+    # A failure after output has been sent propagates instead of restarting on another model
+    client.models.behaviour["live"] = ["partial", RuntimeError("reset")]
+    stream = gw.stream("x", models=["live", "other"])
+    assert next(stream) == ("live", "partial")
+    with pytest.raises(RuntimeError):
+        next(stream)
+    assert "other" not in client.models.calls
+
+
+def test_closed_stream_releases_slot(fake_client):
+    gw = LLMGateway(client=fake_client({"m": ["a", "b", "c"]}), max_concurrency=1)
+    stream = gw.stream("x", models=["m"])
+    next(stream)
+    assert gw.stats()["in_flight"] == 1
+    stream.close()              # client disconnected mid-stream
+    assert gw.stats()["in_flight"] == 0
+    assert gw.generate("y", models=["m"])[1] == "m"
@@ -0,0 +1,82 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.data.macro_store import MacroStore
+
+
+def use_tmp_store(monkeypatch, tmp_path):
+    monkeypatch.setattr(MacroStore, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(MacroStore, "POINTER_FILE", str(tmp_path / "CURRENT"))
+
+
+def test_roundtrip_keeps_nan_observations(monkeypatch, tmp_path):
+    use_tmp_store(monkeypatch, tmp_path)
+    daily = pd.Series([1.0, np.nan, 3.0], index=pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04"]), name="VIXCLS")
+    monthly = pd.Series([10.0, 11.0], index=pd.to_datetime(["2024-01-01", "2024-02-01"]), name="BUSLOANS")
+
+    MacroStore.write({"VIXCLS": daily, "BUSLOANS": monthly}, fetched_at={})
+    store = MacroStore(MacroStore.current_version())
+
+    # Present-but-NaN rows survive, alignment gaps do not leak in
+    pd.testing.assert_series_equal(store.series("VIXCLS"), daily.rename_axis("date"), check_freq=False)
+    pd.testing.assert_series_equal(store.series("BUSLOANS"), monthly.rename_axis("date"), check_freq=False)
+    assert store.latest("VIXCLS") == 3.0
+    assert store.frame().shape == (5, 2)
+    assert isinstance(store.values, np.memmap)
+
+
+def test_pointer_moves_and_old_versions_pruned(monkeypatch, tmp_path):
+    use_tmp_store(monkeypatch, tmp_path)
+    s = pd.Series([1.0], index=pd.to_datetime(["2024-01-31"]))
+    versions = [MacroStore.write({"A": s * i}, fetched_at={}).version for i in range(4)]
+
+    assert MacroStore.current_version() == versions[-1]
+    assert MacroStore(versions[-1]).latest("A") == 3.0
+    remaining = [d for d in os.listdir(tmp_path) if d[:1].isdigit()]
+    assert len(remaining) == MacroStore.KEEP_VERSIONS
+
+
+def test_upsert_merges_and_skips_unchanged(monkeypatch, tmp_path):
+    from src.data import macro_store
+    use_tmp_store(monkeypatch, tmp_path)
+    monkeypatch.setattr(macro_store, "_store", None)
+    a = pd.Series([1.0, 2.0], index=pd.to_datetime(["2024-01-31", "2024-02-29"]))
+    b = pd.Series([5.0], index=pd.to_datetime(["2024-01-31"]))
+
+    macro_store.upsert_series({"A": a}, fetched_at={"A": 100.0})
+    macro_store.upsert_series({"B": b}, fetched_at={"B": 100.0})
+    version = MacroStore.current_version()
+    assert MacroStore(version).columns == ["A", "B"]
+
+    # Same values: no new version, only the fetch time moves
+    macro_store.upsert_series({"A": a.copy()}, fetched_at={"A": 200.0})
+    assert MacroStore.current_version() == version
+    assert MacroStore(version).meta["series"]["A"]["fetched_at"] == 200.0
+    assert macro_store.get_macro_store().meta["series"]["A"]["fetched_at"] == 200.0
+
+    macro_store.upsert_series({"A": a + 1})
+    assert MacroStore.current_version() != version
+    assert MacroStore(MacroStore.current_version()).latest("A") == 3.0
+
+
+def _upsert_many(prefix):
+    from src.data import macro_store
+    for i in range(5):
+        macro_store.upsert_series({f"{prefix}{i}": pd.Series([float(i)], index=pd.to_datetime(["2024-01-31"]))})
+
+
+def test_concurrent_processes_do_not_lose_series(monkeypatch, tmp_path):
+    import multiprocessing
+    use_tmp_store(monkeypatch, tmp_path)
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_upsert_many, args=(p,)) for p in ("X", "Y")]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+    assert MacroStore(MacroStore.current_version()).columns == [f"{p}{i}" for p in "XY" for i in range(5)]
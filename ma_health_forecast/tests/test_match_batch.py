@@ -0,0 +1,112 @@
+import sys
+import os
+import re
+import json
+import threading
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.analysis import gemini_brief
+from src.analysis.gemini_brief import GeminiBriefService
+from src.utils.llm_gateway import LLMGateway
+
+
+def _tickers(prompt):
+    return re.findall(r'"ticker": ?"([A-Z]+)"', prompt.split("RETURN JSON")[0])
+
+
+class _Matcher:
+    """Answers with one insight per ticker in the prompt; scripted failures per ticker."""
+
+    def __init__(self, fail_once=(), drop=(), malformed=()):
+        self.fail_once = set(fail_once)
+        self.drop = set(drop)
+        self.malformed = set(malformed)
+        self._lock = threading.Lock()
+
+    def __call__(self, model, contents, config):
+        tickers = _tickers(contents)
+        with self._lock:
+            failing = self.fail_once & set(tickers)
+            self.fail_once -= failing
+            if failing:
+                return RuntimeError("503 overloaded")
+        items = []
+        for i, t in enumerate(tickers):
+            if t in self.drop:
+                continue
+            if t in self.malformed:
+                items.append("not an object")
+                continue
+            items.append({"ticker": t, "rationale_headline": f"{t} fit", "fit_score": str(90 - i)})
+        items.append({"ticker": "ZZZ", "fit_score": 99})    # hallucinated, not requested
+        return "```json\n" + json.dumps(items) + "\n```"
+
+
+def _service(monkeypatch, client, chunk=3):
+    monkeypatch.setattr(gemini_brief, "llm_gateway", LLMGateway(client=client))
+    monkeypatch.setattr(gemini_brief, "MATCH_CHUNK_SIZE", chunk)
+    return GeminiBriefService()
+
+
+def _prompts(client):
+    return [_tickers(p) for p in client.models.prompts]
+
+
+PROFILE = {"ticker": "CVS", "name": "CVS Health"}
+CANDIDATES = [{"ticker": t, "name": t, "business_summary": None} for t in
+              ["AAA", "BBB", "CCC", "DDD", "EEE", "FFF", "GGG"]]
+
+
+def test_candidates_are_chunked_and_merged(monkeypatch, fake_client):
+    client = fake_client(_Matcher())
+    service = _service(monkeypatch, client)
+
+    insights = service.analyze_match_batch(PROFILE, CANDIDATES, "BUY")
+
+    assert sorted(len(p) for p in _prompts(client)) == [1, 3, 3]
+    assert set(insights) == {c["ticker"] for c in CANDIDATES}     # ZZZ dropped
+    assert insights["AAA"]["fit_score"] == 90                     # coerced to int
+    assert insights["AAA"]["synergy_type"] == "Strategic"
+
+
+def test_only_failed_chunk_is_retried(monkeypatch, fake_client):
+    client = fake_client(_Matcher(fail_once={"DDD"}))
+    service = _service(monkeypatch, client)
+
+    insights = service.analyze_match_batch(PROFILE, CANDIDATES, "BUY")
+
+    assert len(insights) == len(CANDIDATES)
+    assert len(_prompts(client)) == 4
+    assert _prompts(client)[-1] == ["DDD", "EEE", "FFF"]
+
+
+def test_malformed_items_do_not_fail_the_chunk(monkeypatch, fake_client):
+    client = fake_client(_Matcher(malformed={"BBB"}, drop={"CCC"}))
+    monkeypatch.setattr(gemini_brief, "MATCH_CHUNK_RETRIES", 0)
+    service = _service(monkeypatch, client)
+
+    insights = service.analyze_match_batch(PROFILE, CANDIDATES, "BUY")
+
+    assert "BBB" not in insights and "CCC" not in insights
+    assert {"AAA", "DDD", "GGG"} <= set(insights)
+    assert len(_prompts(client)) == 3
+
+
+def test_missing_tickers_are_retried_alone(monkeypatch, fake_client):
+    client = fake_client(_Matcher(malformed={"BBB"}))
+    service = _service(monkeypatch, client)
+
+    insights = service.analyze_match_batch(PROFILE, CANDIDATES, "BUY")
+
+    assert "BBB" not in insights
+    assert _prompts(client)[-1] == ["BBB"]
+
+
+def test_rerank_keeps_unscored_candidates_in_place():
+    matches = [{"ticker": t} for t in ["A", "B", "C", "D", "E"]]
+    insights = {"A": {"fit_score": 40}, "C": {"fit_score": 90}, "E": {"fit_score": 70}}
+    ranked = GeminiBriefService.rerank_matches(matches, insights)
+    assert [m["ticker"] for m in ranked] == ["C", "B", "E", "D", "A"]
+    assert "ai_fit_score" not in ranked[1] and ranked[0]["ai_fit_score"] == 90
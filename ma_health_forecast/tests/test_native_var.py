@@ -0,0 +1,54 @@
+import sys
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.api import VAR
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.forecast.native_var import NativeVAR
+from src.forecast.var_forecast import forecast_with_var
+
+
+def synthetic_buckets(n=240, seed=11):
+    rng = np.random.default_rng(seed)
+    x = np.zeros((n, 4))
+    A = np.array([[0.5, 0.1, 0, 0], [0, 0.4, 0.2, 0], [0.1, 0, 0.3, 0], [0, 0, 0.1, 0.6]])
+    for t in range(1, n):
+        x[t] = x[t - 1] @ A.T + rng.normal(scale=0.4, size=4)
+    return pd.DataFrame(x, columns=["BKT_a", "BKT_b", "BKT_c", "BKT_d"], index=pd.date_range("2000-01-31", periods=n, freq="ME"))
+
+
+def test_matches_statsmodels():
+    df = synthetic_buckets()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        sm_model = VAR(df)
+        sm_order = sm_model.select_order(maxlags=12)
+        sm_res = sm_model.fit(sm_order.aic)
+
+    model = NativeVAR(df)
+    order = model.select_order(maxlags=12)
+    res = model.fit(order.aic)
+
+    assert order.aic == sm_order.aic
+    np.testing.assert_allclose(order.ics["aic"], sm_order.ics["aic"], atol=1e-10)
+    np.testing.assert_allclose(res.coefs, sm_res.coefs, atol=1e-12)
+    np.testing.assert_allclose(res.intercept, sm_res.intercept, atol=1e-12)
+    np.testing.assert_allclose(res.sigma_u.values, sm_res.sigma_u.values, atol=1e-12)
+    np.testing.assert_allclose(res.resid.values, sm_res.resid.values, atol=1e-12)
+    np.testing.assert_allclose(res.irf(12).orth_irfs, sm_res.irf(12).orth_irfs, atol=1e-12)
+    y = df.values[-res.k_ar:]
+    np.testing.assert_allclose(res.forecast(y=y, steps=12), sm_res.forecast(y=y, steps=12), atol=1e-12)
+
+
+def test_forecast_with_var_engine_switch(monkeypatch):
+    df = synthetic_buckets(seed=3)
+    sm_fc, _ = forecast_with_var(df, steps=12)
+    monkeypatch.setenv("VAR_ENGINE", "native")
+    native_fc, native_res = forecast_with_var(df, steps=12)
+
+    assert isinstance(native_res.irf(12).orth_irfs, np.ndarray)
+    pd.testing.assert_frame_equal(native_fc, sm_fc, atol=1e-12)
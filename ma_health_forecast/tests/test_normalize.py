@@ -0,0 +1,44 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.features.normalize import RollingMinMaxScaler
+from src.index.ma_index import scale_0_100
+
+
+def assert_bit_identical(expected, got):
+    expected = np.asarray(expected, dtype=float)
+    got = np.asarray(got, dtype=float)
+    assert np.array_equal(np.isnan(expected), np.isnan(got))
+    mask = ~np.isnan(expected)
+    assert np.array_equal(expected[mask].view(np.int64), got[mask].view(np.int64))
+
+
+def sample_series(seed: int) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(30, 500))
+    values = rng.normal(rng.normal() * 100, rng.uniform(0.01, 20), n)
+    values[rng.random(n) < 0.05] = np.nan
+    values[:30] = np.round(values[:30])  # ties and repeats
+    return pd.Series(values, index=pd.date_range("1990-01-31", periods=n, freq="ME"))
+
+
+def test_rolling_scaler_matches_scale_0_100():
+    for seed in range(25):
+        x = sample_series(seed)
+        assert_bit_identical(scale_0_100(x, 240), RollingMinMaxScaler(240).extend(x.values))
+
+
+def test_project_matches_rescaling_history_plus_forecast():
+    x = sample_series(7)
+    history, forecast = x.iloc[:-12], x.iloc[-12:]
+    scaler = RollingMinMaxScaler.fit(history, 240)
+    state = scaler.to_dict()
+
+    assert_bit_identical(scale_0_100(x, 240).iloc[-12:], scaler.project(forecast.values))
+    # project() leaves the fitted state untouched
+    assert scaler.to_dict() == state
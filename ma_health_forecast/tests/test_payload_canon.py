@@ -0,0 +1,94 @@
+import sys
+import os
+import hashlib
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.analysis.gemini_brief import GeminiBriefService
+from src.analysis.gemini_dossier import GeminiDossierService
+from src.utils.payload_canon import KeyMeter, canonical_hash, canonicalize
+
+
+def _context(spread, avg_spi, drivers, date="2026-01-31"):
+    return {
+        "macro": {"date": date, "hy_spread": spread, "ig_spread": 1.1},
+        "aggregates": {"avg_spi": avg_spi, "sector": "Tech"},
+        "top_drivers": drivers,
+    }
+
+
+def test_brief_key_ignores_jitter_and_timestamps():
+    svc = GeminiBriefService()
+    drivers = [{"ticker": "ADBE", "spi": 62.0}, {"ticker": "MSFT", "spi": 41}]
+    base = svc.brief_cache_key("Tech", "All", _context(3.41, 61.99999, drivers))
+
+    assert svc.brief_cache_key("Tech", "All", _context(3.4100001, 62.0, drivers, date="2026-02-28")) == base
+    assert svc.brief_cache_key("Tech", "All", _context(3.42, 62, [{"ticker": "ADBE", "spi": 62}, {"ticker": "MSFT", "spi": 41.2}])) == base
+
+    # Drivers are ranked: the prompt lists them (and trims the tail) in this order
+    assert svc.brief_cache_key("Tech", "All", _context(3.41, 62.0, drivers[::-1])) != base
+
+    # Material changes still give a new key
+    assert svc.brief_cache_key("Tech", "All", _context(3.9, 62.0, drivers)) != base
+    assert svc.brief_cache_key("Tech", "All", _context(3.41, 62.0, drivers[:1])) != base
+    assert svc.brief_cache_key("Tech", "Software", _context(3.41, 62.0, drivers)) != base
+
+
+def test_quantize_rules():
+    payload = {"hy_spread": 3.437, "spi": 61.6, "other": 1234.5678, "n": 7, "flag": True,
+               "updated_at": "2026-01-01T10:00:00", "nan": float("nan")}
+    assert canonicalize(payload, "brief") == {"hy_spread": 3.45, "spi": 62, "other": 1230, "n": 7,
+                                              "flag": True, "nan": None}
+
+
+def test_volatile_keys_are_scoped_by_path():
+    svc = GeminiBriefService()
+    drivers = [{"ticker": "ADBE", "spi": 62, "date": "2026-01-15"}]
+    base = svc.brief_cache_key("Tech", "All", _context(3.41, 62.0, drivers))
+    # The macro row's as-of date is noise; a date inside the drivers is content
+    assert svc.brief_cache_key("Tech", "All", _context(3.41, 62.0, drivers, date="2026-02-28")) == base
+    assert svc.brief_cache_key("Tech", "All", _context(3.41, 62.0, [dict(drivers[0], date="2026-03-01")])) != base
+
+
+def test_real_key_names_and_formatted_metrics():
+    row = {"date": "2026-01-31", "hy_spread": 3.4, "lbo_feasibility_index": 64.8}
+    assert canonicalize({"macro": row}, "brief") == {"macro": {"hy_spread": 3.4, "lbo_feasibility_index": 65}}
+    assert canonicalize({"financing": row}, "deal_brief") == {"financing": {"hy_spread": 3.4, "lbo_feasibility_index": 65}}
+
+    def memo(coverage):
+        return {"metrics": {"coverage_ratio": round(coverage, 2),
+                            "feasibility_drivers": {"cash_coverage": f"{coverage:.2f}x", "pf_leverage_band": "OK"}}}
+    assert canonical_hash(memo(1.23), "deal_memo", record=False) == canonical_hash(memo(1.24), "deal_memo", record=False)
+    assert canonical_hash(memo(1.23), "deal_memo", record=False) != canonical_hash(memo(1.6), "deal_memo", record=False)
+    assert canonicalize({"cash_coverage": "N/A"}, "deal_memo") == {"cash_coverage": "N/A"}
+
+
+def test_deal_brief_and_dossier_keys():
+    svc = GeminiBriefService()
+    sellers = [{"ticker": "ADBE", "spi": 62.2, "drivers": ["activist", "growth"], "market_cap": 2.1e11},
+               {"ticker": "INTC", "spi": 70.0, "drivers": ["restructuring"], "market_cap": 9.0e10}]
+    buyers = [{"ticker": "MSFT", "br": 81, "firepower": 7.5e10, "drivers": ["cash"]}]
+    financing = {"hy_spread": 3.4, "ig_spread": 1.1}
+    key = svc.deal_command_cache_key("Tech", financing, sellers, buyers)
+    jittered = [dict(sellers[0], drivers=["growth", "activist"]), dict(sellers[1], spi=69.9)]
+    assert svc.deal_command_cache_key("Tech", {"ig_spread": 1.1, "hy_spread": 3.40001}, jittered, buyers) == key
+    assert svc.deal_command_cache_key("Tech", financing, sellers[::-1], buyers) != key
+
+    dossier = GeminiDossierService()
+    items = [{"id": "sec_1", "title": "10-K", "tags": ["SEC", "Regulatory"]}, {"id": "news_2", "title": "Deal talk"}]
+    first = dossier._compute_hash({"ticker": "ADBE", "name": "Adobe", "items": items})
+    tags_reordered = [dict(items[0], tags=["Regulatory", "SEC"]), items[1]]
+    assert dossier._compute_hash({"ticker": "ADBE", "name": "Adobe", "items": tags_reordered}) == first
+    assert dossier._compute_hash({"ticker": "ADBE", "name": "Adobe", "items": items[::-1]}) != first
+
+
+def test_key_meter_reports_reuse_gain():
+    meter = KeyMeter()
+    for spread in (3.41, 3.4100001, 3.4099999, 3.41):
+        raw = hashlib.sha256(repr(spread).encode()).hexdigest()
+        meter.record("brief", raw, canonical_hash({"hy_spread": spread}, "brief", record=False))
+    stats = meter.stats()["brief"]
+    assert stats["lookups"] == 4
+    assert stats["canonical_key_reuse"] == 0.75 and stats["raw_key_reuse"] == 0.25
+    assert stats["merged_lookups"] == 2
@@ -0,0 +1,24 @@
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.plotting.plot_cache import PlotCache
+
+
+def test_renders_once_per_version():
+    cache = PlotCache()
+    calls = []
+
+    def render():
+        calls.append(1)
+        return f"png{len(calls)}"
+
+    assert cache.get_or_render("v1", "history_url", render) == "png1"
+    assert cache.get_or_render("v1", "history_url", render) == "png1"
+    assert len(calls) == 1
+
+    # A new index version invalidates everything rendered for the old one
+    assert cache.get_or_render("v2", "history_url", render) == "png2"
+    assert cache.stats() == {"version": "v2", "plots": ["history_url"], "hits": 1, "misses": 2}
@@ -0,0 +1,76 @@
+import sys
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.utils.prompt_budget import (
+    PromptMeter, compact, compact_json, estimate_tokens, fit_json, fit_text, summarize_series
+)
+
+
+def test_compact_drops_empty_keys_and_rounds():
+    payload = {"a": 1.23456789, "b": None, "c": "", "d": [], "e": {"f": None}, "g": [0.000123456, 5]}
+    assert compact(payload) == {"a": 1.235, "g": [0.0001235, 5]}
+    assert compact_json({"x": [1, 2]}) == '{"x":[1,2]}'
+
+
+def test_fit_json_trims_tail_of_longest_list():
+    drivers = [{"ticker": f"T{i:03d}", "note": "driver " * 10} for i in range(50)]
+    payload = {"macro": {"vix": 15.2}, "drivers": drivers}
+    full = estimate_tokens(json.dumps(payload, indent=2))
+
+    text = fit_json(payload, 400)
+    assert estimate_tokens(text) <= 400 < full
+    fitted = json.loads(text)
+    assert fitted["macro"] == {"vix": 15.2}
+    kept = [d["ticker"] for d in fitted["drivers"]]
+    assert kept == [f"T{i:03d}" for i in range(len(kept))]      # most relevant (first) items kept
+    assert 0 < len(kept) < 50
+
+
+def test_fit_json_under_budget_is_just_compact():
+    payload = {"a": [1, 2, 3], "b": "text"}
+    assert fit_json(payload, 1000) == compact_json(payload)
+
+
+def test_fit_text_cuts_at_word_boundary():
+    text = "headline " * 200
+    cut = fit_text(text, 50)
+    assert estimate_tokens(cut) <= 51 and cut.endswith(" …")
+    assert fit_text("short", 50) == "short"
+    assert fit_text(None, 50) == ""
+
+
+def test_summarize_series_keeps_recent_window():
+    idx = pd.date_range("2000-01-31", periods=300, freq="ME")
+    series = pd.Series(np.linspace(30, 70, 300), index=idx)
+
+    ctx = summarize_series(series, recent=24)
+    lines = ctx["recent"].splitlines()
+    assert len(lines) == 24 and lines[-1] == f"{idx[-1]:%Y-%m}: 70.0"
+    assert "300 months" in ctx["summary"] and "annual means 2000:" in ctx["summary"]
+
+    full = "\n".join(f"{d:%Y-%m}: {v:.1f}" for d, v in series.items())
+    assert estimate_tokens(ctx["summary"] + ctx["recent"]) < estimate_tokens(full) / 2
+
+    short = summarize_series(series.iloc[-10:], recent=24)
+    assert short["summary"] == "" and len(short["recent"].splitlines()) == 10
+
+
+def test_prompt_meter_per_service():
+    meter = PromptMeter()
+    meter.record("Gemini Brief", 1000, 200.0)
+    meter.record("Gemini Brief", 3000, 400.0, ok=False)
+    stats = meter.stats()["Gemini Brief"]
+    assert stats == {"calls": 2, "errors": 1, "avg_prompt_tokens": 2000, "max_prompt_tokens": 3000, "avg_ms": 300.0}
+
+
+def test_fit_json_terminates_on_escaped_strings():
+    for payload in ({"a": '"' * 40}, {"a": "\n" * 200}, {"a": "\\" * 500, "b": ["x" * 80] * 3}):
+        text = fit_json(payload, 5)
+        assert isinstance(json.loads(text), dict)
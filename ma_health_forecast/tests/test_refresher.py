@@ -0,0 +1,86 @@
+import sys
+import os
+import time
+import threading
+from datetime import datetime
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.index import refresher as refresher_mod
+from src.index.refresher import SnapshotRefresher, refresh_interval_seconds
+
+
+def _wait_until(condition, timeout=5.0):
+    """Poll until condition() holds; fail instead of hanging the suite."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the refresher"
+        time.sleep(0.001)
+
+
+def fake_snapshot(version):
+    return {"version": version, "data_vintage": version, "created_at": datetime.now().isoformat()}
+
+
+def test_interval_follows_frequency_unless_configured():
+    assert refresh_interval_seconds({"target_frequency": "M"}) == 24 * 3600
+    assert refresh_interval_seconds({"target_frequency": "Q"}) == 72 * 3600
+    assert refresh_interval_seconds({"target_frequency": "M", "refresh": {"interval_hours": 6}}) == 6 * 3600
+
+
+def test_serves_previous_snapshot_while_rebuilding(monkeypatch):
+    release = threading.Event()
+
+    def slow_rebuild(config_path):
+        release.wait(5)
+        return fake_snapshot("v2")
+
+    monkeypatch.setattr(refresher_mod, "rebuild", slow_rebuild)
+    r = SnapshotRefresher(interval_s=3600)
+    r._swap(fake_snapshot("v1"))
+
+    r.refresh_now()
+    _wait_until(lambda: r.refreshing)
+    assert r.current["version"] == "v1"
+    assert r.status()["refreshing"] is True
+
+    release.set()
+    _wait_until(lambda: not r.refreshing)
+    assert r.current["version"] == "v2"
+    assert r.status()["last_error"] is None
+
+
+def test_failed_rebuild_keeps_serving(monkeypatch):
+    def broken_rebuild(config_path):
+        raise RuntimeError("FRED down")
+
+    monkeypatch.setattr(refresher_mod, "rebuild", broken_rebuild)
+    r = SnapshotRefresher(interval_s=3600)
+    r._swap(fake_snapshot("v1"))
+
+    r.refresh_now(block=True)
+    assert r.current["version"] == "v1"
+    assert r.status()["last_error"] == "FRED down"
+
+
+def test_failed_cold_rebuild_backs_off(monkeypatch):
+    calls = []
+
+    def broken_rebuild(config_path):
+        calls.append(time.monotonic())
+        raise RuntimeError("FRED down")
+
+    monkeypatch.setattr(refresher_mod, "rebuild", broken_rebuild)
+    monkeypatch.setattr(refresher_mod, "current_version", lambda: None)
+    monkeypatch.setattr(refresher_mod, "POLL_SECONDS", 0.01)
+    r = SnapshotRefresher(interval_s=3600)
+
+    # No snapshot yet: the first poll rebuilds, later polls wait out RETRY_AFTER_SECONDS
+    r.ensure_started()
+    try:
+        _wait_until(lambda: r.last_error is not None)
+        time.sleep(0.2)
+    finally:
+        r.stop()
+    assert len(calls) == 1 and r.current is None
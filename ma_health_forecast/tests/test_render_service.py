@@ -0,0 +1,93 @@
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+import base64
+import numpy as np
+import pandas as pd
+from src.plotting.render_service import RenderService
+
+
+def _index_frame(n=48):
+    idx = pd.date_range("2020-01-31", periods=n, freq="ME")
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"Composite": 50 + rng.normal(0, 5, n).cumsum()}, index=idx)
+
+
+def _is_png(b64: str) -> bool:
+    return base64.b64decode(b64)[:8] == b"\x89PNG\r\n\x1a\n"
+
+
+def test_pool_renders_png_and_counts():
+    service = RenderService(workers=1, max_inflight=2)
+    service.start()
+    df = _index_frame()
+
+    jobs = [service.submit("history", df) for _ in range(3)]
+    assert all(_is_png(j.result(timeout=60)) for j in jobs)
+
+    stats = service.stats()
+    assert stats["submitted"] == 3 and stats["completed"] == 3 and stats["failed"] == 0
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+    assert stats["inline"] == 0
+
+
+def test_inline_mode_and_errors():
+    service = RenderService(workers=0)
+    assert _is_png(service.render("history", _index_frame()))
+    assert service.stats()["inline"] == 1
+
+    # Renderer errors surface on the future
+    job = service.submit("history", pd.DataFrame())
+    assert job.exception() is not None
+
+
+def test_killed_worker_recovers_on_next_submit():
+    import signal
+    service = RenderService(workers=1, max_inflight=2)
+    service.start()
+    for pid in list(service._executor._processes):
+        os.kill(pid, signal.SIGKILL)
+    df = _index_frame()
+
+    # Every later submit renders (inline while the pool is broken, then from a fresh pool)
+    for _ in range(3):
+        assert _is_png(service.result(service.submit("history", df), timeout=60))
+    assert service.stats()["in_flight"] == 0
+
+
+def _hang_in_workers(parent):
+    def render(*args, **kwargs):
+        if os.getpid() != parent:
+            import time
+            time.sleep(60)
+        return "inline"
+    return render
+
+
+def test_hung_renders_never_pin_request_threads(monkeypatch):
+    from src.plotting import render_service as rs
+    monkeypatch.setattr(rs, "_renderers", lambda: {"hang": _hang_in_workers(os.getpid())})
+    service = RenderService(workers=1, max_inflight=1, slot_timeout=0.5)
+
+    # The only slot is held by a hung render: the next submit waits slot_timeout, then renders inline
+    stuck = service.submit("hang")
+    assert service.submit("hang").result(timeout=5) == "inline"
+
+    # Timing out on the hung render recycles the pool and gives its slot back
+    assert service.result(stuck, timeout=0.5) == "inline"
+    stuck.exception(timeout=10)
+    assert service.stats()["in_flight"] == 0
+    assert service._slots.acquire(timeout=0)
+    service._slots.release()
+
+
+def test_no_fork_platform_renders_inline(monkeypatch):
+    import multiprocessing
+    monkeypatch.setattr(multiprocessing, "get_all_start_methods", lambda: ["spawn"])
+    service = RenderService(workers=2)
+    assert service.workers == 0
+    service.start()
+    assert service._executor is None and _is_png(service.render("history", _index_frame()))
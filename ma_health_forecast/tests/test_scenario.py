@@ -0,0 +1,85 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.api import VAR
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.forecast.scenario import ScenarioKernel, ScenarioTable, coerce_shock_inputs, bucket_shocks, evaluate_scenarios
+
+NAMES = ["BKT_credit", "BKT_sentiment", "BKT_valuation"]
+WEIGHTS = {"BKT_credit": 0.5, "BKT_sentiment": 0.3, "BKT_valuation": 0.2}
+
+
+def fitted_var():
+    rng = np.random.default_rng(0)
+    x = np.zeros((200, 3))
+    for t in range(1, 200):
+        x[t] = 0.5 * x[t - 1] + rng.normal(size=3)
+    return VAR(pd.DataFrame(x, columns=NAMES)).fit(2)
+
+
+def looped_response(var_results, shocks):
+    """Reference: per-bucket loop over the IRF tensor, as the app used to do."""
+    orth = var_results.irf(12).orth_irfs
+    total = np.zeros(13)
+    for name, magnitude in shocks.items():
+        j = [n.lower() for n in NAMES].index(name.lower())
+        for i, col in enumerate(NAMES):
+            total += orth[:, i, j] * magnitude * WEIGHTS[col]
+    return total
+
+
+def test_kernel_matches_looped_irf():
+    var_results = fitted_var()
+    kernel = ScenarioKernel.from_var(var_results, WEIGHTS, horizon=12)
+    shocks = {"BKT_Credit": -7.5, "BKT_Sentiment": 20.0, "BKT_Valuation": -7.5}
+
+    expected = looped_response(var_results, shocks)
+    np.testing.assert_allclose(kernel.impulse_response(shocks), expected, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(kernel.scenario_impact(shocks), np.cumsum(expected)[1:], rtol=1e-12, atol=1e-12)
+
+
+def test_unknown_buckets_are_ignored():
+    kernel = ScenarioKernel.from_var(fitted_var(), WEIGHTS, horizon=12)
+    assert kernel.position("bkt_CREDIT") == 0
+    assert kernel.position("BKT_Liquidity") == -1
+    assert not kernel.scenario_impact({"BKT_Liquidity": 5.0}).any()
+
+
+def test_batch_matches_single_scenarios():
+    kernel = ScenarioKernel.from_var(fitted_var(), WEIGHTS, horizon=12)
+    baseline = np.linspace(40, 60, 12)
+    inputs = np.array([[50, -20, 10], [-100, 5, -5], [0, 0, 0], [25, 20, 3]], dtype=float)
+
+    paths = evaluate_scenarios(kernel, baseline, inputs)
+    assert paths.shape == (4, 12)
+    for row, path in zip(inputs, paths):
+        single = {k: float(v[0]) for k, v in bucket_shocks([row]).items()}
+        np.testing.assert_allclose(path, baseline + kernel.scenario_impact(single), rtol=1e-12, atol=1e-12)
+
+
+def test_keyword_inputs_coerced():
+    assert coerce_shock_inputs("50", "Bear", "High") == (50.0, -20.0, 10.0)
+    assert coerce_shock_inputs(None, "Neutral", "Low") == (0.0, 0.0, -5.0)
+    assert coerce_shock_inputs("nan", "inf", float("-inf")) == (0.0, 0.0, 0.0)
+
+
+def test_table_lookup_matches_live_and_rejects_off_grid():
+    kernel = ScenarioKernel.from_var(fitted_var(), WEIGHTS, horizon=12)
+    baseline = np.linspace(40, 60, 12)
+    table = ScenarioTable(kernel, baseline)
+
+    assert table.paths.shape == (9, 9, 21, 12)
+    path, irf_line = table.lookup(-25, 15, 7)
+    single = {k: float(v[0]) for k, v in bucket_shocks([[-25, 15, 7]]).items()}
+    np.testing.assert_allclose(path, baseline + kernel.scenario_impact(single), rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(irf_line, kernel.impulse_response(single), rtol=1e-12, atol=1e-12)
+
+    assert table.lookup(10, 0, 0) is None      # between rate steps
+    assert table.lookup(125, 0, 0) is None     # beyond the slider range
+    assert table.lookup(0, 0, 0.5) is None
+    assert table.lookup(float("nan"), 0, 0) is None
+    assert table.lookup(0, float("inf"), 0) is None and table.lookup(0, 0, float("-inf")) is None
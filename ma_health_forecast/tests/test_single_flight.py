@@ -0,0 +1,159 @@
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+import time
+import threading
+import pytest
+from src.utils.single_flight import SingleFlight
+
+
+def _wait_until(condition, timeout=5.0):
+    """Poll until condition() holds; fail instead of hanging the suite."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for concurrent callers"
+        time.sleep(0.001)
+
+
+def _run_concurrently(flight, key, fn, n):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    gate = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        gate.wait(5)
+        return {"brief": "ok"}
+
+    threads, results, errors = _run_concurrently(flight, "brief:abc", slow, 5)
+    _wait_until(lambda: flight.stats()["groups"]["brief"]["calls"] >= 5)
+    gate.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(calls) == 1 and not errors
+    assert results == [{"brief": "ok"}] * 5
+    stats = flight.stats()
+    assert stats["saved"] == 4 and stats["in_flight"] == 0
+    assert stats["groups"]["brief"] == {"calls": 5, "executions": 1, "shared": 4, "errors": 0}
+
+    # Nothing is kept after the flight lands
+    assert flight.do("brief:abc", lambda: "fresh") == "fresh"
+
+
+def test_errors_propagate_to_waiters_and_different_keys_run_apart():
+    flight = SingleFlight()
+    gate = threading.Event()
+
+    def failing():
+        gate.wait(5)
+        raise RuntimeError("Gemini down")
+
+    threads, results, errors = _run_concurrently(flight, "dossier:x", failing, 3)
+    _wait_until(lambda: flight.stats()["groups"]["dossier"]["calls"] >= 3)
+    assert flight.do("dossier:y", lambda: "other") == "other"
+    gate.set()
+    for t in threads:
+        t.join(5)
+
+    assert not results and len(errors) == 3
+    assert all(str(e) == "Gemini down" for e in errors)
+    assert flight.stats()["groups"]["dossier"]["errors"] == 1
+
+    with pytest.raises(ValueError):
+        flight.do("dossier:z", lambda: int("nope"))
+
+
+def test_forced_refresh_does_not_join_a_cached_read_flight(monkeypatch, fake_client):
+    from src.analysis import gemini_dossier
+    from src.utils.ai_cache import AICache
+    from src.utils.llm_gateway import LLMGateway
+
+    gate = threading.Event()
+
+    def answer(model, contents, config):
+        if len(calls) == 1:
+            gate.wait(5)        # the first (non-forced) call stays in flight
+        return '{"summary": "ok"}'
+
+    client = fake_client(answer)
+    calls = client.models.calls
+    monkeypatch.setattr(gemini_dossier, "llm_gateway", LLMGateway(client=client))
+    monkeypatch.setattr(gemini_dossier, "ai_cache", AICache(None))
+    service = gemini_dossier.GeminiDossierService()
+    payload = {"ticker": "ADBE", "name": "Adobe", "items": []}
+
+    reader = threading.Thread(target=lambda: service.generate_dossier("ADBE", payload))
+    reader.start()
+    _wait_until(lambda: len(calls) == 1)
+    forced = service.generate_dossier("ADBE", payload, force_refresh=True)
+    gate.set()
+    reader.join(5)
+
+    assert forced["cached"] is False and len(calls) == 2
+
+
+def _gated_events(calls, gate):
+    def events():
+        calls.append(1)
+        yield {"status": "Receiving", "chunk": "<h3>", "complete": False}
+        gate.wait(5)
+        yield {"status": "Complete", "complete": True, "html": "<h3>ACME</h3>"}
+    return events
+
+
+def test_concurrent_streams_share_one_execution():
+    flight = SingleFlight()
+    gate, calls = threading.Event(), []
+    events = _gated_events(calls, gate)
+
+    leader = flight.stream("deep_dive_stream:abc", events)
+    assert next(leader)["chunk"] == "<h3>"        # leader is in flight, waiting on the gate
+
+    out = []
+    follower = threading.Thread(target=lambda: out.extend(flight.stream("deep_dive_stream:abc", events)))
+    follower.start()
+    _wait_until(lambda: flight.stats()["groups"]["deep_dive_stream"]["shared"] == 1)
+    gate.set()
+    assert list(leader) == [{"status": "Complete", "complete": True, "html": "<h3>ACME</h3>"}]
+    follower.join(5)
+
+    # The follower joined after the chunks: it gets the final event only
+    assert out == [{"status": "Complete", "complete": True, "html": "<h3>ACME</h3>"}]
+    assert len(calls) == 1 and flight.stats()["in_flight"] == 0
+
+
+def test_abandoned_stream_lets_waiters_run_their_own():
+    flight = SingleFlight()
+    gate, calls = threading.Event(), []
+    events = _gated_events(calls, gate)
+    gate.set()
+
+    leader = flight.stream("dossier_stream:abc", events)
+    next(leader)
+    out = []
+    follower = threading.Thread(target=lambda: out.extend(flight.stream("dossier_stream:abc", events)))
+    follower.start()
+    _wait_until(lambda: flight.stats()["groups"]["dossier_stream"]["shared"] == 1)
+    leader.close()          # client went away before the final event
+    follower.join(5)
+
+    assert len(calls) == 2 and out[-1]["complete"] and flight.stats()["in_flight"] == 0
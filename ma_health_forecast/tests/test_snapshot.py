@@ -0,0 +1,40 @@
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd()))
+
+from src.index import snapshot as snap
+
+
+def use_tmp_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(snap, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(snap, "POINTER_FILE", str(tmp_path / "CURRENT"))
+
+
+def fake_snapshot(version, cfg_path):
+    return {"version": version, "config_hash": snap.config_hash(cfg_path), "index": [1, 2, 3]}
+
+
+def test_save_and_load_current(monkeypatch, tmp_path):
+    use_tmp_dir(monkeypatch, tmp_path)
+    cfg = tmp_path / "signals.yaml"
+    cfg.write_text("buckets: {}\n")
+
+    for i in range(5):
+        snap.save_snapshot(fake_snapshot(f"v{i}", str(cfg)))
+
+    assert snap.current_version() == "v4"
+    assert snap.load_snapshot(str(cfg))["index"] == [1, 2, 3]
+    pickles = [f for f in os.listdir(tmp_path) if f.endswith(".pkl")]
+    assert len(pickles) == snap.KEEP_VERSIONS
+
+
+def test_config_change_invalidates_snapshot(monkeypatch, tmp_path):
+    use_tmp_dir(monkeypatch, tmp_path)
+    cfg = tmp_path / "signals.yaml"
+    cfg.write_text("buckets: {}\n")
+    snap.save_snapshot(fake_snapshot("v1", str(cfg)))
+
+    cfg.write_text("buckets: {credit: {weight: 1.0}}\n")
+    assert snap.load_snapshot(str(cfg)) is None
@@ -33,7 +33,7 @@ def verify_logic():
     
     from app import get_cached_data, scale_0_100, apply_simulation_logic, calculate_scenario_forecast, load_config
     
-    df, fc_df, var_results = get_cached_data()
+    df, fc_df, var_results = get_cached_data(block=True)
     if df.empty:
         print("Cache empty.")
         return